@@ -0,0 +1,72 @@
+"""
+AST memory benchmark for MinLang Compiler
+Measures the memory the AST of a generated program retains per node,
+as objects and as a FlatAST, and the time of the passes that walk it
+
+Usage: python scripts/bench_ast_memory.py [functions]
+"""
+
+import sys
+import time
+import tracemalloc
+from dataclasses import fields
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_parser import corpus
+from src.lexer import Lexer
+from src.parser import Parser
+from src.parser.ast_nodes import ASTNode
+from src.semantic import SemanticAnalyzer
+from src.codegen import generate_tac
+
+
+def count_nodes(root: ASTNode) -> int:
+    """Count the nodes reachable from root"""
+    count = 0
+    stack = [root]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, ASTNode):
+            count += 1
+            stack.extend(getattr(value, field.name) for field in fields(value))
+    return count
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tokens = Lexer(corpus(functions), 'regex').tokenize()
+    
+    for flat in (False, True):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        ast = Parser(tokens, flat=flat).parse()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        
+        # The walks see a FlatAST through node views of its root, built
+        # on every access: the arena saves memory but slows the walks
+        if flat:
+            nodes = len(ast)
+            program = ast.program
+        else:
+            nodes = count_nodes(ast)
+            program = ast
+        print(f"{'flat' if flat else 'objects'}: {nodes} nodes, "
+              f"{retained / 1e6:.1f} MB, {retained / nodes:.0f} bytes/node")
+        
+        start = time.perf_counter()
+        analyzer = SemanticAnalyzer()
+        analyzer.analyze(program)
+        middle = time.perf_counter()
+        generate_tac(program, analyzer.symbol_table)
+        end = time.perf_counter()
+        print(f"  semantic analysis {(middle - start) * 1000:.0f} ms, "
+              f"TAC generation {(end - middle) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Parser micro-benchmark for MinLang Compiler
+Times parsing of a generated statement-heavy program
+
+Usage: python scripts/bench_parser.py [functions] [repeat]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.lexer import Lexer
+from src.parser import Parser
+
+
+FUNCTION = """
+int func_{n}(int a, int b) {{
+    int total = 0;
+    float scale = 1.5;
+    bool done = false;
+    while (a < b) {{
+        if (a % 2 == 0) {{
+            total = total + a;
+        }} else {{
+            total = total - 1;
+        }}
+        {{ int t = a * b; total = total + t; }}
+        a = a + 1;
+        done = !done;
+    }}
+    if (done) return total;
+    return func_{n}(total, b - 1);
+}}
+"""
+
+
+def corpus(functions: int) -> str:
+    """Build a program of many short statements"""
+    body = "".join(FUNCTION.format(n=n) for n in range(functions))
+    return body + "int main() { return func_0(1, 2); }\n"
+
+
+def bench(tokens, repeat: int, **modes) -> float:
+    """Best parse time in seconds over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Parser(tokens, **modes).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    tokens = Lexer(corpus(functions), 'regex').tokenize()
+    print(f"{len(tokens)} tokens, best of {repeat}")
+    # lazy: function bodies are only brace-matched (signature queries)
+    for mode in ('recursive', 'iterative', 'lazy'):
+        seconds = bench(tokens, repeat, iterative=mode == 'iterative', lazy=mode == 'lazy')
+        print(f"  {mode:<10} {seconds * 1000:8.1f} ms  "
+              f"{len(tokens) / seconds / 1e6:6.2f} M tokens/s")
+
+
+if __name__ == '__main__':
+    main()
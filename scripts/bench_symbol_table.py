@@ -0,0 +1,70 @@
+"""
+Symbol table benchmark for MinLang Compiler
+Compares SymbolTable with FlatSymbolTable on thousands of nested blocks
+whose statements read long-lived globals
+
+Usage: python scripts/bench_symbol_table.py [depth] [globals]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.parser import parse_string
+from src.semantic import SemanticAnalyzer, SymbolTable, FlatSymbolTable, SymbolKind, DataType
+
+
+def nested_program(depth: int, globals_count: int) -> str:
+    """Build a main() of depth nested blocks, each reading a global"""
+    lines = [f"int g{n} = {n};" for n in range(globals_count)]
+    lines.append("int main() {")
+    lines.append("int v = 0;")
+    for level in range(depth):
+        lines.append(f"{{ int v{level} = g{level % globals_count} + v; v = v{level};")
+    lines.append("}" * depth)
+    lines.append("return v; }")
+    return "\n".join(lines)
+
+
+def bench_api(table_class: type, depth: int, globals_count: int) -> float:
+    """Seconds to define, look up and unwind depth scopes"""
+    start = time.perf_counter()
+    table = table_class()
+    for n in range(globals_count):
+        table.define_symbol(f"g{n}", SymbolKind.VARIABLE, DataType.INT)
+    for level in range(depth):
+        table.enter_scope()
+        table.lookup_local(f"v{level}")
+        table.define_symbol(f"v{level}", SymbolKind.VARIABLE, DataType.INT)
+        table.lookup_symbol(f"g{level % globals_count}")
+        table.lookup_symbol("v0")
+    for _ in range(depth):
+        table.exit_scope()
+    return time.perf_counter() - start
+
+
+def bench_analysis(table_class: type, program) -> float:
+    """Seconds to analyze program with a table_class symbol table"""
+    start = time.perf_counter()
+    analyzer = SemanticAnalyzer(table_class())
+    if not analyzer.analyze(program):
+        raise RuntimeError(analyzer.errors[0])
+    return time.perf_counter() - start
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    globals_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    program = parse_string(nested_program(depth, globals_count), iterative=True)
+    print(f"{depth} nested blocks, {globals_count} globals")
+    for table_class in (SymbolTable, FlatSymbolTable):
+        api = bench_api(table_class, depth, globals_count)
+        analysis = bench_analysis(table_class, program)
+        print(f"  {table_class.__name__:<16} API {api * 1000:8.1f} ms   "
+              f"analysis {analysis * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,9 +3,10 @@ IR Generator for MinLang Compiler
 Generates Three-Address Code (TAC) from AST
 """
 
-from typing import Optional, List
+from typing import Any, Optional, List
 from ..parser.ast_nodes import *
 from ..semantic import DataType, SymbolTable
+from ..utils.trampoline import trampoline
 from .intermediate import (
     TACProgram, TACOpcode, TACInstruction
 )
@@ -28,6 +29,10 @@ class IRGenerator:
         program: TAC program being generated
         symbol_table: Symbol table from semantic analysis
         current_function: Name of current function being processed
+    
+    Generators for nodes with children yield each child and receive the
+    place holding its result; walk() runs them on an explicit stack so
+    deep nesting never hits the recursion limit.
     """
     
     def __init__(self, symbol_table: SymbolTable):
@@ -62,12 +67,60 @@ class IRGenerator:
         # Generate code for all declarations
         for declaration in ast.declarations:
             if isinstance(declaration, FunctionDeclaration):
-                self.gen_function(declaration)
+                self.walk(self.gen_function(declaration))
             elif isinstance(declaration, VariableDeclaration):
-                self.gen_global_var(declaration)
+                self.walk(self.gen_global_var(declaration))
         
         return self.program
     
+    def walk(self, node: Any) -> Any:
+        """
+        Generate code for a node (or run a generator step) without recursion
+        
+        Args:
+            node: AST node, or a generator returned by a gen_* method
+            
+        Returns:
+            The result place for expressions
+        """
+        return trampoline(node, self.visit)
+    
+    def visit(self, node: ASTNode) -> Any:
+        """Dispatch a node to its code generator"""
+        if isinstance(node, Literal):
+            return self.gen_literal(node)
+        elif isinstance(node, Identifier):
+            return self.gen_identifier(node)
+        elif isinstance(node, BinaryExpression):
+            return self.gen_binary_expression(node)
+        elif isinstance(node, UnaryExpression):
+            return self.gen_unary_expression(node)
+        elif isinstance(node, AssignmentExpression):
+            return self.gen_assignment_expression(node)
+        elif isinstance(node, CallExpression):
+            return self.gen_call_expression(node)
+        elif isinstance(node, Block):
+            return self.gen_block(node)
+        elif isinstance(node, VariableDeclaration):
+            return self.gen_var_declaration(node)
+        elif isinstance(node, ExpressionStatement):
+            return self.gen_expression_statement(node)
+        elif isinstance(node, IfStatement):
+            return self.gen_if_statement(node)
+        elif isinstance(node, WhileStatement):
+            return self.gen_while_statement(node)
+        elif isinstance(node, ForStatement):
+            return self.gen_for_statement(node)
+        elif isinstance(node, ReturnStatement):
+            return self.gen_return_statement(node)
+        elif isinstance(node, ReadStatement):
+            return self.gen_read_statement(node)
+        elif isinstance(node, PrintStatement):
+            return self.gen_print_statement(node)
+        else:
+            self.error(f"Unknown expression type: {type(node)}", 0, 0)
+            return self.program.new_temp()
+    
     def gen_global_var(self, node: VariableDeclaration):
         """
         Generate code for global variable declaration
@@ -78,7 +131,7 @@ class IRGenerator:
         # Global variables are handled by the runtime
         # If there's an initializer, generate assignment
         if node.initializer:
-            value = self.gen_expression(node.initializer)
+            value = yield node.initializer
             self.program.emit_assign(node.identifier, value)
     
     def gen_function(self, node: FunctionDeclaration):
@@ -97,7 +150,7 @@ class IRGenerator:
         # They are accessed by name directly
         
         # Generate function body
-        self.gen_statement(node.body)
+        yield node.body
         
         # Emit implicit return for void functions
         if node.return_type == "void":
@@ -115,24 +168,16 @@ class IRGenerator:
         Args:
             node: Statement AST node
         """
-        if isinstance(node, Block):
-            self.gen_block(node)
-        elif isinstance(node, VariableDeclaration):
-            self.gen_var_declaration(node)
-        elif isinstance(node, ExpressionStatement):
-            self.gen_expression(node.expression)
-        elif isinstance(node, IfStatement):
-            self.gen_if_statement(node)
-        elif isinstance(node, WhileStatement):
-            self.gen_while_statement(node)
-        elif isinstance(node, ForStatement):
-            self.gen_for_statement(node)
-        elif isinstance(node, ReturnStatement):
-            self.gen_return_statement(node)
-        elif isinstance(node, ReadStatement):
-            self.gen_read_statement(node)
-        elif isinstance(node, PrintStatement):
-            self.gen_print_statement(node)
+        self.walk(node)
+    
+    def gen_expression_statement(self, node: ExpressionStatement):
+        """
+        Generate code for expression statement
+        
+        Args:
+            node: Expression statement node
+        """
+        yield node.expression
     
     def gen_block(self, node: Block):
         """
@@ -142,7 +187,7 @@ class IRGenerator:
             node: Block node
         """
         for statement in node.statements:
-            self.gen_statement(statement)
+            yield statement
     
     def gen_var_declaration(self, node: VariableDeclaration):
         """
@@ -153,7 +198,7 @@ class IRGenerator:
         """
         # If there's an initializer, generate assignment
         if node.initializer:
-            value = self.gen_expression(node.initializer)
+            value = yield node.initializer
             self.program.emit_assign(node.identifier, value)
     
     def gen_if_statement(self, node: IfStatement):
@@ -164,7 +209,7 @@ class IRGenerator:
             node: If statement node
         """
         # Generate condition
-        condition = self.gen_expression(node.condition)
+        condition = yield node.condition
         
         # Create labels
         else_label = self.program.new_label("else")
@@ -176,12 +221,12 @@ class IRGenerator:
             self.program.emit_if_false(condition, else_label)
             
             # then branch
-            self.gen_statement(node.then_branch)
+            yield node.then_branch
             self.program.emit_goto(end_label)
             
             # else branch
             self.program.emit_label(else_label)
-            self.gen_statement(node.else_branch)
+            yield node.else_branch
             
             # end label
             self.program.emit_label(end_label)
@@ -191,7 +236,7 @@ class IRGenerator:
             self.program.emit_if_false(condition, end_label)
             
             # then branch
-            self.gen_statement(node.then_branch)
+            yield node.then_branch
             
             # end label
             self.program.emit_label(end_label)
@@ -211,13 +256,13 @@ class IRGenerator:
         self.program.emit_label(start_label)
         
         # Generate condition
-        condition = self.gen_expression(node.condition)
+        condition = yield node.condition
         
         # iffalse condition goto end_label
         self.program.emit_if_false(condition, end_label)
         
         # Loop body
-        self.gen_statement(node.body)
+        yield node.body
         
         # goto start_label
         self.program.emit_goto(start_label)
@@ -234,7 +279,7 @@ class IRGenerator:
         """
         # Generate initialization
         if node.init:
-            self.gen_expression(node.init)
+            yield node.init
         
         # Create labels
         start_label = self.program.new_label("for_start")
@@ -243,18 +288,19 @@ class IRGenerator:
         # start_label:
         self.program.emit_label(start_label)
         
-        # Generate condition
-        condition = self.gen_expression(node.condition)
-        
-        # iffalse condition goto end_label
-        self.program.emit_if_false(condition, end_label)
+        # Generate condition; without one the loop only ends by return
+        if node.condition is not None:
+            condition = yield node.condition
+            
+            # iffalse condition goto end_label
+            self.program.emit_if_false(condition, end_label)
         
         # Loop body
-        self.gen_statement(node.body)
+        yield node.body
         
         # Generate increment
         if node.increment:
-            self.gen_expression(node.increment)
+            yield node.increment
         
         # goto start_label
         self.program.emit_goto(start_label)
@@ -270,7 +316,7 @@ class IRGenerator:
             node: Return statement node
         """
         if node.value:
-            value = self.gen_expression(node.value)
+            value = yield node.value
             self.program.emit_return(value)
         else:
             self.program.emit_return()
@@ -291,7 +337,7 @@ class IRGenerator:
         Args:
             node: Print statement node
         """
-        value = self.gen_expression(node.expression)
+        value = yield node.expression
         self.program.emit_print(value)
     
     def gen_expression(self, node: ASTNode) -> str:
@@ -304,21 +350,7 @@ class IRGenerator:
         Returns:
             Variable or temporary holding the result
         """
-        if isinstance(node, Literal):
-            return self.gen_literal(node)
-        elif isinstance(node, Identifier):
-            return self.gen_identifier(node)
-        elif isinstance(node, BinaryExpression):
-            return self.gen_binary_expression(node)
-        elif isinstance(node, UnaryExpression):
-            return self.gen_unary_expression(node)
-        elif isinstance(node, AssignmentExpression):
-            return self.gen_assignment_expression(node)
-        elif isinstance(node, CallExpression):
-            return self.gen_call_expression(node)
-        else:
-            self.error(f"Unknown expression type: {type(node)}", 0, 0)
-            return self.program.new_temp()
+        return self.walk(node)
     
     def gen_literal(self, node: Literal) -> str:
         """
@@ -364,8 +396,8 @@ class IRGenerator:
             Temporary variable holding result
         """
         # Generate code for operands
-        left = self.gen_expression(node.left)
-        right = self.gen_expression(node.right)
+        left = yield node.left
+        right = yield node.right
         
         # Create temporary for result
         result = self.program.new_temp()
@@ -406,7 +438,7 @@ class IRGenerator:
             Temporary variable holding result
         """
         # Generate code for operand
-        operand = self.gen_expression(node.operand)
+        operand = yield node.operand
         
         # Create temporary for result
         result = self.program.new_temp()
@@ -436,7 +468,7 @@ class IRGenerator:
             Variable being assigned to
         """
         # Generate code for value
-        value = self.gen_expression(node.value)
+        value = yield node.value
         
         # Generate assignment
         self.program.emit_assign(node.identifier, value)
@@ -457,25 +489,26 @@ class IRGenerator:
         if node.identifier == "read":
             # read is handled as a statement
             if node.arguments:
-                arg = self.gen_expression(node.arguments[0])
+                arg = yield node.arguments[0]
                 self.program.emit_read(arg)
             return ""
         
         elif node.identifier == "print":
             # print is handled as a statement
             if node.arguments:
-                arg = self.gen_expression(node.arguments[0])
+                arg = yield node.arguments[0]
                 self.program.emit_print(arg)
             return ""
         
         # Regular function call
         # Generate code for arguments (in reverse order for stack-based calling)
         for arg in reversed(node.arguments):
-            arg_value = self.gen_expression(arg)
+            arg_value = yield arg
             self.program.emit_param(arg_value)
         
-        # Look up function in symbol table to check return type
-        symbol = self.symbol_table.lookup_symbol(node.identifier)
+        # The function's symbol, bound during semantic analysis; a tree
+        # that was never analyzed falls back to a lookup
+        symbol = node.symbol or self.symbol_table.lookup_symbol(node.identifier)
         
         # Generate call
         if symbol and symbol.return_type != DataType.VOID:
@@ -2,17 +2,28 @@
 Lexer package for MinLang Compiler
 """
 
-from .token import Token, TokenType, KEYWORDS, OPERATORS, DELIMITERS
+from .token import Token, TokenType, NameTable, KEYWORDS, OPERATORS, DELIMITERS
+from .token_buffer import TokenBuffer
 from .lexer import Lexer, LexerError, tokenize_file, tokenize_string
+from .tokenizer import Tokenizer, tokenize
+from .parallel import tokenize_file_parallel
+from .incremental import Edit, IncrementalLexer
 
 __all__ = [
     'Token',
     'TokenType',
+    'NameTable',
     'KEYWORDS',
     'OPERATORS',
     'DELIMITERS',
+    'TokenBuffer',
     'Lexer',
     'LexerError',
     'tokenize_file',
     'tokenize_string',
+    'tokenize_file_parallel',
+    'Edit',
+    'IncrementalLexer',
+    'Tokenizer',
+    'tokenize',
 ]
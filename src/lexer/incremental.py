@@ -0,0 +1,145 @@
+"""
+Incremental lexing for MinLang Compiler
+Re-lexes only the part of an edited buffer that an edit can affect
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from .token import Token
+from .lexer import Lexer, LexerError
+
+
+@dataclass(frozen=True)
+class Edit:
+    """
+    A single text edit of a source buffer
+    
+    Attributes:
+        offset: Offset where the edit starts
+        removed: Number of characters removed at offset
+        inserted: Text inserted at offset
+    """
+    offset: int
+    removed: int
+    inserted: str
+    
+    @property
+    def delta(self) -> int:
+        """Change in source length caused by the edit"""
+        return len(self.inserted) - self.removed
+    
+    def apply(self, source: str) -> str:
+        """Return source with the edit applied"""
+        return source[:self.offset] + self.inserted + source[self.offset + self.removed:]
+
+
+def token_index(tokens: List[Token], offset: int) -> int:
+    """
+    Find the first token that starts at or after an offset
+    
+    Args:
+        tokens: Tokens sorted by offset
+        offset: Source offset
+    
+    Returns:
+        Index of that token (len(tokens) if there is none)
+    """
+    low, high = 0, len(tokens)
+    while low < high:
+        mid = (low + high) // 2
+        if tokens[mid].offset < offset:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+class IncrementalLexer:
+    """
+    Keeps the token list of an editor buffer up to date across edits
+    
+    An edit is re-lexed from the last token that starts before it (the
+    lexer carries no state between tokens, so that is a safe restart
+    point) until a new token starts where a shifted old token started
+    after the edit; from there on the old tokens are reused, moved by
+    the edit's length change. The line index is updated in place.
+    
+    Attributes:
+        source: Current buffer text
+        engine: Scanning engine used for re-lexing
+        filename: Source file name recorded on tokens
+        lines: LineIndex shared by all tokens
+        name_table: Identifier interning table shared across edits
+        tokens: Current tokens, or None after a lexer error
+    """
+    
+    def __init__(self, source: str, engine: str = 'regex',
+                 filename: Optional[str] = None):
+        """
+        Lex the initial buffer
+        
+        Args:
+            source: Initial buffer text
+            engine: Scanning engine, one of LEXER_ENGINES
+            filename: Source file name to record on tokens
+        """
+        lexer = Lexer(source, engine, filename)
+        self.source = source
+        self.engine = engine
+        self.filename = filename
+        self.lines = lexer.lines
+        self.name_table = lexer.name_table
+        self.tokens: Optional[List[Token]] = None
+        self.tokens = lexer.tokenize()
+    
+    def relex(self, edit: Edit) -> Tuple[int, int, int]:
+        """
+        Apply an edit and update the token list
+        
+        Args:
+            edit: The edit to apply
+        
+        Returns:
+            Tuple (index, removed, inserted): tokens[index:index + removed]
+            of the old list were replaced by tokens[index:index + inserted]
+        
+        Raises:
+            LexerError: If the edited buffer does not lex; the next edit
+                then re-lexes the whole buffer
+        """
+        self.source = edit.apply(self.source)
+        self.lines.apply_edit(edit.offset, edit.removed, edit.inserted)
+        lexer = Lexer(self.source, self.engine, self.filename,
+                      self.name_table, self.lines)
+        
+        old = self.tokens
+        self.tokens = None
+        if old is None:
+            self.tokens = lexer.tokenize()
+            return 0, 0, len(self.tokens)
+        
+        # Restart at the last token that starts before the edit
+        first = token_index(old, edit.offset)
+        if first > 0:
+            first -= 1
+            lexer.skip_to(old[first].offset)
+        
+        # Old tokens after the removed text, and where they now start
+        delta = edit.delta
+        new_tail = edit.offset + len(edit.inserted)
+        resync = token_index(old, edit.offset + edit.removed)
+        
+        fresh = []
+        for token in lexer.iter_tokens():
+            if token.offset >= new_tail:
+                while old[resync].offset + delta < token.offset:
+                    resync += 1
+                if old[resync].offset + delta == token.offset:
+                    break
+            fresh.append(token)
+        
+        for token in old[resync:]:
+            token.shift(delta)
+        old[first:resync] = fresh
+        self.tokens = old
+        return first, resync - first, len(fresh)
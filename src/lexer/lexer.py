@@ -3,11 +3,15 @@ Lexical Analyzer (Lexer) for MinLang Compiler
 Converts source code into a stream of tokens
 """
 
-from typing import List, Optional
+import mmap as mmap_module
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 from .token import (
-    Token, TokenType, KEYWORDS, OPERATORS, DELIMITERS,
-    is_keyword, get_keyword_type, is_operator_char, is_delimiter
+    Token, TokenType, LineIndex, ByteLineIndex, NameTable, KEYWORDS, OPERATORS, DELIMITERS,
+    is_operator_char, is_delimiter
 )
+from .token_buffer import TokenBuffer
 
 
 class LexerError(Exception):
@@ -19,31 +23,135 @@ class LexerError(Exception):
         super().__init__(f"Lexer Error at {line}:{column} - {message}")
 
 
+# Master pattern for the regex engine. Whitespace and comments are skipped
+# as a prefix, then one alternation with a named group per lexeme class is
+# tried in order, so every match yields exactly one token. Each comment
+# form matches in exactly one way, so backtracking can never re-enter one.
+MASTER_PATTERN = re.compile(r"""
+    [ \t\r\n]*(?:(?://[^\n]*(?![^\n])|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)[ \t\r\n]*)*
+    (?:
+        (?P<NUMBER>\d+(?:\.\d+)?)(?![.\d])
+      | (?P<IDENTIFIER>[^\W\d]\w*)
+      | (?P<PUNCTUATION><=|>=|==|!=|&&|\|\||[-+*%<>=!;,(){}\[\]]|/(?![*/]))
+      | (?P<STRING>"[^"\\\n]*(?:\\[ntr0\\"][^"\\\n]*)*")
+      | (?P<CHAR>'(?:[^'\\]|\\[ntr0\\'])')
+      | (?P<END>\Z)
+    )
+""", re.VERBOSE)
+
+# Escape sequences accepted inside string and character literals
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', '\\': '\\', '"': '"', '\'': '\''}
+
+ESCAPE_PATTERN = re.compile(r'\\(.)')
+
+# Escapes valid in string literals, and the characters that end a plain run
+STRING_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', '\\': '\\', '"': '"'}
+STRING_SPECIAL = re.compile(r'["\\\n]')
+
+# Operators and delimiters share one lookup in the regex engine
+PUNCTUATION = {**OPERATORS, **DELIMITERS}
+
+# Keyword text -> (token type, token value); true/false carry booleans and
+# every other keyword carries the one shared KEYWORDS key string
+KEYWORD_VALUES = {
+    text: (token_type, {TokenType.TRUE: True, TokenType.FALSE: False}.get(token_type, text))
+    for text, token_type in KEYWORDS.items()
+}
+
+LEXER_ENGINES = ('char', 'regex')
+
+# Bytes version of MASTER_PATTERN for UTF-8 input. Bytes of multi-byte
+# characters are let into identifiers and literals and checked after
+# decoding; a number running into one is rejected so the character engine
+# decides. Anything rejected goes to the character engine, as above.
+BYTES_PATTERN = re.compile(rb"""
+    [ \t\r\n]*(?:(?://[^\n]*(?![^\n])|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)[ \t\r\n]*)*
+    (?:
+        (?P<NUMBER>\d+(?:\.\d+)?)(?![.\d\x80-\xff])
+      | (?P<IDENTIFIER>[A-Za-z_\x80-\xff][\w\x80-\xff]*)
+      | (?P<PUNCTUATION><=|>=|==|!=|&&|\|\||[-+*%<>=!;,(){}\[\]]|/(?![*/]))
+      | (?P<STRING>"[^"\\\n]*(?:\\[ntr0\\"][^"\\\n]*)*")
+      | (?P<CHAR>'(?:[^'\\\x80-\xff]|[\xc0-\xff][\x80-\xbf]+|\\[ntr0\\'])')
+      | (?P<END>\Z)
+    )
+""", re.VERBOSE)
+
+BYTES_PUNCTUATION = {text.encode(): (token_type, text)
+                     for text, token_type in PUNCTUATION.items()}
+
+
 class Lexer:
     """
     Lexical Analyzer that tokenizes MinLang source code
     
+    Two scanning engines produce the same token stream:
+    
+    - ``char``: walks the source one character at a time (default)
+    - ``regex``: matches whole lexemes with MASTER_PATTERN and only falls
+      back to the character walker for malformed input, so error messages
+      and positions are identical
+    
     Attributes:
         source: The source code string to analyze
+        engine: Name of the scanning engine
         position: Current position in source code
         line: Current line number (1-indexed)
         column: Current column number (1-indexed)
         current_char: Character at current position
+        filename: Source file name recorded on every token (or None)
+        name_table: Interned identifier names and their ids
     """
     
-    def __init__(self, source: str):
+    def __init__(self, source: str, engine: str = 'char',
+                 filename: Optional[str] = None,
+                 name_table: Optional[NameTable] = None,
+                 lines: Optional[LineIndex] = None):
         """
         Initialize the lexer with source code
         
         Args:
             source: MinLang source code as string
+            engine: Scanning engine, one of LEXER_ENGINES
+            filename: Source file name to record on tokens
+            name_table: Table to intern identifiers into (shared across
+                lexers to number names program-wide); a new one by default
+            lines: Line index already built for source (built if omitted)
         """
+        if engine not in LEXER_ENGINES:
+            raise ValueError(f"Unknown lexer engine: {engine}")
         self.source = source
+        self.engine = engine
+        self.filename = filename
+        self.name_table = name_table if name_table is not None else NameTable()
+        self.lines = lines if lines is not None else LineIndex(source)
         self.position = 0
-        self.line = 1
-        self.column = 1
         self.current_char = self.source[0] if source else None
     
+    @property
+    def line(self) -> int:
+        """Current line number, resolved from the line index"""
+        return self.lines.position(self.position)[0]
+    
+    @property
+    def column(self) -> int:
+        """Current column number, resolved from the line index"""
+        return self.lines.position(self.position)[1]
+    
+    def make_token(self, token_type: TokenType, value, start: int) -> Token:
+        """
+        Create a token that starts at the given source offset
+        
+        Args:
+            token_type: Type of the token
+            value: Token value
+            start: Offset of the first character of the token
+            
+        Returns:
+            Token whose line and column resolve lazily
+        """
+        return Token(token_type, value, offset=start, lines=self.lines,
+                     file=self.filename)
+    
     def error(self, message: str) -> None:
         """
         Raise a lexer error with current position
@@ -51,16 +159,11 @@ class Lexer:
         Args:
             message: Error message
         """
-        raise LexerError(message, self.line, self.column)
+        line, column = self.lines.position(self.position)
+        raise LexerError(message, line, column)
     
     def advance(self) -> None:
         """Move to the next character in the source code"""
-        if self.current_char == '\n':
-            self.line += 1
-            self.column = 1
-        else:
-            self.column += 1
-        
         self.position += 1
         if self.position >= len(self.source):
             self.current_char = None
@@ -82,6 +185,17 @@ class Lexer:
             return None
         return self.source[peek_pos]
     
+    def skip_to(self, end: int) -> None:
+        """
+        Move directly to an absolute position
+        
+        Args:
+            end: Position to move to
+        """
+        source = self.source
+        self.position = end
+        self.current_char = source[end] if end < len(source) else None
+    
     def skip_whitespace(self) -> None:
         """Skip whitespace characters except newlines"""
         while self.current_char is not None and self.current_char in ' \t\r':
@@ -116,108 +230,119 @@ class Lexer:
         """
         Read a numeric literal (integer or float)
         
+        The digits are scanned by offset and converted from a single
+        slice of the source.
+        
         Returns:
             Token representing the number
         """
-        start_line = self.line
-        start_column = self.column
-        num_str = ''
+        source = self.source
+        length = len(source)
+        start = end = self.position
         is_float = False
         
-        # Read digits and possibly a decimal point
-        while self.current_char is not None and (self.current_char.isdigit() or self.current_char == '.'):
-            if self.current_char == '.':
-                if is_float:
-                    self.error("Multiple decimal points in number")
-                is_float = True
-                num_str += self.current_char
-                self.advance()
-                
-                # Must have digit after decimal point
-                if self.current_char is None or not self.current_char.isdigit():
-                    self.error("Expected digit after decimal point")
-            else:
-                num_str += self.current_char
-                self.advance()
+        while end < length and source[end].isdigit():
+            end += 1
+        
+        if end < length and source[end] == '.':
+            is_float = True
+            end += 1
+            # Must have digit after decimal point
+            if end >= length or not source[end].isdigit():
+                self.skip_to(end)
+                self.error("Expected digit after decimal point")
+            while end < length and source[end].isdigit():
+                end += 1
+            if end < length and source[end] == '.':
+                self.skip_to(end)
+                self.error("Multiple decimal points in number")
+        
+        self.skip_to(end)
+        num_str = source[start:end]
         
         # Create appropriate token
         if is_float:
-            return Token(TokenType.FLOAT_LITERAL, float(num_str), start_line, start_column)
+            return self.make_token(TokenType.FLOAT_LITERAL, float(num_str), start)
         else:
-            return Token(TokenType.INTEGER_LITERAL, int(num_str), start_line, start_column)
+            return self.make_token(TokenType.INTEGER_LITERAL, int(num_str), start)
     
     def read_identifier(self) -> Token:
         """
         Read an identifier or keyword
         
+        Identifier names are interned in the name table; keyword values
+        are the shared KEYWORDS strings.
+        
         Returns:
             Token representing identifier or keyword
         """
-        start_line = self.line
-        start_column = self.column
-        id_str = ''
+        source = self.source
+        length = len(source)
+        start = end = self.position
         
         # Read alphanumeric characters and underscores
-        while (self.current_char is not None and 
-               (self.current_char.isalnum() or self.current_char == '_')):
-            id_str += self.current_char
-            self.advance()
+        while end < length and (source[end].isalnum() or source[end] == '_'):
+            end += 1
+        
+        self.skip_to(end)
+        id_str = source[start:end]
         
         # Check if it's a keyword
-        if is_keyword(id_str):
-            token_type = get_keyword_type(id_str)
-            # For boolean literals, store the actual boolean value
-            if token_type == TokenType.TRUE:
-                return Token(token_type, True, start_line, start_column)
-            elif token_type == TokenType.FALSE:
-                return Token(token_type, False, start_line, start_column)
-            return Token(token_type, id_str, start_line, start_column)
+        keyword = KEYWORD_VALUES.get(id_str)
+        if keyword is not None:
+            return self.make_token(keyword[0], keyword[1], start)
         
         # It's an identifier
-        return Token(TokenType.IDENTIFIER, id_str, start_line, start_column)
+        return self.make_token(TokenType.IDENTIFIER, self.name_table.intern(id_str), start)
     
     def read_string(self) -> Token:
         """
         Read a string literal enclosed in double quotes
         
+        Literals without escapes are taken as one slice of the source;
+        only literals containing a backslash go through escape decoding.
+        
         Returns:
             Token representing the string
         """
-        start_line = self.line
-        start_column = self.column
-        
-        # Skip opening quote
-        self.advance()
-        
-        string_value = ''
-        while self.current_char is not None and self.current_char != '"':
-            if self.current_char == '\\':
-                # Handle escape sequences
-                self.advance()
-                if self.current_char == 'n':
-                    string_value += '\n'
-                elif self.current_char == 't':
-                    string_value += '\t'
-                elif self.current_char == '\\':
-                    string_value += '\\'
-                elif self.current_char == '"':
-                    string_value += '"'
-                else:
-                    self.error(f"Invalid escape sequence: \\{self.current_char}")
-                self.advance()
-            elif self.current_char == '\n':
+        source = self.source
+        start = self.position
+        
+        # Fast path: closing quote on the same line and no escapes
+        close = source.find('"', start + 1)
+        if (close != -1 and source.find('\\', start + 1, close) == -1 and
+                source.find('\n', start + 1, close) == -1):
+            self.skip_to(close + 1)
+            return self.make_token(TokenType.STRING_LITERAL, source[start + 1:close], start)
+        
+        # Slow path: decode escapes chunk by chunk
+        parts = []
+        chunk_start = start + 1
+        while True:
+            special = STRING_SPECIAL.search(source, chunk_start)
+            if special is None:
+                self.skip_to(len(source))
                 self.error("Unterminated string literal")
-            else:
-                string_value += self.current_char
-                self.advance()
-        
-        if self.current_char is None:
-            self.error("Unterminated string literal")
+            pos = special.start()
+            char = source[pos]
+            parts.append(source[chunk_start:pos])
+            if char == '"':
+                break
+            if char == '\n':
+                self.skip_to(pos)
+                self.error("Unterminated string literal")
+            # Handle escape sequences
+            escape = source[pos + 1:pos + 2]
+            if escape not in STRING_ESCAPES:
+                self.skip_to(pos + 1)
+                self.error(f"Invalid escape sequence: \\{self.current_char}")
+            parts.append(STRING_ESCAPES[escape])
+            chunk_start = pos + 2
         
         # Skip closing quote
-        self.advance()
+        self.skip_to(pos + 1)
         
-        return Token(TokenType.STRING_LITERAL, string_value, start_line, start_column)
+        return self.make_token(TokenType.STRING_LITERAL, ''.join(parts), start)
     
     def read_char(self) -> Token:
         """
@@ -226,8 +351,7 @@ class Lexer:
         Returns:
             Token representing the character
         """
-        start_line = self.line
-        start_column = self.column
+        start = self.position
         
         # Skip opening quote
         self.advance()
@@ -243,6 +367,10 @@ class Lexer:
                 char_value = '\n'
             elif self.current_char == 't':
                 char_value = '\t'
+            elif self.current_char == 'r':
+                char_value = '\r'
+            elif self.current_char == '0':
+                char_value = '\0'
             elif self.current_char == '\\':
                 char_value = '\\'
             elif self.current_char == '\'':
@@ -260,7 +388,7 @@ class Lexer:
         # Skip closing quote
         self.advance()
         
-        return Token(TokenType.CHAR_LITERAL, char_value, start_line, start_column)
+        return self.make_token(TokenType.CHAR_LITERAL, char_value, start)
     
     def read_operator(self) -> Token:
         """
@@ -269,8 +397,7 @@ class Lexer:
         Returns:
             Token representing the operator
         """
-        start_line = self.line
-        start_column = self.column
+        start = self.position
         
         # Check for two-character operators
         if self.peek() is not None:
@@ -278,13 +405,13 @@ class Lexer:
             if two_char in OPERATORS:
                 self.advance()
                 self.advance()
-                return Token(OPERATORS[two_char], two_char, start_line, start_column)
+                return self.make_token(OPERATORS[two_char], two_char, start)
         
         # Single character operator
         op = self.current_char
         if op in OPERATORS:
             self.advance()
-            return Token(OPERATORS[op], op, start_line, start_column)
+            return self.make_token(OPERATORS[op], op, start)
         
         self.error(f"Unknown operator: {op}")
     
@@ -301,7 +428,7 @@ class Lexer:
                 self.skip_whitespace()
                 continue
             
-            # Skip newlines (but track line numbers)
+            # Skip newlines
             if self.current_char == '\n':
                 self.advance()
                 continue
@@ -338,59 +465,282 @@ class Lexer:
             # Delimiters
             if is_delimiter(self.current_char):
                 char = self.current_char
-                line = self.line
-                col = self.column
+                start = self.position
                 self.advance()
-                return Token(DELIMITERS[char], char, line, col)
+                return self.make_token(DELIMITERS[char], char, start)
             
             # Unknown character
             self.error(f"Unexpected character: '{self.current_char}'")
         
         # End of file
-        return Token(TokenType.EOF, None, self.line, self.column)
+        return self.make_token(TokenType.EOF, None, self.position)
     
-    def tokenize(self) -> List[Token]:
+    def scan_regex(self) -> Iterator[Token]:
         """
-        Tokenize the entire source code
+        Yield tokens using the master-pattern regex engine
         
-        Returns:
-            List of all tokens in the source code
+        Lexemes are matched at the current offset with MASTER_PATTERN.
+        Anything the pattern rejects (unknown characters, bad escapes,
+        unterminated literals, malformed numbers) is handed to
+        get_next_token() so errors match the character engine exactly.
+        
+        Yields:
+            Tokens up to and including EOF
+        """
+        source = self.source
+        lines = self.lines
+        file = self.filename
+        match = MASTER_PATTERN.match
+        punctuation = PUNCTUATION
+        keywords = KEYWORD_VALUES
+        identifier = TokenType.IDENTIFIER
+        table = self.name_table
+        names = table.names
+        name_ids = table.ids
+        pos = self.position
+        
+        while True:
+            m = match(source, pos)
+            kind = m.lastgroup if m else None
+            
+            if kind == 'IDENTIFIER':
+                text = m.group(kind)
+                keyword = keywords.get(text)
+                if keyword is None:
+                    name_id = name_ids.get(text)
+                    text = table.intern(text) if name_id is None else names[name_id]
+                    yield Token(identifier, text, 0, 0, m.start(kind), lines, file)
+                else:
+                    yield Token(keyword[0], keyword[1], 0, 0, m.start(kind), lines, file)
+            elif kind == 'PUNCTUATION':
+                text = m.group(kind)
+                yield Token(punctuation[text], text, 0, 0, m.start(kind), lines, file)
+            elif kind == 'NUMBER':
+                text = m.group(kind)
+                if '.' in text:
+                    yield Token(TokenType.FLOAT_LITERAL, float(text), 0, 0, m.start(kind), lines, file)
+                else:
+                    yield Token(TokenType.INTEGER_LITERAL, int(text), 0, 0, m.start(kind), lines, file)
+            elif kind == 'STRING':
+                text = m.group(kind)[1:-1]
+                if '\\' in text:
+                    text = ESCAPE_PATTERN.sub(lambda e: ESCAPES[e.group(1)], text)
+                yield Token(TokenType.STRING_LITERAL, text, 0, 0, m.start(kind), lines, file)
+            elif kind == 'CHAR':
+                text = m.group(kind)[1:-1]
+                if text[0] == '\\':
+                    text = ESCAPES[text[1]]
+                yield Token(TokenType.CHAR_LITERAL, text, 0, 0, m.start(kind), lines, file)
+            elif kind == 'END':
+                break
+            else:
+                # Let the character engine raise (or recover) from here
+                self.skip_to(pos)
+                token = self.get_next_token()
+                yield token
+                if token.type == TokenType.EOF:
+                    return
+                pos = self.position
+                continue
+            
+            pos = m.end()
+        
+        self.skip_to(len(source))
+        yield self.make_token(TokenType.EOF, None, self.position)
+    
+    def iter_tokens(self) -> Iterator[Token]:
         """
-        tokens = []
+        Lazily tokenize the source code
+        
+        Tokens are produced one at a time, so a consumer such as the
+        Parser never needs the whole token list in memory.
+        
+        Yields:
+            Tokens up to and including EOF
+        """
+        if self.engine == 'regex':
+            yield from self.scan_regex()
+            return
+        
         while True:
             token = self.get_next_token()
-            tokens.append(token)
+            yield token
             if token.type == TokenType.EOF:
                 break
-        return tokens
+    
+    def tokenize(self) -> List[Token]:
+        """
+        Tokenize the entire source code
+        
+        Returns:
+            List of all tokens in the source code
+        """
+        return list(self.iter_tokens())
+    
+    def tokenize_buffer(self) -> TokenBuffer:
+        """
+        Tokenize the entire source code into a compact TokenBuffer
+        
+        Returns:
+            TokenBuffer holding all tokens in the source code
+        """
+        return TokenBuffer.from_tokens(self.iter_tokens(), self.lines)
+
 
+def is_identifier(text: str) -> bool:
+    """Check if text is a whole identifier by the character engine's rules"""
+    return ((text[0].isalpha() or text[0] == '_') and
+            all(c.isalnum() or c == '_' for c in text))
 
-def tokenize_file(filename: str) -> List[Token]:
+
+def scan_bytes(data, filename: Optional[str] = None,
+               name_table: Optional[NameTable] = None) -> Iterator[Token]:
+    """
+    Yield tokens from UTF-8 encoded source bytes
+    
+    Works on anything exposing the buffer protocol, notably a read-only
+    mmap, without decoding the whole input: only identifiers and literal
+    contents are decoded. Token offsets are byte offsets and positions
+    resolve through a ByteLineIndex. Input the bytes pattern rejects is
+    handed to a character Lexer over the decoded source, so errors and
+    their positions match the other engines.
+    
+    Args:
+        data: Source bytes (bytes, bytearray or mmap)
+        filename: Source file name to record on tokens
+        name_table: Table to intern identifiers into (a new one by default)
+        
+    Yields:
+        Tokens up to and including EOF
+    """
+    lines = ByteLineIndex(data)
+    match = BYTES_PATTERN.match
+    punctuation = BYTES_PUNCTUATION
+    keywords = KEYWORD_VALUES
+    identifier = TokenType.IDENTIFIER
+    if name_table is None:
+        name_table = NameTable()
+    words = {}
+    fallback = None
+    pos = 0
+    
+    while True:
+        m = match(data, pos)
+        kind = m.lastgroup if m else None
+        
+        if kind == 'IDENTIFIER':
+            raw = m.group(kind)
+            # Decoded once per spelling: (token type, interned value)
+            word = words.get(raw)
+            if word is None:
+                name = raw.decode('utf-8')
+                if raw.isascii() or is_identifier(name):
+                    word = keywords.get(name) or (identifier, name_table.intern(name))
+                    words[raw] = word
+                else:
+                    kind = None
+            if kind is not None:
+                yield Token(word[0], word[1], 0, 0, m.start(kind), lines, filename)
+        elif kind == 'PUNCTUATION':
+            token_type, text = punctuation[m.group(kind)]
+            yield Token(token_type, text, 0, 0, m.start(kind), lines, filename)
+        elif kind == 'NUMBER':
+            raw = m.group(kind)
+            if b'.' in raw:
+                yield Token(TokenType.FLOAT_LITERAL, float(raw), 0, 0, m.start(kind), lines, filename)
+            else:
+                yield Token(TokenType.INTEGER_LITERAL, int(raw), 0, 0, m.start(kind), lines, filename)
+        elif kind == 'STRING':
+            text = m.group(kind)[1:-1].decode('utf-8')
+            if '\\' in text:
+                text = ESCAPE_PATTERN.sub(lambda e: ESCAPES[e.group(1)], text)
+            yield Token(TokenType.STRING_LITERAL, text, 0, 0, m.start(kind), lines, filename)
+        elif kind == 'CHAR':
+            text = m.group(kind)[1:-1].decode('utf-8')
+            if text[0] == '\\':
+                text = ESCAPES[text[1]]
+            if len(text) == 1:
+                yield Token(TokenType.CHAR_LITERAL, text, 0, 0, m.start(kind), lines, filename)
+            else:
+                kind = None
+        elif kind == 'END':
+            break
+        
+        if kind is not None:
+            pos = m.end()
+            continue
+        
+        # Let the character engine raise (or recover) from here
+        if fallback is None:
+            source = bytes(data).decode('utf-8')
+            fallback = Lexer(source, filename=filename, name_table=name_table)
+        char_pos = len(data[:pos].decode('utf-8'))
+        fallback.skip_to(char_pos)
+        token = fallback.get_next_token()
+        if token.type == TokenType.EOF:
+            break
+        start = pos + len(source[char_pos:token.offset].encode('utf-8'))
+        yield Token(token.type, token.value, 0, 0, start, lines, filename)
+        pos = start + len(source[token.offset:fallback.position].encode('utf-8'))
+    
+    yield Token(TokenType.EOF, None, 0, 0, len(data), lines, filename)
+
+
+@contextmanager
+def map_source(filename: str):
+    """
+    Map a source file into memory read-only
+    
+    Args:
+        filename: Path to the source file
+        
+    Yields:
+        An mmap of the file (or b'' for an empty file, which cannot be mapped)
+    """
+    with open(filename, 'rb') as f:
+        try:
+            data = mmap_module.mmap(f.fileno(), 0, access=mmap_module.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        with data:
+            yield data
+
+
+def tokenize_file(filename: str, engine: str = 'char', mmap: bool = False) -> List[Token]:
     """
     Tokenize a MinLang source file
     
     Args:
         filename: Path to the source file
+        engine: Scanning engine, one of LEXER_ENGINES
+        mmap: Lex the memory-mapped bytes with scan_bytes() instead of
+            reading the file into a str (engine is then ignored)
         
     Returns:
         List of tokens
     """
+    if mmap:
+        with map_source(filename) as data:
+            return list(scan_bytes(data))
+    
     with open(filename, 'r') as f:
         source = f.read()
     
-    lexer = Lexer(source)
+    lexer = Lexer(source, engine)
     return lexer.tokenize()
 
 
-def tokenize_string(source: str) -> List[Token]:
+def tokenize_string(source: str, engine: str = 'char') -> List[Token]:
     """
     Tokenize a MinLang source string
     
     Args:
         source: Source code string
+        engine: Scanning engine, one of LEXER_ENGINES
         
     Returns:
         List of tokens
     """
-    lexer = Lexer(source)
+    lexer = Lexer(source, engine)
     return lexer.tokenize()
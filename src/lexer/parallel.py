@@ -0,0 +1,160 @@
+"""
+Parallel lexing for MinLang Compiler
+Splits a large source file at safe newlines and lexes the chunks in
+worker processes
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Tuple
+from .token import TokenType, ByteLineIndex
+from .token_buffer import TokenBuffer
+from .lexer import LexerError, map_source, scan_bytes
+
+
+# Chunks smaller than this are not worth a worker process
+PARALLEL_MIN_CHUNK = 256 * 1024
+
+# Constructs that may hide a newline from the split-point scan: string
+# and character literals, line comments and block comments. Each branch
+# consumes exactly what the lexer would (or the rest of a malformed
+# construct, which is a lexer error wherever the split lands).
+SKIP_CONSTRUCT = re.compile(rb"""
+    "(?:[^"\\\n]|\\.)*"?
+  | '(?:\\[\s\S]|[\s\S])'?
+  | //[^\n]*
+  | /\*[\s\S]*?(?:\*/|\Z)
+""", re.VERBOSE)
+
+
+def find_split_points(data, targets: List[int]) -> List[int]:
+    """
+    Find safe offsets to split a source at
+    
+    A safe offset directly follows a newline that is not inside a
+    literal or comment, so the serial lexer is always between tokens
+    there and every chunk starts at column 1.
+    
+    Args:
+        data: Source bytes
+        targets: Ascending offsets to split near
+    
+    Returns:
+        Ascending split offsets, each the first safe offset after a target
+    """
+    search = SKIP_CONSTRUCT.search
+    find = data.find
+    length = len(data)
+    points = []
+    pos = 0
+    
+    for target in targets:
+        # Skip constructs until the scan reaches the target
+        while pos < target:
+            m = search(data, pos)
+            if m is None or m.start() >= target:
+                pos = target
+                break
+            pos = m.end()
+        
+        # First newline from here that is outside every construct
+        while pos < length:
+            newline = find(b'\n', pos)
+            if newline == -1:
+                pos = length
+                break
+            m = search(data, pos)
+            if m is None or m.start() > newline:
+                pos = newline + 1
+                if pos < length:
+                    points.append(pos)
+                break
+            pos = m.end()
+    
+    return points
+
+
+def lex_chunk(filename: str, start: int, end: int) -> Tuple[TokenBuffer, Optional[tuple]]:
+    """
+    Lex one chunk of a source file (runs in a worker process)
+    
+    Args:
+        filename: Path to the source file
+        start: Offset where the chunk starts (a line start)
+        end: Offset where the chunk ends
+    
+    Returns:
+        Tuple of a TokenBuffer with absolute offsets (no EOF token) and
+        either None or (message, line, column) of the chunk's lexer error
+        with the line relative to the chunk
+    """
+    with map_source(filename) as data:
+        chunk = data[start:end]
+    
+    buffer = TokenBuffer()
+    append = buffer.append
+    eof = TokenType.EOF
+    try:
+        for token in scan_bytes(chunk):
+            if token.type is eof:
+                break
+            append(token.type, token.value, token.offset + start)
+    except LexerError as e:
+        # Exceptions with extra constructor arguments do not survive
+        # pickling, so the error goes back as plain data
+        return buffer, (e.message, e.line, e.column)
+    return buffer, None
+
+
+def tokenize_file_parallel(filename: str, workers: Optional[int] = None,
+                           min_chunk: int = PARALLEL_MIN_CHUNK) -> TokenBuffer:
+    """
+    Tokenize a MinLang source file using several processes
+    
+    The file is split at safe newlines (see find_split_points), each
+    chunk is lexed by scan_bytes() in a ProcessPoolExecutor, and the
+    chunk buffers are joined in order. Iterating the result gives the
+    same tokens as tokenize_file(filename, mmap=True), and the first
+    lexer error in the file is raised with the same position.
+    
+    The result is a TokenBuffer rather than a list: building one Token
+    object per token in the parent would cost as much as lexing itself.
+    The Parser consumes it directly.
+    
+    Args:
+        filename: Path to the source file
+        workers: Number of worker processes (default: CPU count)
+        min_chunk: Smallest chunk size in bytes worth a worker
+    
+    Returns:
+        TokenBuffer holding all tokens, positions resolved from the file
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filename)
+    chunks = min(workers, size // max(min_chunk, 1))
+    
+    with map_source(filename) as data:
+        lines = ByteLineIndex(data)
+        points = find_split_points(data, [size * i // chunks for i in range(1, chunks)])
+    starts = [0] + points
+    ends = points + [size]
+    
+    if len(starts) < 2:
+        results = [lex_chunk(filename, 0, size)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+            results = list(executor.map(lex_chunk, repeat(filename), starts, ends))
+    
+    for start, (_, error) in zip(starts, results):
+        if error is not None:
+            message, line, column = error
+            raise LexerError(message, lines.position(start)[0] + line - 1, column)
+    
+    tokens = results[0][0]
+    for buffer, _ in results[1:]:
+        tokens.extend(buffer)
+    tokens.append(TokenType.EOF, None, size)
+    tokens.lines = lines
+    return tokens
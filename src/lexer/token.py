@@ -3,9 +3,11 @@ Token definitions for MinLang Compiler
 Defines all token types and the Token class
 """
 
+import re
+import sys
+from bisect import bisect_right
 from enum import Enum, auto
-from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class TokenType(Enum):
@@ -69,26 +71,335 @@ class TokenType(Enum):
     LBRACKET = auto()       # [
     RBRACKET = auto()       # ]
     
+    # Long delimiter names used by the Tokenizer front end
+    LEFT_PAREN = LPAREN
+    RIGHT_PAREN = RPAREN
+    LEFT_BRACE = LBRACE
+    RIGHT_BRACE = RBRACE
+    LEFT_BRACKET = LBRACKET
+    RIGHT_BRACKET = RBRACKET
+    
     # Special
     EOF = auto()
     NEWLINE = auto()
+    COMMENT = auto()
+
+
+class LineIndex:
+    """
+    Offsets of the first character of every line in a source string
+    
+    Built once per source with str.find, so the lexer never has to count
+    lines while scanning; positions are resolved with a binary search
+    only when somebody asks for them.
+    
+    Attributes:
+        starts: Sorted offsets where each line begins (starts[0] == 0)
+    """
+    __slots__ = ('starts',)
+    
+    def __init__(self, source: str):
+        starts = [0]
+        find = source.find
+        pos = find('\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+        self.starts = starts
+    
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        Convert a source offset to a (line, column) pair, both 1-indexed
+        
+        Args:
+            offset: Character offset into the source
+            
+        Returns:
+            Tuple of line and column numbers
+        """
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+    
+    def apply_edit(self, offset: int, removed: int, inserted: str) -> None:
+        """
+        Update the index in place for an edit of the source
+        
+        Args:
+            offset: Offset where the edit starts
+            removed: Number of characters removed at offset
+            inserted: Text inserted at offset
+        """
+        starts = self.starts
+        first = bisect_right(starts, offset)
+        last = bisect_right(starts, offset + removed)
+        delta = len(inserted) - removed
+        added = []
+        pos = inserted.find('\n')
+        while pos != -1:
+            added.append(offset + pos + 1)
+            pos = inserted.find('\n', pos + 1)
+        starts[first:] = added + [start + delta for start in starts[last:]]
+    
+    def section(self, start: int, end: int) -> 'LineSection':
+        """
+        Index of only the lines holding offsets start to end
+        
+        Args:
+            start: First offset the section must resolve
+            end: Last offset the section must resolve
+            
+        Returns:
+            LineSection giving the same positions as this index there
+        """
+        first = bisect_right(self.starts, start)
+        last = bisect_right(self.starts, end)
+        return LineSection(first, self.starts[first - 1:last], {})
+
+
+# Any byte that is not ASCII (i.e. part of a multi-byte UTF-8 character)
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+
+class ByteLineIndex(LineIndex):
+    """
+    Line index over UTF-8 encoded source bytes (e.g. a memory map)
+    
+    Offsets are byte offsets, but columns still count characters. The
+    bytes of every line holding non-ASCII characters are copied out so
+    those columns can be decoded; nothing refers back to the source, so
+    the index outlives (and pickles without) the mapped file.
+    
+    Attributes:
+        starts: Sorted byte offsets where each line begins
+        wide_lines: Line number -> bytes of lines with non-ASCII characters
+    """
+    __slots__ = ('wide_lines',)
+    
+    def __init__(self, data):
+        starts = [0]
+        find = data.find
+        pos = find(b'\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find(b'\n', pos + 1)
+        self.starts = starts
+        
+        self.wide_lines: Dict[int, bytes] = {}
+        search = NON_ASCII.search
+        m = search(data)
+        while m is not None:
+            line = bisect_right(starts, m.start())
+            end = starts[line] if line < len(starts) else len(data)
+            self.wide_lines[line] = data[starts[line - 1]:end]
+            m = search(data, end)
+    
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        Convert a byte offset to a (line, column) pair, both 1-indexed
+        
+        Args:
+            offset: Byte offset into the source
+            
+        Returns:
+            Tuple of line and character column numbers
+        """
+        line = bisect_right(self.starts, offset)
+        width = offset - self.starts[line - 1]
+        wide = self.wide_lines.get(line)
+        if wide is not None:
+            width = len(wide[:width].decode('utf-8', 'replace'))
+        return line, width + 1
+    
+    def section(self, start: int, end: int) -> 'LineSection':
+        """
+        Index of only the lines holding byte offsets start to end
+        
+        Args:
+            start: First offset the section must resolve
+            end: Last offset the section must resolve
+            
+        Returns:
+            LineSection giving the same positions as this index there
+        """
+        section = super().section(start, end)
+        last = section.first_line + len(section.starts)
+        section.wide_lines = {line: text for line, text in self.wide_lines.items()
+                              if section.first_line <= line < last}
+        return section
+
+
+class LineSection(ByteLineIndex):
+    """
+    Lines first_line onwards of a LineIndex or ByteLineIndex
+    
+    Lets a slice of a token stream resolve its positions without
+    carrying the line starts of the whole source.
+    
+    Attributes:
+        first_line: Line number of starts[0]
+        starts: Offsets where each line of the section begins
+        wide_lines: Line number -> bytes of lines with non-ASCII characters
+            (empty for a character-offset index)
+    """
+    __slots__ = ('first_line',)
+    
+    def __init__(self, first_line: int, starts: List[int], wide_lines: Dict[int, bytes]):
+        self.first_line = first_line
+        self.starts = starts
+        self.wide_lines = wide_lines
+    
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        Convert an offset within the section to a (line, column) pair
+        
+        Args:
+            offset: Offset into the source
+            
+        Returns:
+            Tuple of line and column numbers
+        """
+        index = bisect_right(self.starts, offset)
+        line = self.first_line + index - 1
+        width = offset - self.starts[index - 1]
+        wide = self.wide_lines.get(line)
+        if wide is not None:
+            width = len(wide[:width].decode('utf-8', 'replace'))
+        return line, width + 1
+    
+    def section(self, start: int, end: int) -> 'LineSection':
+        """Narrower section of this section"""
+        first = bisect_right(self.starts, start)
+        last = bisect_right(self.starts, end)
+        line = self.first_line + first - 1
+        wide = {number: text for number, text in self.wide_lines.items()
+                if line <= number < line + last - first + 1}
+        return LineSection(line, self.starts[first - 1:last], wide)
+
+
+class NameTable:
+    """
+    Interning table for identifier names
+    
+    Every distinct name is stored once (via sys.intern) and numbered in
+    order of first appearance, so equal names share one object and later
+    phases can key on small integer ids instead of strings.
+    
+    Attributes:
+        names: Interned names, indexed by id
+        ids: Name -> id mapping
+    """
+    __slots__ = ('names', 'ids')
+    
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+    
+    def intern(self, text: str) -> str:
+        """
+        Return the shared instance of a name, adding it if new
+        
+        Args:
+            text: Identifier text
+            
+        Returns:
+            The interned name
+        """
+        name_id = self.ids.get(text)
+        if name_id is not None:
+            return self.names[name_id]
+        text = sys.intern(text)
+        self.ids[text] = len(self.names)
+        self.names.append(text)
+        return text
+    
+    def __len__(self) -> int:
+        return len(self.names)
 
 
-@dataclass
 class Token:
     """
     Represents a single token in the source code
     
+    Tokens produced by the lexer only record their source offset and a
+    shared LineIndex; line and column are resolved on first access.
+    Tokens built by hand may pass line and column directly.
+    
     Attributes:
         type: The type of the token (from TokenType enum)
         value: The actual value/lexeme of the token
         line: Line number where token appears
         column: Column number where token starts
+        offset: Character offset where token starts
+        lines: LineIndex used to resolve line and column (or None)
+        file: Source file name (optional)
     """
-    type: TokenType
-    value: Any
-    line: int
-    column: int
+    __slots__ = ('type', 'value', 'offset', 'lines', 'file', '_line', '_column')
+    
+    def __init__(self, type: TokenType, value: Any, line: int = 0,
+                 column: int = 0, offset: int = 0,
+                 lines: Optional[LineIndex] = None,
+                 file: Optional[str] = None):
+        self.type = type
+        self.value = value
+        self.offset = offset
+        self.lines = lines
+        self.file = file
+        if lines is None:
+            self._line = line
+            self._column = column
+        else:
+            self._line = None
+            self._column = None
+    
+    def _resolve(self) -> None:
+        """Resolve line and column from the offset"""
+        self._line, self._column = self.lines.position(self.offset)
+    
+    def shift(self, delta: int) -> None:
+        """
+        Move a lazily positioned token by delta characters
+        
+        Line and column are resolved again from the (updated) line index.
+        
+        Args:
+            delta: Number of characters to move by
+        """
+        self.offset += delta
+        self._line = None
+        self._column = None
+    
+    @property
+    def line(self) -> int:
+        if self._line is None:
+            self._resolve()
+        return self._line
+    
+    @line.setter
+    def line(self, value: int) -> None:
+        if self._line is None:
+            self._resolve()
+        self._line = value
+    
+    @property
+    def column(self) -> int:
+        if self._column is None:
+            self._resolve()
+        return self._column
+    
+    @column.setter
+    def column(self, value: int) -> None:
+        if self._column is None:
+            self._resolve()
+        self._column = value
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.type == other.type and self.value == other.value and
+                self.line == other.line and self.column == other.column and
+                self.file == other.file)
+    
+    __hash__ = None
     
     def __repr__(self) -> str:
         """String representation of the token"""
@@ -101,7 +412,9 @@ class Token:
     
     def __str__(self) -> str:
         """User-friendly string representation"""
-        return self.__repr__()
+        if self.value is not None:
+            return f"<{self.type.name}: '{self.value}'>"
+        return f"<{self.type.name}>"
 
 
 # Keyword mapping
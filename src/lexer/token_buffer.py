@@ -0,0 +1,205 @@
+"""
+Compact token storage for MinLang Compiler
+Keeps a token stream in typed arrays instead of one object per token
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .token import (
+    Token, TokenType, LineIndex, KEYWORDS, OPERATORS, DELIMITERS
+)
+
+
+# Token type <-> one-byte kind code
+TOKEN_KINDS: List[TokenType] = list(TokenType)
+KIND_CODES: Dict[TokenType, int] = {t: code for code, t in enumerate(TOKEN_KINDS)}
+
+# Token types whose value is fully determined by the type
+FIXED_VALUES: Dict[TokenType, Any] = {TokenType.EOF: None}
+for _text, _type in {**KEYWORDS, **OPERATORS, **DELIMITERS}.items():
+    FIXED_VALUES[_type] = _text
+FIXED_VALUES[TokenType.TRUE] = True
+FIXED_VALUES[TokenType.FALSE] = False
+
+# Value reference used for tokens whose value comes from FIXED_VALUES
+NO_VALUE = 0xFFFFFFFF
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays token stream
+    
+    Each token costs one byte of kind, four bytes of offset and four
+    bytes of value reference. Identifier and literal values live once in
+    a shared pool; values of keywords, operators and delimiters are
+    implied by the kind. Line and column are not stored at all: they are
+    resolved from the offset through the LineIndex, like lexer tokens.
+    
+    Indexing or iterating yields Token views built on demand, so the
+    Parser can consume a buffer directly.
+    
+    Attributes:
+        kinds: array('B') of kind codes (see TOKEN_KINDS)
+        offsets: array('I') of token start offsets
+        value_refs: array('I') of indices into values, or NO_VALUE
+        values: Pool of distinct identifier and literal values
+        lines: LineIndex of the source the tokens came from
+    """
+    __slots__ = ('kinds', 'offsets', 'value_refs', 'values', '_value_ids', 'lines')
+    
+    def __init__(self, lines: Optional[LineIndex] = None):
+        self.kinds = array('B')
+        self.offsets = array('I')
+        self.value_refs = array('I')
+        self.values: List[Any] = []
+        self._value_ids: Dict[Tuple[type, Any], int] = {}
+        self.lines = lines
+    
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Token],
+                    lines: Optional[LineIndex] = None) -> 'TokenBuffer':
+        """
+        Build a buffer from a token iterable (e.g. Lexer.iter_tokens())
+        
+        Args:
+            tokens: Tokens to store
+            lines: LineIndex for the tokens' source
+            
+        Returns:
+            New TokenBuffer
+        """
+        buffer = cls(lines)
+        append = buffer.append
+        for token in tokens:
+            append(token.type, token.value, token.offset)
+        return buffer
+    
+    def append(self, token_type: TokenType, value: Any, offset: int) -> None:
+        """
+        Append one token
+        
+        Args:
+            token_type: Type of the token
+            value: Token value
+            offset: Start offset of the token in the source
+        """
+        self.kinds.append(KIND_CODES[token_type])
+        self.offsets.append(offset)
+        if token_type in FIXED_VALUES:
+            self.value_refs.append(NO_VALUE)
+            return
+        # Keyed by type too, so 1, 1.0 and True stay distinct
+        key = (value.__class__, value)
+        ref = self._value_ids.get(key)
+        if ref is None:
+            ref = self._value_ids[key] = len(self.values)
+            self.values.append(value)
+        self.value_refs.append(ref)
+    
+    def extend(self, other: 'TokenBuffer') -> None:
+        """
+        Append all tokens of another buffer
+        
+        Kinds and offsets are copied as arrays; only the value references
+        are remapped into this buffer's pool.
+        
+        Args:
+            other: Buffer whose tokens follow this buffer's tokens
+        """
+        self.kinds.extend(other.kinds)
+        self.offsets.extend(other.offsets)
+        remap = []
+        for value in other.values:
+            key = (value.__class__, value)
+            ref = self._value_ids.get(key)
+            if ref is None:
+                ref = self._value_ids[key] = len(self.values)
+                self.values.append(value)
+            remap.append(ref)
+        self.value_refs.extend(array('I', [
+            remap[ref] if ref != NO_VALUE else NO_VALUE for ref in other.value_refs
+        ]))
+    
+    def slice(self, start: int, end: int) -> 'TokenBuffer':
+        """
+        Copy a range of tokens into a new buffer
+        
+        The arrays are sliced and the part gets a pool of only the values
+        it refers to, plus a LineIndex section of only its lines, so it
+        pickles in proportion to its own size.
+        
+        Args:
+            start: Index of the first token
+            end: Index past the last token
+            
+        Returns:
+            New TokenBuffer holding tokens[start:end]
+        """
+        part = TokenBuffer()
+        part.kinds = self.kinds[start:end]
+        part.offsets = offsets = self.offsets[start:end]
+        if self.lines is not None and offsets:
+            part.lines = self.lines.section(offsets[0], offsets[-1])
+        values = self.values
+        remap: Dict[int, int] = {}
+        refs = []
+        for ref in self.value_refs[start:end]:
+            if ref != NO_VALUE:
+                new = remap.get(ref)
+                if new is None:
+                    new = remap[ref] = len(part.values)
+                    value = values[ref]
+                    part._value_ids[(value.__class__, value)] = new
+                    part.values.append(value)
+                ref = new
+            refs.append(ref)
+        part.value_refs = array('I', refs)
+        return part
+    
+    def type_at(self, index: int) -> TokenType:
+        """Token type of the token at index"""
+        return TOKEN_KINDS[self.kinds[index]]
+    
+    def value_at(self, index: int) -> Any:
+        """Value of the token at index"""
+        ref = self.value_refs[index]
+        if ref == NO_VALUE:
+            return FIXED_VALUES[TOKEN_KINDS[self.kinds[index]]]
+        return self.values[ref]
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+    
+    def __getitem__(self, index: int) -> Token:
+        """Token view of the token at index"""
+        if index < 0:
+            index += len(self.kinds)
+        return Token(self.type_at(index), self.value_at(index),
+                     offset=self.offsets[index], lines=self.lines)
+    
+    def __iter__(self) -> Iterator[Token]:
+        kinds = TOKEN_KINDS
+        fixed = FIXED_VALUES
+        values = self.values
+        lines = self.lines
+        for kind, offset, ref in zip(self.kinds, self.offsets, self.value_refs):
+            token_type = kinds[kind]
+            value = fixed[token_type] if ref == NO_VALUE else values[ref]
+            yield Token(token_type, value, offset=offset, lines=lines)
+    
+    def iter_from(self, start: int, end: Optional[int] = None) -> Iterator[Token]:
+        """Token views from index start on (up to end, if given)"""
+        kinds = TOKEN_KINDS
+        fixed = FIXED_VALUES
+        values = self.values
+        lines = self.lines
+        codes, offsets, refs = self.kinds, self.offsets, self.value_refs
+        for index in range(start, len(codes) if end is None else end):
+            token_type = kinds[codes[index]]
+            ref = refs[index]
+            value = fixed[token_type] if ref == NO_VALUE else values[ref]
+            yield Token(token_type, value, offset=offsets[index], lines=lines)
+    
+    def nbytes(self) -> int:
+        """Bytes used by the per-token arrays (excluding the value pool)"""
+        return sum(a.itemsize * len(a) for a in (self.kinds, self.offsets, self.value_refs))
@@ -12,7 +12,7 @@ from typing import Optional
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from lexer import Lexer, LexerError
+from lexer import Lexer, LexerError, tokenize_file
 from parser import Parser, ParserError
 from semantic import SemanticAnalyzer
 from codegen import generate_tac, format_tac_output
@@ -21,6 +21,9 @@ from codegen import generate_tac, format_tac_output
 VERSION = "0.8.0"  # 80% Complete (Phases 1-4)
 COMPILER_NAME = "MinLang Compiler"
 
+# Inputs at least this large (in bytes) are lexed from a memory map
+MMAP_THRESHOLD = 1 << 20
+
 
 class CompilerError(Exception):
     """Base class for compiler errors"""
@@ -31,7 +34,7 @@ def print_tokens(tokens):
     """Print token stream"""
     print("\n=== TOKEN STREAM ===")
     for token in tokens:
-        print(f"  {token}")
+        print(f"  {token!r}")
     print()
 
 
@@ -109,16 +112,17 @@ def compile_file(filename: str, args: argparse.Namespace) -> bool:
             print(f"Compiling {filename}...")
             print(f"MinLang Compiler v{VERSION} (60% Complete)\n")
         
-        # Read source code
-        with open(filename, 'r') as f:
-            source = f.read()
-        
         # Phase 1: Lexical Analysis
         if args.verbose:
             print("Phase 1: Lexical Analysis")
         
-        lexer = Lexer(source)
-        tokens = lexer.tokenize()
+        if Path(filename).stat().st_size >= MMAP_THRESHOLD:
+            tokens = tokenize_file(filename, mmap=True)
+        else:
+            with open(filename, 'r') as f:
+                source = f.read()
+            lexer = Lexer(source)
+            tokens = lexer.tokenize()
         
         if args.tokens:
             print_tokens(tokens)
@@ -130,8 +134,12 @@ def compile_file(filename: str, args: argparse.Namespace) -> bool:
         if args.verbose:
             print("Phase 2: Syntax Analysis")
         
-        parser = Parser(tokens)
-        ast = parser.parse()
+        try:
+            ast = Parser(tokens).parse()
+        except RecursionError:
+            # Nested too deeply for the recursive parser; the iterative
+            # one builds the same AST with an explicit stack
+            ast = Parser(tokens, iterative=True).parse()
         
         if args.ast:
             print_ast(ast)
@@ -1,6 +1,10 @@
 """Parser package for MinLang Compiler"""
 
 from .ast_nodes import *
-from .parser import Parser, ParserError, parse_file, parse_string
+from .flat_ast import FlatAST
+from .parser import Parser, ParserError, LazyBlock, parse_file, parse_string
+from .parallel import parse_parallel
+from .serialize import serialize, deserialize, ASTFormatError
 
-__all__ = ['Parser', 'ParserError', 'parse_file', 'parse_string']
+__all__ = ['Parser', 'ParserError', 'parse_file', 'parse_string', 'FlatAST', 'LazyBlock', 'parse_parallel',
+           'serialize', 'deserialize', 'ASTFormatError']
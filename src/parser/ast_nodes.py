@@ -32,18 +32,38 @@ class NodeType(Enum):
 
 @dataclass
 class ASTNode:
-    """Base class for all AST nodes"""
+    """Base class for all AST nodes
+    
+    Nodes declare __slots__ for their fields: a large program has
+    hundreds of thousands of nodes, and a per-instance __dict__ would
+    dominate the AST's memory. Dataclass fields therefore carry no
+    defaults; the constructors supply them.
+    
+    Nodes that use a name (Identifier, AssignmentExpression,
+    CallExpression, ReadStatement) also have a symbol slot. It is not a
+    field, so it takes no part in equality, repr or pickling: semantic
+    analysis binds it to the resolved Symbol, and later phases read it
+    instead of looking the name up again.
+    """
+    __slots__ = ('node_type', 'line', 'column')
     node_type: NodeType
     line: int
     column: int
     
     def __repr__(self) -> str:
         return f"{self.node_type.value}"
+    
+    def __reduce__(self):
+        # Pickle as a constructor call (fields, then line and column);
+        # much faster than the generic slot-state protocol
+        fields = tuple(self.__dataclass_fields__)[3:]
+        return self.__class__, tuple(getattr(self, name) for name in fields) + (self.line, self.column)
 
 
 @dataclass
 class Program(ASTNode):
     """Root node representing the entire program"""
+    __slots__ = ('declarations',)
     declarations: List[Any]
     
     def __init__(self, declarations: List[Any], line: int = 0, column: int = 0):
@@ -54,10 +74,11 @@ class Program(ASTNode):
 @dataclass
 class VariableDeclaration(ASTNode):
     """Variable declaration node"""
+    __slots__ = ('var_type', 'identifier', 'initializer', 'is_const')
     var_type: str
     identifier: str
-    initializer: Optional[Any] = None
-    is_const: bool = False
+    initializer: Optional[Any]
+    is_const: bool
     
     def __init__(self, var_type: str, identifier: str, 
                  initializer: Optional[Any] = None, is_const: bool = False,
@@ -72,6 +93,7 @@ class VariableDeclaration(ASTNode):
 @dataclass
 class ParameterDeclaration(ASTNode):
     """Function parameter node"""
+    __slots__ = ('param_type', 'identifier')
     param_type: str
     identifier: str
     
@@ -85,6 +107,7 @@ class ParameterDeclaration(ASTNode):
 @dataclass
 class FunctionDeclaration(ASTNode):
     """Function declaration node"""
+    __slots__ = ('return_type', 'identifier', 'parameters', 'body')
     return_type: str
     identifier: str
     parameters: List[ParameterDeclaration]
@@ -102,20 +125,33 @@ class FunctionDeclaration(ASTNode):
 
 @dataclass
 class Block(ASTNode):
-    """Block of statements"""
+    """Block of statements; line and column are those of its '{',
+    end_line and end_column those of its '}'"""
+    __slots__ = ('statements', 'end_line', 'end_column')
     statements: List[Any]
+    end_line: int
+    end_column: int
     
-    def __init__(self, statements: List[Any], line: int = 0, column: int = 0):
+    def __init__(self, statements: List[Any], line: int = 0, column: int = 0,
+                 end_line: int = 0, end_column: int = 0):
         super().__init__(NodeType.BLOCK, line, column)
         self.statements = statements
+        self.end_line = end_line
+        self.end_column = end_column
+    
+    def __reduce__(self):
+        # The end position follows line and column in the constructor; a
+        # LazyBlock pickles as the Block it parses to
+        return Block, (self.statements, self.line, self.column, self.end_line, self.end_column)
 
 
 @dataclass
 class IfStatement(ASTNode):
     """If statement"""
+    __slots__ = ('condition', 'then_branch', 'else_branch')
     condition: Any
     then_branch: Any
-    else_branch: Optional[Any] = None
+    else_branch: Optional[Any]
     
     def __init__(self, condition: Any, then_branch: Any,
                  else_branch: Optional[Any] = None,
@@ -129,6 +165,7 @@ class IfStatement(ASTNode):
 @dataclass
 class WhileStatement(ASTNode):
     """While loop"""
+    __slots__ = ('condition', 'body')
     condition: Any
     body: Any
     
@@ -141,26 +178,38 @@ class WhileStatement(ASTNode):
 
 @dataclass
 class ForStatement(ASTNode):
-    """For loop"""
+    """For loop; line and column are those of its 'for', end_line and
+    end_column the position just before the token that follows it"""
+    __slots__ = ('init', 'condition', 'increment', 'body', 'end_line', 'end_column')
     init: Optional[Any]
-    condition: Any
+    condition: Optional[Any]
     increment: Optional[Any]
     body: Any
+    end_line: int
+    end_column: int
     
-    def __init__(self, init: Optional[Any], condition: Any,
+    def __init__(self, init: Optional[Any], condition: Optional[Any],
                  increment: Optional[Any], body: Any,
-                 line: int = 0, column: int = 0):
+                 line: int = 0, column: int = 0, end_line: int = 0, end_column: int = 0):
         super().__init__(NodeType.FOR_STMT, line, column)
         self.init = init
         self.condition = condition
         self.increment = increment
         self.body = body
+        self.end_line = end_line
+        self.end_column = end_column
+    
+    def __reduce__(self):
+        # The end position follows line and column in the constructor
+        return ForStatement, (self.init, self.condition, self.increment, self.body,
+                              self.line, self.column, self.end_line, self.end_column)
 
 
 @dataclass
 class ReturnStatement(ASTNode):
     """Return statement"""
-    value: Optional[Any] = None
+    __slots__ = ('value',)
+    value: Optional[Any]
     
     def __init__(self, value: Optional[Any] = None,
                  line: int = 0, column: int = 0):
@@ -171,6 +220,7 @@ class ReturnStatement(ASTNode):
 @dataclass
 class ExpressionStatement(ASTNode):
     """Expression used as a statement"""
+    __slots__ = ('expression',)
     expression: Any
     
     def __init__(self, expression: Any, line: int = 0, column: int = 0):
@@ -181,6 +231,7 @@ class ExpressionStatement(ASTNode):
 @dataclass
 class AssignmentExpression(ASTNode):
     """Assignment expression"""
+    __slots__ = ('identifier', 'value', 'symbol')
     identifier: str
     value: Any
     
@@ -189,11 +240,13 @@ class AssignmentExpression(ASTNode):
         super().__init__(NodeType.ASSIGN_EXPR, line, column)
         self.identifier = identifier
         self.value = value
+        self.symbol = None
 
 
 @dataclass
 class BinaryExpression(ASTNode):
     """Binary expression"""
+    __slots__ = ('operator', 'left', 'right')
     operator: str
     left: Any
     right: Any
@@ -209,6 +262,7 @@ class BinaryExpression(ASTNode):
 @dataclass
 class UnaryExpression(ASTNode):
     """Unary expression"""
+    __slots__ = ('operator', 'operand')
     operator: str
     operand: Any
     
@@ -222,6 +276,7 @@ class UnaryExpression(ASTNode):
 @dataclass
 class CallExpression(ASTNode):
     """Function call"""
+    __slots__ = ('identifier', 'arguments', 'symbol')
     identifier: str
     arguments: List[Any]
     
@@ -230,21 +285,25 @@ class CallExpression(ASTNode):
         super().__init__(NodeType.CALL_EXPR, line, column)
         self.identifier = identifier
         self.arguments = arguments
+        self.symbol = None
 
 
 @dataclass
 class Identifier(ASTNode):
     """Identifier node"""
+    __slots__ = ('name', 'symbol')
     name: str
     
     def __init__(self, name: str, line: int = 0, column: int = 0):
         super().__init__(NodeType.IDENTIFIER, line, column)
         self.name = name
+        self.symbol = None
 
 
 @dataclass
 class Literal(ASTNode):
     """Literal value node"""
+    __slots__ = ('value', 'literal_type')
     value: Any
     literal_type: str
     
@@ -258,16 +317,19 @@ class Literal(ASTNode):
 @dataclass
 class ReadStatement(ASTNode):
     """Read statement"""
+    __slots__ = ('identifier', 'symbol')
     identifier: str
     
     def __init__(self, identifier: str, line: int = 0, column: int = 0):
         super().__init__(NodeType.READ_STMT, line, column)
         self.identifier = identifier
+        self.symbol = None
 
 
 @dataclass
 class PrintStatement(ASTNode):
     """Print statement"""
+    __slots__ = ('expression',)
     expression: Any
     
     def __init__(self, expression: Any, line: int = 0, column: int = 0):
@@ -0,0 +1,421 @@
+"""
+Flat AST storage for MinLang Compiler
+Keeps a syntax tree in typed arrays indexed by integer node handles
+"""
+
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .ast_nodes import *
+
+
+# How a node field is stored: a value-pool reference, one child handle
+# (NO_NODE for None), or a run of child handles
+VALUE, NODE, NODES = range(3)
+
+# Node class -> (node type, fields in the order NODE_BUILDERS take them).
+# A NODES field takes the rest of the node's slots, so a class has at
+# most one.
+LAYOUTS: Dict[type, Tuple[NodeType, Tuple[Tuple[str, int], ...]]] = {
+    Program: (NodeType.PROGRAM, (('declarations', NODES),)),
+    VariableDeclaration: (NodeType.VAR_DECL, (
+        ('var_type', VALUE), ('identifier', VALUE),
+        ('initializer', NODE), ('is_const', VALUE))),
+    ParameterDeclaration: (NodeType.PARAM_DECL, (
+        ('param_type', VALUE), ('identifier', VALUE))),
+    FunctionDeclaration: (NodeType.FUNCTION_DECL, (
+        ('return_type', VALUE), ('identifier', VALUE),
+        ('parameters', NODES), ('body', NODE))),
+    Block: (NodeType.BLOCK, (
+        ('statements', NODES), ('end_line', VALUE), ('end_column', VALUE))),
+    IfStatement: (NodeType.IF_STMT, (
+        ('condition', NODE), ('then_branch', NODE), ('else_branch', NODE))),
+    WhileStatement: (NodeType.WHILE_STMT, (('condition', NODE), ('body', NODE))),
+    ForStatement: (NodeType.FOR_STMT, (
+        ('init', NODE), ('condition', NODE), ('increment', NODE), ('body', NODE),
+        ('end_line', VALUE), ('end_column', VALUE))),
+    ReturnStatement: (NodeType.RETURN_STMT, (('value', NODE),)),
+    ExpressionStatement: (NodeType.EXPR_STMT, (('expression', NODE),)),
+    AssignmentExpression: (NodeType.ASSIGN_EXPR, (('identifier', VALUE), ('value', NODE))),
+    BinaryExpression: (NodeType.BINARY_EXPR, (
+        ('operator', VALUE), ('left', NODE), ('right', NODE))),
+    UnaryExpression: (NodeType.UNARY_EXPR, (('operator', VALUE), ('operand', NODE))),
+    CallExpression: (NodeType.CALL_EXPR, (('identifier', VALUE), ('arguments', NODES))),
+    Identifier: (NodeType.IDENTIFIER, (('name', VALUE),)),
+    Literal: (NodeType.LITERAL, (('value', VALUE), ('literal_type', VALUE))),
+    ReadStatement: (NodeType.READ_STMT, (('identifier', VALUE),)),
+    PrintStatement: (NodeType.PRINT_STMT, (('expression', NODE),)),
+}
+
+# Node class <-> one-byte kind code
+NODE_CLASSES: List[type] = list(LAYOUTS)
+KIND_CODES: Dict[type, int] = {cls: code for code, cls in enumerate(NODE_CLASSES)}
+FIELD_KINDS: List[Tuple[int, ...]] = [
+    tuple(how for _, how in LAYOUTS[cls][1]) for cls in NODE_CLASSES
+]
+IDENTIFIER_KIND = KIND_CODES[Identifier]
+
+
+def end_position_builder(cls: type) -> Callable[..., ASTNode]:
+    """Builder for a class whose LAYOUTS fields end with end_line and
+    end_column, which its constructor takes after line and column"""
+    def build(*fields, line=0, column=0):
+        return cls(*fields[:-2], line, column, *fields[-2:])
+    return build
+
+
+# Classes whose constructor takes an end position after line and column
+END_POSITION_CLASSES = (Block, ForStatement)
+
+# Kind code -> callable building the node from its LAYOUTS fields, with
+# line and column as keywords: the class itself where its constructor
+# takes them in that order
+NODE_BUILDERS: List[Callable[..., ASTNode]] = [
+    end_position_builder(cls) if cls in END_POSITION_CLASSES else cls for cls in NODE_CLASSES
+]
+
+# Child handle stored for an absent optional child
+NO_NODE = 0xFFFFFFFF
+
+
+class FlatAST:
+    """
+    Struct-of-arrays syntax tree
+    
+    A node is an integer handle into per-node arrays: one byte of kind,
+    its line and column, and where its fields start in a shared slot
+    array. Each field takes one slot (a child handle or a reference into
+    a pool of distinct values), except a list field, which takes a run of
+    child handles. Children are always added before their parent, so
+    handles are in post-order and the root is the last node; a linear
+    scan over the arrays visits every node without following pointers.
+    (The Identifier nodes the Parser builds for assignment targets and
+    callees stay in the arena without a parent.)
+    
+    The builder methods share the names and signatures of the node
+    classes and return handles, so the Parser builds a FlatAST directly
+    (Parser(tokens, flat=True)). Indexing gives node views: instances of
+    generated subclasses of the node classes that read their fields from
+    the arrays on access. SemanticAnalyzer and IRGenerator walk
+    ast.program like any Program.
+    
+    The arena is a memory trade-off, not a speed-up: it keeps a tree in
+    well under half the memory of the object AST, but the walks build a
+    view for every node they reach and read every field through the
+    arrays, so they run about twice as long as over objects (see
+    scripts/bench_ast_memory.py). Only a linear scan over the arrays
+    themselves is faster.
+    
+    Attributes:
+        kinds: array('B') of kind codes (see NODE_CLASSES)
+        lines: array('I') of node lines
+        columns: array('I') of node columns
+        starts: array('I') of each node's first slot
+        slots: array('I') of child handles and value references
+        values: Pool of distinct field values
+        root: Handle of the Program node, or None before it is added
+        symbols: Handle -> Symbol bound by semantic analysis (the symbol
+            slot of the node views)
+    """
+    __slots__ = ('kinds', 'lines', 'columns', 'starts', 'slots',
+                 'values', '_value_ids', 'root', 'symbols')
+    
+    def __init__(self):
+        self.kinds = array('B')
+        self.lines = array('I')
+        self.columns = array('I')
+        self.starts = array('I')
+        self.slots = array('I')
+        self.values: List[Any] = []
+        self._value_ids: Dict[Tuple[type, Any], int] = {}
+        self.root: Optional[int] = None
+        self.symbols: Dict[int, Any] = {}
+    
+    @classmethod
+    def from_ast(cls, program: Program) -> 'FlatAST':
+        """
+        Flatten an object AST
+        
+        Args:
+            program: Root of the tree
+        
+        Returns:
+            New FlatAST holding the same tree
+        """
+        flat = cls()
+        handles: Dict[int, int] = {}
+        stack = [program]
+        while stack:
+            node = stack[-1]
+            if id(node) in handles:
+                stack.pop()
+                continue
+            fields = []
+            pending = False
+            for name, how in LAYOUTS[node.__class__][1]:
+                value = getattr(node, name)
+                children = value if how == NODES else [value] if how == NODE else ()
+                for child in children:
+                    if child is not None and id(child) not in handles:
+                        stack.append(child)
+                        pending = True
+                if how == NODES:
+                    value = [handles.get(id(child)) for child in value]
+                elif how == NODE and value is not None:
+                    value = handles.get(id(value))
+                fields.append(value)
+            if pending:
+                continue
+            stack.pop()
+            handles[id(node)] = flat.add(KIND_CODES[node.__class__], fields,
+                                         node.line, node.column)
+        flat.root = handles[id(program)]
+        return flat
+    
+    def add(self, kind: int, fields: List[Any], line: int = 0, column: int = 0) -> int:
+        """
+        Append one node
+        
+        Args:
+            kind: Kind code of the node
+            fields: Field values in constructor order, children as handles
+            line: Source line
+            column: Source column
+        
+        Returns:
+            Handle of the new node
+        """
+        slots = self.slots
+        self.kinds.append(kind)
+        self.lines.append(line)
+        self.columns.append(column)
+        self.starts.append(len(slots))
+        for how, value in zip(FIELD_KINDS[kind], fields):
+            if how == NODE:
+                slots.append(NO_NODE if value is None else value)
+            elif how == NODES:
+                slots.extend(value)
+            else:
+                # Keyed by type too, so 1, 1.0 and True stay distinct
+                key = (value.__class__, value)
+                ref = self._value_ids.get(key)
+                if ref is None:
+                    ref = self._value_ids[key] = len(self.values)
+                    self.values.append(value)
+                slots.append(ref)
+        return len(self.kinds) - 1
+    
+    # Builders, one per node class
+    
+    def Program(self, declarations, line=0, column=0):
+        self.root = self.add(KIND_CODES[Program], (declarations,), line, column)
+        return self.root
+    
+    def VariableDeclaration(self, var_type, identifier, initializer=None,
+                            is_const=False, line=0, column=0):
+        return self.add(KIND_CODES[VariableDeclaration],
+                        (var_type, identifier, initializer, is_const), line, column)
+    
+    def ParameterDeclaration(self, param_type, identifier, line=0, column=0):
+        return self.add(KIND_CODES[ParameterDeclaration], (param_type, identifier), line, column)
+    
+    def FunctionDeclaration(self, return_type, identifier, parameters, body, line=0, column=0):
+        return self.add(KIND_CODES[FunctionDeclaration],
+                        (return_type, identifier, parameters, body), line, column)
+    
+    def Block(self, statements, line=0, column=0, end_line=0, end_column=0):
+        return self.add(KIND_CODES[Block], (statements, end_line, end_column), line, column)
+    
+    def IfStatement(self, condition, then_branch, else_branch=None, line=0, column=0):
+        return self.add(KIND_CODES[IfStatement], (condition, then_branch, else_branch), line, column)
+    
+    def WhileStatement(self, condition, body, line=0, column=0):
+        return self.add(KIND_CODES[WhileStatement], (condition, body), line, column)
+    
+    def ForStatement(self, init, condition, increment, body, line=0, column=0, end_line=0,
+                     end_column=0):
+        return self.add(KIND_CODES[ForStatement],
+                        (init, condition, increment, body, end_line, end_column), line, column)
+    
+    def ReturnStatement(self, value=None, line=0, column=0):
+        return self.add(KIND_CODES[ReturnStatement], (value,), line, column)
+    
+    def ExpressionStatement(self, expression, line=0, column=0):
+        return self.add(KIND_CODES[ExpressionStatement], (expression,), line, column)
+    
+    def AssignmentExpression(self, identifier, value, line=0, column=0):
+        return self.add(KIND_CODES[AssignmentExpression], (identifier, value), line, column)
+    
+    def BinaryExpression(self, operator, left, right, line=0, column=0):
+        return self.add(KIND_CODES[BinaryExpression], (operator, left, right), line, column)
+    
+    def UnaryExpression(self, operator, operand, line=0, column=0):
+        return self.add(KIND_CODES[UnaryExpression], (operator, operand), line, column)
+    
+    def CallExpression(self, identifier, arguments, line=0, column=0):
+        return self.add(KIND_CODES[CallExpression], (identifier, arguments), line, column)
+    
+    def Identifier(self, name, line=0, column=0):
+        return self.add(IDENTIFIER_KIND, (name,), line, column)
+    
+    def Literal(self, value, literal_type, line=0, column=0):
+        return self.add(KIND_CODES[Literal], (value, literal_type), line, column)
+    
+    def ReadStatement(self, identifier, line=0, column=0):
+        return self.add(KIND_CODES[ReadStatement], (identifier,), line, column)
+    
+    def PrintStatement(self, expression, line=0, column=0):
+        return self.add(KIND_CODES[PrintStatement], (expression,), line, column)
+    
+    # Access
+    
+    def identifier_name(self, handle: int) -> Optional[str]:
+        """Name of the node if it is an Identifier, else None"""
+        if self.kinds[handle] != IDENTIFIER_KIND:
+            return None
+        return self.values[self.slots[self.starts[handle]]]
+    
+    def node_slots(self, handle: int) -> array:
+        """Slots of one node"""
+        end = self.starts[handle + 1] if handle + 1 < len(self.starts) else len(self.slots)
+        return self.slots[self.starts[handle]:end]
+    
+    @property
+    def program(self) -> 'Program':
+        """View of the root Program node"""
+        return self[self.root]
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+    
+    def __getitem__(self, handle: int) -> ASTNode:
+        """Node view of the node at handle"""
+        if handle < 0:
+            handle += len(self.kinds)
+        return VIEW_CLASSES[self.kinds[handle]](self, handle)
+    
+    def to_ast(self) -> 'Program':
+        """
+        Build the equivalent object AST
+        
+        Returns:
+            Root Program node
+        """
+        nodes: List[Any] = []
+        values = self.values
+        for handle, kind in enumerate(self.kinds):
+            slots = self.node_slots(handle)
+            hows = FIELD_KINDS[kind]
+            tail = len(slots) - len(hows)
+            fields = []
+            position = 0
+            for how in hows:
+                if how == NODES:
+                    fields.append([nodes[child] for child in slots[position:position + tail + 1]])
+                    position += tail + 1
+                    continue
+                ref = slots[position]
+                if how == VALUE:
+                    fields.append(values[ref])
+                else:
+                    fields.append(None if ref == NO_NODE else nodes[ref])
+                position += 1
+            nodes.append(NODE_BUILDERS[kind](*fields, line=self.lines[handle],
+                                            column=self.columns[handle]))
+        return nodes[self.root]
+    
+    def nbytes(self) -> int:
+        """Bytes used by the node arrays (excluding the value pool)"""
+        return sum(a.itemsize * len(a) for a in (
+            self.kinds, self.lines, self.columns, self.starts, self.slots))
+
+
+def field_getter(how: int, start: int, end: Optional[int] = None) -> property:
+    """
+    Build the property reading one field of a node view
+    
+    Each combination of field kind and placement gets its own getter
+    that indexes the arrays directly: the walks read fields far more
+    often than anything else, so this is the cost of the view layer.
+    
+    Args:
+        how: VALUE, NODE or NODES
+        start: Slot of the field within the node; negative counts from
+            the node's end (fields after a list field)
+        end: For NODES, end of the run within the node (negative or None)
+    
+    Returns:
+        Property for the view class
+    """
+    views = VIEW_CLASSES
+    if how == NODES:
+        def get(view):
+            ast = view.ast
+            handle = view.handle
+            starts = ast.starts
+            stop = starts[handle + 1] if handle + 1 < len(starts) else len(ast.slots)
+            kinds = ast.kinds
+            return [views[kinds[child]](ast, child)
+                    for child in ast.slots[starts[handle] + start:stop + (end or 0)]]
+    elif start >= 0 and how == VALUE:
+        def get(view):
+            ast = view.ast
+            return ast.values[ast.slots[ast.starts[view.handle] + start]]
+    elif start >= 0:
+        def get(view):
+            ast = view.ast
+            ref = ast.slots[ast.starts[view.handle] + start]
+            return None if ref == NO_NODE else views[ast.kinds[ref]](ast, ref)
+    else:
+        def get(view):
+            ast = view.ast
+            handle = view.handle
+            starts = ast.starts
+            stop = starts[handle + 1] if handle + 1 < len(starts) else len(ast.slots)
+            ref = ast.slots[stop + start]
+            if how == VALUE:
+                return ast.values[ref]
+            return None if ref == NO_NODE else views[ast.kinds[ref]](ast, ref)
+    return property(get)
+
+
+def view_class(cls: type) -> type:
+    """Generate the node view subclass of a node class"""
+    node_type, fields = LAYOUTS[cls]
+    
+    def __init__(view, ast: FlatAST, handle: int):
+        view.ast = ast
+        view.handle = handle
+    
+    namespace = {
+        '__slots__': ('ast', 'handle'),
+        '__doc__': f"{cls.__name__} stored in a FlatAST",
+        '__init__': __init__,
+        'node_type': node_type,
+        'line': property(lambda view: view.ast.lines[view.handle]),
+        'column': property(lambda view: view.ast.columns[view.handle]),
+    }
+    if 'symbol' in cls.__slots__:
+        # Views are made afresh on every access, so the binding lives
+        # in the arena
+        namespace['symbol'] = property(
+            lambda view: view.ast.symbols.get(view.handle),
+            lambda view, symbol: view.ast.symbols.__setitem__(view.handle, symbol))
+    
+    # Fields up to a list field sit at fixed slots from the node's start,
+    # fields after it at fixed slots from its end
+    hows = [how for _, how in fields]
+    split = hows.index(NODES) if NODES in hows else len(fields)
+    for position, (name, how) in enumerate(fields):
+        if position < split:
+            namespace[name] = field_getter(how, position)
+        elif position == split:
+            namespace[name] = field_getter(how, position, position + 1 - len(fields) or None)
+        else:
+            namespace[name] = field_getter(how, position - len(fields))
+    return type(cls.__name__, (cls,), namespace)
+
+
+# Kind code -> view class; the getters hold on to the list, so it exists
+# before the classes are made
+VIEW_CLASSES: List[type] = []
+VIEW_CLASSES.extend(view_class(cls) for cls in NODE_CLASSES)
@@ -0,0 +1,129 @@
+"""
+Parallel parsing for MinLang Compiler
+Parses function bodies in worker processes once a lazy pass has found
+where each body starts and ends
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, List, Optional, Tuple
+from ..lexer import Token
+from ..lexer.token_buffer import TokenBuffer
+from .ast_nodes import Program, Block, FunctionDeclaration
+from .parser import Parser, ParserError
+
+
+# Fewer body tokens than this are parsed in-process
+PARALLEL_MIN_TOKENS = 50000
+
+# Chunks per worker, so one slow chunk does not idle the others
+CHUNKS_PER_WORKER = 4
+
+
+def parse_bodies(tokens: TokenBuffer, ranges: List[Tuple[int, int]],
+                 iterative: bool = False) -> List[list]:
+    """
+    Parse a chunk of function bodies (runs in a worker process)
+    
+    Args:
+        tokens: Tokens of the chunk
+        ranges: (start, end) of each body in tokens, '{' to '}'
+        iterative: Parse with the explicit-stack mode
+    
+    Returns:
+        Statement list of each body
+    
+    Raises:
+        ParserError: For the first body that does not parse
+    """
+    bodies = []
+    for start, end in ranges:
+        body = tokens.iter_from(start, end)
+        bodies.append(Parser(body, iterative).parse_block().statements)
+    return bodies
+
+
+def replace_bodies(program: Program, functions: List[FunctionDeclaration],
+                   bodies: List[list]) -> Program:
+    """Swap the LazyBlock body of each function for a Block of its parsed
+    statements, keeping the brace positions the lazy pass recorded"""
+    for function, statements in zip(functions, bodies):
+        lazy = function.body
+        function.body = Block(statements, lazy.line, lazy.column, lazy.end_line, lazy.end_column)
+    return program
+
+
+def parse_parallel(tokens: Iterable[Token], workers: Optional[int] = None,
+                   iterative: bool = False,
+                   min_tokens: int = PARALLEL_MIN_TOKENS) -> Program:
+    """
+    Parse a token stream, spreading function bodies over processes
+    
+    A lazy pass (Parser(lazy=True)) parses the top-level declarations
+    and brace-matches each function body. The bodies are then split
+    into contiguous chunks, which are parsed in a ProcessPoolExecutor
+    and put back in order. The result equals Parser(tokens).parse(), and
+    the first syntax error in the source is the one raised. Tokens that
+    do not all share one LineIndex are parsed in this process.
+    
+    Args:
+        tokens: Token list, TokenBuffer or token iterator
+        workers: Number of worker processes (default: CPU count)
+        iterative: Parse with the explicit-stack mode
+        min_tokens: Fewest body tokens worth using workers for
+    
+    Returns:
+        Program node
+    """
+    workers = workers or os.cpu_count() or 1
+    if not isinstance(tokens, TokenBuffer):
+        tokens = list(tokens)
+    
+    try:
+        program = Parser(tokens, iterative, lazy=True).parse()
+    except ParserError:
+        # A body before the failing declaration may hold an earlier
+        # error; the serial parse reports the first one
+        return Parser(tokens, iterative).parse()
+    
+    functions = [declaration for declaration in program.declarations
+                 if isinstance(declaration, FunctionDeclaration)]
+    ranges = [(f.body.start, f.body.end) for f in functions]
+    total = sum(end - start for start, end in ranges)
+    
+    # Tokens without a shared LineIndex (e.g. built by hand) carry their
+    # positions themselves, which a TokenBuffer cannot hold
+    if not functions or workers < 2 or total < min_tokens or (
+            not isinstance(tokens, TokenBuffer)
+            and any(token.lines is None or token.lines is not tokens[0].lines
+                    for token in tokens)):
+        bodies = [function.body.statements for function in functions]
+        return replace_bodies(program, functions, bodies)
+    
+    # Contiguous chunks of roughly equal token counts
+    chunks = []
+    target = total / (workers * CHUNKS_PER_WORKER)
+    first = size = 0
+    for index, (start, end) in enumerate(ranges):
+        size += end - start
+        if size >= target or index == len(ranges) - 1:
+            chunks.append(ranges[first:index + 1])
+            first = index + 1
+            size = 0
+    
+    # Ship each chunk as a compact buffer, with its own value pool and
+    # line starts, and chunk-relative ranges
+    if not isinstance(tokens, TokenBuffer):
+        tokens = TokenBuffer.from_tokens(tokens, tokens[0].lines)
+    parts = []
+    for chunk in chunks:
+        base, stop = chunk[0][0], chunk[-1][1]
+        parts.append((tokens.slice(base, stop),
+                      [(start - base, end - base) for start, end in chunk]))
+    
+    with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as executor:
+        results = executor.map(parse_bodies, *zip(*parts), repeat(iterative))
+        bodies = [statements for chunk in results for statements in chunk]
+    
+    return replace_bodies(program, functions, bodies)
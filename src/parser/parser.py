@@ -1,23 +1,213 @@
 """Parser for MinLang - Simplified recursive descent parser"""
-from typing import List
-from ..lexer import Token, TokenType, Lexer
+from collections import deque
+from itertools import chain, islice
+from operator import attrgetter
+from typing import Iterable, List, Optional
+from ..lexer import Token, TokenType, Lexer, Edit
+from ..lexer.incremental import token_index
+from ..lexer.lexer import map_source, scan_bytes
+from ..lexer.token_buffer import TokenBuffer, KIND_CODES
+from . import ast_nodes
 from .ast_nodes import *
+from .flat_ast import FlatAST, LAYOUTS, NODE, NODES
+
+# Binding power of each binary operator (higher binds tighter); all of
+# them are left-associative
+BINARY_POWER = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.EQUAL: 3, TokenType.NOT_EQUAL: 3,
+    TokenType.LESS_THAN: 4, TokenType.GREATER_THAN: 4,
+    TokenType.LESS_EQUAL: 4, TokenType.GREATER_EQUAL: 4,
+    TokenType.PLUS: 5, TokenType.MINUS: 5,
+    TokenType.MULTIPLY: 6, TokenType.DIVIDE: 6, TokenType.MODULO: 6,
+}
+
+# Dispatch tables: choosing a production is one lookup on the current
+# token's type instead of a chain of match() calls
+TYPE_KEYWORDS = frozenset({
+    TokenType.INT, TokenType.FLOAT, TokenType.BOOL, TokenType.CHAR,
+})
+DECLARATION_TYPES = TYPE_KEYWORDS | {TokenType.VOID}
+LITERAL_KINDS = {
+    TokenType.INTEGER_LITERAL: 'int',
+    TokenType.FLOAT_LITERAL: 'float',
+    TokenType.TRUE: 'bool', TokenType.FALSE: 'bool',
+    TokenType.STRING_LITERAL: 'string',
+}
+UNARY_OPERATORS = frozenset({TokenType.NOT, TokenType.MINUS})
+BLOCK_END = frozenset({TokenType.RBRACE, TokenType.EOF})
+
+# Pending constructs on the explicit stack of the iterative mode
+UNARY, GROUP, CALL, BINARY, ASSIGN = range(5)
+BLOCK, IF, ELSE, WHILE, FOR = range(5)
 
 class ParserError(Exception):
     def __init__(self, message: str, token: Token):
         super().__init__(f"Parser Error at {token.line}:{token.column} - {message}")
+        self.message = message
+        self.token = token
+    
+    def __reduce__(self):
+        # Rebuild from the constructor arguments, e.g. when a worker
+        # process sends the error back
+        return ParserError, (self.message, self.token)
 
-class Parser:
-    def __init__(self, tokens: List[Token]):
+def find_block_end(tokens, start):
+    # Index just past the '}' matching the '{' at tokens[start], or None
+    # if it is never closed. A TokenBuffer is scanned by kind code.
+    if isinstance(tokens, TokenBuffer):
+        kinds = memoryview(tokens.kinds)[start:]
+        opening, closing = KIND_CODES[TokenType.LBRACE], KIND_CODES[TokenType.RBRACE]
+    else:
+        kinds = (tokens[index].type for index in range(start, len(tokens)))
+        opening, closing = TokenType.LBRACE, TokenType.RBRACE
+    depth = 0
+    for index, kind in enumerate(kinds, start):
+        if kind == opening:
+            depth += 1
+        elif kind == closing:
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+def declaration_ranges(tokens):
+    # (start, end) token range of each top-level declaration of a token
+    # list that parses: a declaration ends at a ';' outside braces or at
+    # the '}' closing its body. The ranges cover every token but EOF.
+    if isinstance(tokens, TokenBuffer):
+        kinds = memoryview(tokens.kinds)[:len(tokens) - 1]
+        opening, closing, semicolon = (KIND_CODES[TokenType.LBRACE], KIND_CODES[TokenType.RBRACE],
+                                       KIND_CODES[TokenType.SEMICOLON])
+    else:
+        kinds = map(attrgetter('type'), islice(tokens, len(tokens) - 1))
+        opening, closing, semicolon = TokenType.LBRACE, TokenType.RBRACE, TokenType.SEMICOLON
+    ranges = []
+    start = depth = 0
+    for index, kind in enumerate(kinds, 1):
+        if kind == opening:
+            depth += 1
+        elif kind == closing:
+            depth -= 1
+            if depth == 0:
+                ranges.append((start, index))
+                start = index
+        elif kind == semicolon and depth == 0:
+            ranges.append((start, index))
+            start = index
+    return ranges
+
+def resync_index(old_tokens, new_tokens, edit):
+    # Index of the first token of new_tokens from which on both lists
+    # hold the same tokens, moved by the edit. Tokens are equal once one
+    # starts at the same place in the unedited text: the lexer keeps no
+    # state between tokens. Tokens the IncrementalLexer reused are the
+    # same objects.
+    shift = len(new_tokens) - len(old_tokens)
+    index = max(token_index(new_tokens, edit.offset + len(edit.inserted)), shift)
+    while index < len(new_tokens):
+        new, old = new_tokens[index], old_tokens[index - shift]
+        if new is old or (new.offset == old.offset + edit.delta and
+                          new.type is old.type and new.value == old.value):
+            return index
+        index += 1
+    return index
+
+def shift_positions(node, line_delta, column_delta):
+    # Move the positions recorded in node's subtree line_delta lines;
+    # those on node's own line also move column_delta columns. Line 0
+    # means no position was recorded.
+    first = node.line
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.line:
+            if node.line == first:
+                node.column += column_delta
+            node.line += line_delta
+        if isinstance(node, (Block, ForStatement)):
+            if node.end_line == first:
+                node.end_column += column_delta
+            node.end_line += line_delta
+        for name, how in LAYOUTS[node.__class__][1]:
+            if how == NODE:
+                child = getattr(node, name)
+                if child is not None:
+                    stack.append(child)
+            elif how == NODES:
+                stack.extend(getattr(node, name))
+
+class LazyBlock(Block):
+    """Function body that is brace-matched at parse time and parsed on
+    first access to its statements. Until then it holds only the token
+    range; a syntax error inside it is raised by that first access.
+    It compares equal to the Block it parses to."""
+    __slots__ = ('tokens', 'start', 'end', 'iterative', '_statements')
+    
+    def __init__(self, tokens, start, end, iterative=False, line=0, column=0, end_line=0,
+                 end_column=0):
+        ASTNode.__init__(self, NodeType.BLOCK, line, column)
+        self.end_line = end_line
+        self.end_column = end_column
         self.tokens = tokens
+        self.start = start
+        self.end = end
+        self.iterative = iterative
+        self._statements = None
+    
+    @property
+    def parsed(self):
+        return self._statements is not None
+    
+    @property
+    def statements(self):
+        if self._statements is None:
+            body = map(self.tokens.__getitem__, range(self.start, self.end))
+            self._statements = Parser(body, self.iterative).parse_block().statements
+        return self._statements
+    
+    def __eq__(self, other):
+        if not isinstance(other, Block):
+            return NotImplemented
+        return ((self.line, self.column, self.end_line, self.end_column, self.statements) ==
+                (other.line, other.column, other.end_line, other.end_column, other.statements))
+
+class Parser:
+    """Recursive descent parser over a token list or a token iterator.
+    One token of lookahead (current_token) is all the grammar needs, so a
+    stream such as Lexer.iter_tokens() is never materialized.
+    With iterative=True, expressions and statements are parsed with an
+    explicit stack instead of recursion, so nesting depth is limited only
+    by memory; the resulting AST and errors are the same.
+    With flat=True, nodes are built into a FlatAST arena and parse()
+    returns the arena instead of a Program; it takes less memory, but the
+    later passes walk it more slowly than objects.
+    With lazy=True, function bodies become LazyBlocks that are parsed
+    only when first used; the tokens are then kept (a stream is
+    materialized into a list) so the bodies can be read back by index."""
+    def __init__(self, tokens: Iterable[Token], iterative: bool = False, flat: bool = False,
+                 lazy: bool = False):
+        if lazy and flat:
+            raise ValueError("lazy function bodies need an object AST")
+        if lazy and not isinstance(tokens, (list, TokenBuffer)):
+            tokens = list(tokens)
+        self.iterative = iterative
+        self.flat = flat
+        self.lazy = lazy
+        # Node builders: the node classes themselves, or the arena's
+        # methods of the same names, which return integer handles
+        self.nodes = FlatAST() if flat else ast_nodes
+        self.tokens: Optional[List[Token]] = tokens if lazy or isinstance(tokens, list) else None
+        self.stream = iter(tokens)
         self.position = 0
-        self.current_token = tokens[0] if tokens else None
+        self.current_token = next(self.stream, None)
     
     def advance(self):
         old = self.current_token
         self.position += 1
-        if self.position < len(self.tokens):
-            self.current_token = self.tokens[self.position]
+        # Past the end, keep returning the last token (EOF)
+        self.current_token = next(self.stream, old)
         return old
     
     def expect(self, token_type: TokenType):
@@ -28,82 +218,167 @@ class Parser:
     def match(self, *token_types):
         return self.current_token and self.current_token.type in token_types
     
+    def check(self, token_type):
+        return self.current_token.type is token_type
+    
     def parse(self):
         declarations = []
-        while not self.match(TokenType.EOF):
+        while not self.check(TokenType.EOF):
             declarations.append(self.parse_declaration())
-        return Program(declarations)
+        program = self.nodes.Program(declarations)
+        return self.nodes if self.flat else program
+    
+    @classmethod
+    def reparse(cls, old_program: Program, old_tokens, new_tokens, edit: Edit,
+                iterative: bool = False):
+        """Parse new_tokens, the tokens of the source old_tokens were lexed
+        from after edit, reusing every top-level declaration of old_program
+        that the edit leaves untouched. Only the declarations whose tokens
+        changed are parsed again; the new Program shares the others.
+        old_tokens must be a separate list from new_tokens (the
+        IncrementalLexer updates its list in place, so keep a copy).
+        The reused declarations after the edit have their recorded
+        positions moved in place to where their tokens now are.
+        Returns (program, rebuilt), rebuilt being the indices of the
+        parsed declarations in program.declarations."""
+        ranges = declaration_ranges(old_tokens)
+        declarations = old_program.declarations
+        if len(ranges) != len(declarations):
+            raise ValueError("old_tokens are not the tokens of old_program")
+        
+        # Tokens before head and from tail on are the same in both lists
+        head = max(token_index(new_tokens, edit.offset) - 1, 0)
+        tail = resync_index(old_tokens, new_tokens, edit)
+        shift = len(new_tokens) - len(old_tokens)
+        
+        # Declarations [first, last) overlap the changed tokens
+        first = 0
+        while first < len(ranges) and ranges[first][1] <= head:
+            first += 1
+        last = first
+        while last < len(ranges) and ranges[last][0] < tail - shift:
+            last += 1
+        start = ranges[first - 1][1] if first else 0
+        end = (ranges[last][0] if last < len(ranges) else len(old_tokens) - 1) + shift
+        
+        eof = new_tokens[len(new_tokens) - 1]
+        changed = chain(map(new_tokens.__getitem__, range(start, end)), (eof,))
+        try:
+            middle = cls(changed, iterative).parse().declarations
+        except ParserError:
+            # The edit broke a declaration boundary (or the source):
+            # only a full parse reports the right tree or error
+            program = cls(new_tokens, iterative).parse()
+            return program, list(range(len(program.declarations)))
+        
+        for index in range(last, len(ranges)):
+            declaration = declarations[index]
+            token = new_tokens[ranges[index][0] + shift]
+            if token.line != declaration.line or token.column != declaration.column:
+                shift_positions(declaration, token.line - declaration.line,
+                                token.column - declaration.column)
+        
+        program = Program(declarations[:first] + middle + declarations[last:])
+        return program, list(range(first, first + len(middle)))
+    
+    def identifier_name(self, expr):
+        # Name of expr if it is a plain identifier, else None
+        if self.flat:
+            return self.nodes.identifier_name(expr)
+        return expr.name if isinstance(expr, Identifier) else None
     
     def parse_declaration(self):
         # Simplified - handles only basic variable and function declarations
-        if not self.match(TokenType.INT, TokenType.FLOAT, TokenType.BOOL, TokenType.CHAR, TokenType.VOID):
+        start = self.current_token
+        if self.check(TokenType.CONST):
+            return self.parse_local_var()
+        if self.current_token.type not in DECLARATION_TYPES:
             raise ParserError("Expected type", self.current_token)
         var_type = self.advance().value
         identifier = self.expect(TokenType.IDENTIFIER).value
-        if self.match(TokenType.LPAREN):
-            return self.parse_function(var_type, identifier, 0, 0)
-        return self.parse_variable(var_type, identifier)
+        if self.check(TokenType.LPAREN):
+            return self.parse_function(var_type, identifier, start.line, start.column)
+        return self.parse_variable(var_type, identifier, False, start.line, start.column)
     
     def parse_function(self, ret_type, name, line, col):
         self.expect(TokenType.LPAREN)
         params = []
-        if not self.match(TokenType.RPAREN):
+        if not self.check(TokenType.RPAREN):
             params = self.parse_parameters()
         self.expect(TokenType.RPAREN)
-        body = self.parse_block()
-        return FunctionDeclaration(ret_type, name, params, body, line, col)
+        body = self.skip_block() if self.lazy else self.parse_block()
+        return self.nodes.FunctionDeclaration(ret_type, name, params, body, line, col)
+    
+    def skip_block(self):
+        # Brace-match over a block and defer parsing it
+        if not self.check(TokenType.LBRACE):
+            self.expect(TokenType.LBRACE)
+        start = self.position
+        end = find_block_end(self.tokens, start)
+        if end is None:
+            raise ParserError("Expected RBRACE", self.tokens[len(self.tokens) - 1])
+        # Jump the stream to the token after the closing brace
+        if isinstance(self.tokens, TokenBuffer):
+            self.stream = self.tokens.iter_from(end)
+        else:
+            deque(islice(self.stream, end - start - 1), maxlen=0)
+        self.position = end - 1
+        self.advance()
+        lbrace, rbrace = self.tokens[start], self.tokens[end - 1]
+        return LazyBlock(self.tokens, start, end, self.iterative, lbrace.line, lbrace.column,
+                         rbrace.line, rbrace.column)
     
     def parse_parameters(self):
         params = []
         while True:
-            ptype = self.advance().value
+            start = self.advance()
             pname = self.expect(TokenType.IDENTIFIER).value
-            params.append(ParameterDeclaration(ptype, pname))
-            if not self.match(TokenType.COMMA):
+            params.append(self.nodes.ParameterDeclaration(start.value, pname, start.line,
+                                                          start.column))
+            if not self.check(TokenType.COMMA):
                 break
             self.advance()
         return params
     
-    def parse_variable(self, vtype, name):
+    def parse_variable(self, vtype, name, is_const, line, col):
         init = None
-        if self.match(TokenType.ASSIGN):
+        if self.check(TokenType.ASSIGN):
             self.advance()
             init = self.parse_expression()
         self.expect(TokenType.SEMICOLON)
-        return VariableDeclaration(vtype, name, init)
+        return self.nodes.VariableDeclaration(vtype, name, init, is_const, line, col)
     
     def parse_block(self):
-        self.expect(TokenType.LBRACE)
+        # Anything but '{' fails the expect() below either way
+        if self.iterative and self.check(TokenType.LBRACE):
+            return self.parse_statement_iterative()
+        start = self.expect(TokenType.LBRACE)
         stmts = []
-        while not self.match(TokenType.RBRACE, TokenType.EOF):
+        while self.current_token.type not in BLOCK_END:
             stmts.append(self.parse_statement())
-        self.expect(TokenType.RBRACE)
-        return Block(stmts)
+        end = self.expect(TokenType.RBRACE)
+        return self.nodes.Block(stmts, start.line, start.column, end.line, end.column)
     
     def parse_statement(self):
-        if self.match(TokenType.INT, TokenType.FLOAT, TokenType.BOOL, TokenType.CHAR):
-            return self.parse_local_var()
-        if self.match(TokenType.IF):
-            return self.parse_if()
-        if self.match(TokenType.WHILE):
-            return self.parse_while()
-        if self.match(TokenType.RETURN):
-            return self.parse_return()
-        if self.match(TokenType.LBRACE):
-            return self.parse_block()
+        if self.iterative:
+            return self.parse_statement_iterative()
+        parse = self.STATEMENT_PARSERS.get(self.current_token.type)
+        if parse is not None:
+            return parse(self)
         expr = self.parse_expression()
         self.expect(TokenType.SEMICOLON)
-        return ExpressionStatement(expr)
+        return self.nodes.ExpressionStatement(expr)
     
     def parse_local_var(self):
+        start = self.current_token
+        is_const = self.check(TokenType.CONST)
+        if is_const:
+            self.advance()
+            if self.current_token.type not in TYPE_KEYWORDS:
+                raise ParserError("Expected type", self.current_token)
         vtype = self.advance().value
         name = self.expect(TokenType.IDENTIFIER).value
-        init = None
-        if self.match(TokenType.ASSIGN):
-            self.advance()
-            init = self.parse_expression()
-        self.expect(TokenType.SEMICOLON)
-        return VariableDeclaration(vtype, name, init)
+        return self.parse_variable(vtype, name, is_const, start.line, start.column)
     
     def parse_if(self):
         self.advance()
@@ -112,10 +387,10 @@ class Parser:
         self.expect(TokenType.RPAREN)
         then_b = self.parse_statement()
         else_b = None
-        if self.match(TokenType.ELSE):
+        if self.check(TokenType.ELSE):
             self.advance()
             else_b = self.parse_statement()
-        return IfStatement(cond, then_b, else_b)
+        return self.nodes.IfStatement(cond, then_b, else_b)
     
     def parse_while(self):
         self.advance()
@@ -123,114 +398,282 @@ class Parser:
         cond = self.parse_expression()
         self.expect(TokenType.RPAREN)
         body = self.parse_statement()
-        return WhileStatement(cond, body)
+        return self.nodes.WhileStatement(cond, body)
+    
+    def parse_for(self):
+        start = self.current_token
+        init, cond, incr = self.parse_for_header()
+        body = self.parse_statement()
+        # The loop's scope ends just before the next token
+        end = self.current_token
+        return self.nodes.ForStatement(init, cond, incr, body, start.line, start.column,
+                                       end.line, end.column - 1)
+    
+    def parse_for_header(self):
+        # 'for' '(' [declaration | expression ';' | ';'] [condition] ';'
+        # [increment] ')'
+        self.advance()
+        self.expect(TokenType.LPAREN)
+        init = None
+        if self.current_token.type in TYPE_KEYWORDS or self.check(TokenType.CONST):
+            init = self.parse_local_var()
+        elif self.check(TokenType.SEMICOLON):
+            self.advance()
+        else:
+            init = self.parse_expression()
+            self.expect(TokenType.SEMICOLON)
+        cond = None if self.check(TokenType.SEMICOLON) else self.parse_expression()
+        self.expect(TokenType.SEMICOLON)
+        incr = None if self.check(TokenType.RPAREN) else self.parse_expression()
+        self.expect(TokenType.RPAREN)
+        return init, cond, incr
+    
+    def parse_read(self):
+        self.advance()
+        self.expect(TokenType.LPAREN)
+        name = self.expect(TokenType.IDENTIFIER).value
+        self.expect(TokenType.RPAREN)
+        self.expect(TokenType.SEMICOLON)
+        return self.nodes.ReadStatement(name)
+    
+    def parse_print(self):
+        self.advance()
+        self.expect(TokenType.LPAREN)
+        expr = self.parse_expression()
+        self.expect(TokenType.RPAREN)
+        self.expect(TokenType.SEMICOLON)
+        return self.nodes.PrintStatement(expr)
     
     def parse_return(self):
         self.advance()
-        val = None if self.match(TokenType.SEMICOLON) else self.parse_expression()
+        val = None if self.check(TokenType.SEMICOLON) else self.parse_expression()
         self.expect(TokenType.SEMICOLON)
-        return ReturnStatement(val)
+        return self.nodes.ReturnStatement(val)
+    
+    # Statement-starting token -> method parsing that statement; anything
+    # else starts an expression statement
+    STATEMENT_PARSERS = {
+        TokenType.INT: parse_local_var, TokenType.FLOAT: parse_local_var,
+        TokenType.BOOL: parse_local_var, TokenType.CHAR: parse_local_var,
+        TokenType.CONST: parse_local_var,
+        TokenType.IF: parse_if,
+        TokenType.WHILE: parse_while,
+        TokenType.FOR: parse_for,
+        TokenType.RETURN: parse_return,
+        TokenType.READ: parse_read,
+        TokenType.PRINT: parse_print,
+        TokenType.LBRACE: parse_block,
+    }
     
     def parse_expression(self):
+        if self.iterative:
+            return self.parse_expression_iterative()
         return self.parse_assignment()
     
     def parse_assignment(self):
-        expr = self.parse_logical_or()
-        if self.match(TokenType.ASSIGN):
-            if not isinstance(expr, Identifier):
+        expr = self.parse_binary(0)
+        if self.check(TokenType.ASSIGN):
+            name = self.identifier_name(expr)
+            if name is None:
                 raise ParserError("Invalid assignment target", self.current_token)
             self.advance()
             val = self.parse_assignment()
-            return AssignmentExpression(expr.name, val)
-        return expr
-    
-    def parse_logical_or(self):
-        expr = self.parse_logical_and()
-        while self.match(TokenType.OR):
-            op = self.advance().value
-            expr = BinaryExpression(op, expr, self.parse_logical_and())
-        return expr
-    
-    def parse_logical_and(self):
-        expr = self.parse_equality()
-        while self.match(TokenType.AND):
-            op = self.advance().value
-            expr = BinaryExpression(op, expr, self.parse_equality())
+            return self.nodes.AssignmentExpression(name, val)
         return expr
     
-    def parse_equality(self):
-        expr = self.parse_relational()
-        while self.match(TokenType.EQUAL, TokenType.NOT_EQUAL):
-            op = self.advance().value
-            expr = BinaryExpression(op, expr, self.parse_relational())
-        return expr
-    
-    def parse_relational(self):
-        expr = self.parse_additive()
-        while self.match(TokenType.LESS_THAN, TokenType.GREATER_THAN, 
-                         TokenType.LESS_EQUAL, TokenType.GREATER_EQUAL):
-            op = self.advance().value
-            expr = BinaryExpression(op, expr, self.parse_additive())
-        return expr
-    
-    def parse_additive(self):
-        expr = self.parse_multiplicative()
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            op = self.advance().value
-            expr = BinaryExpression(op, expr, self.parse_multiplicative())
-        return expr
-    
-    def parse_multiplicative(self):
+    def parse_binary(self, min_power):
+        # Pratt loop: fold every operator that binds tighter than min_power
         expr = self.parse_unary()
-        while self.match(TokenType.MULTIPLY, TokenType.DIVIDE, TokenType.MODULO):
+        power = BINARY_POWER.get(self.current_token.type)
+        while power is not None and power > min_power:
             op = self.advance().value
-            expr = BinaryExpression(op, expr, self.parse_unary())
+            expr = self.nodes.BinaryExpression(op, expr, self.parse_binary(power))
+            power = BINARY_POWER.get(self.current_token.type)
         return expr
     
     def parse_unary(self):
-        if self.match(TokenType.NOT, TokenType.MINUS):
+        if self.current_token.type in UNARY_OPERATORS:
             op = self.advance().value
-            return UnaryExpression(op, self.parse_unary())
+            return self.nodes.UnaryExpression(op, self.parse_unary())
         return self.parse_postfix()
     
     def parse_postfix(self):
         expr = self.parse_primary()
-        while self.match(TokenType.LPAREN):
+        while self.check(TokenType.LPAREN):
             self.advance()
             args = []
-            if not self.match(TokenType.RPAREN):
+            if not self.check(TokenType.RPAREN):
                 args.append(self.parse_expression())
-                while self.match(TokenType.COMMA):
+                while self.check(TokenType.COMMA):
                     self.advance()
                     args.append(self.parse_expression())
             self.expect(TokenType.RPAREN)
-            if not isinstance(expr, Identifier):
+            name = self.identifier_name(expr)
+            if name is None:
                 raise ParserError("Only identifiers can be called", self.current_token)
-            expr = CallExpression(expr.name, args)
+            expr = self.nodes.CallExpression(name, args)
         return expr
     
     def parse_primary(self):
-        if self.match(TokenType.INTEGER_LITERAL):
-            return Literal(self.advance().value, 'int')
-        if self.match(TokenType.FLOAT_LITERAL):
-            return Literal(self.advance().value, 'float')
-        if self.match(TokenType.TRUE, TokenType.FALSE):
-            return Literal(self.advance().value, 'bool')
-        if self.match(TokenType.STRING_LITERAL):
-            return Literal(self.advance().value, 'string')
-        if self.match(TokenType.IDENTIFIER):
-            return Identifier(self.advance().value)
-        if self.match(TokenType.LPAREN):
+        token_type = self.current_token.type
+        if token_type is TokenType.IDENTIFIER:
+            return self.nodes.Identifier(self.advance().value)
+        kind = LITERAL_KINDS.get(token_type)
+        if kind is not None:
+            return self.nodes.Literal(self.advance().value, kind)
+        if token_type is TokenType.LPAREN:
             self.advance()
             expr = self.parse_expression()
             self.expect(TokenType.RPAREN)
             return expr
         raise ParserError(f"Unexpected token", self.current_token)
+    
+    def parse_statement_iterative(self):
+        # Same grammar as parse_statement; compound statements push a frame
+        # and continue with their nested statement, which is folded into
+        # them once it is complete
+        stack = []
+        while True:
+            # Parse until one statement is complete
+            token_type = self.current_token.type
+            if token_type is TokenType.IF or token_type is TokenType.WHILE:
+                self.advance()
+                self.expect(TokenType.LPAREN)
+                cond = self.parse_expression_iterative()
+                self.expect(TokenType.RPAREN)
+                stack.append((IF if token_type is TokenType.IF else WHILE, cond, None))
+                continue
+            if token_type is TokenType.FOR:
+                start = self.current_token
+                stack.append((FOR, self.parse_for_header(), start))
+                continue
+            if token_type is TokenType.LBRACE:
+                start = self.advance()
+                if self.current_token.type not in BLOCK_END:
+                    stack.append((BLOCK, [], start))
+                    continue
+                end = self.expect(TokenType.RBRACE)
+                stmt = self.nodes.Block([], start.line, start.column, end.line, end.column)
+            elif token_type in TYPE_KEYWORDS or token_type is TokenType.CONST:
+                stmt = self.parse_local_var()
+            elif token_type is TokenType.RETURN:
+                stmt = self.parse_return()
+            elif token_type is TokenType.READ:
+                stmt = self.parse_read()
+            elif token_type is TokenType.PRINT:
+                stmt = self.parse_print()
+            else:
+                expr = self.parse_expression_iterative()
+                self.expect(TokenType.SEMICOLON)
+                stmt = self.nodes.ExpressionStatement(expr)
+            
+            # Fold it into the pending compound statements
+            while stack:
+                kind, first, second = stack[-1]
+                if kind == BLOCK:
+                    first.append(stmt)
+                    if self.current_token.type not in BLOCK_END:
+                        break
+                    end = self.expect(TokenType.RBRACE)
+                    stmt = self.nodes.Block(first, second.line, second.column, end.line,
+                                            end.column)
+                elif kind == IF and self.check(TokenType.ELSE):
+                    self.advance()
+                    stack[-1] = (ELSE, first, stmt)
+                    break
+                elif kind == IF:
+                    stmt = self.nodes.IfStatement(first, stmt, None)
+                elif kind == ELSE:
+                    stmt = self.nodes.IfStatement(first, second, stmt)
+                elif kind == FOR:
+                    end = self.current_token
+                    stmt = self.nodes.ForStatement(*first, stmt, second.line, second.column,
+                                                   end.line, end.column - 1)
+                else:
+                    stmt = self.nodes.WhileStatement(first, stmt)
+                stack.pop()
+            else:
+                return stmt
+    
+    def parse_expression_iterative(self):
+        # Same grammar as parse_assignment; every construct that would
+        # recurse pushes a frame instead: UNARY (op), GROUP, CALL (callee,
+        # args), BINARY (op, power, left) and ASSIGN (name)
+        stack = []
+        while True:
+            # Operand: prefix operators, then a primary
+            token = self.current_token
+            if token.type in UNARY_OPERATORS:
+                self.advance()
+                stack.append((UNARY, token.value, None))
+                continue
+            if token.type == TokenType.LPAREN:
+                self.advance()
+                stack.append((GROUP, None, None))
+                continue
+            expr = self.parse_primary()
+            
+            # Reduce until the expression needs another operand
+            while True:
+                if self.check(TokenType.LPAREN):
+                    self.advance()
+                    if not self.check(TokenType.RPAREN):
+                        stack.append((CALL, expr, []))
+                        break
+                    self.advance()
+                    name = self.identifier_name(expr)
+                    if name is None:
+                        raise ParserError("Only identifiers can be called", self.current_token)
+                    expr = self.nodes.CallExpression(name, [])
+                    continue
+                while stack and stack[-1][0] == UNARY:
+                    expr = self.nodes.UnaryExpression(stack.pop()[1], expr)
+                
+                # Fold the binary operators that bind at least as tightly
+                power = BINARY_POWER.get(self.current_token.type)
+                while stack and stack[-1][0] == BINARY and (power is None or stack[-1][1] >= power):
+                    _, _, left, op = stack.pop()
+                    expr = self.nodes.BinaryExpression(op, left, expr)
+                if power is not None:
+                    stack.append((BINARY, power, expr, self.advance().value))
+                    break
+                
+                if self.check(TokenType.ASSIGN):
+                    name = self.identifier_name(expr)
+                    if name is None:
+                        raise ParserError("Invalid assignment target", self.current_token)
+                    self.advance()
+                    stack.append((ASSIGN, name, None))
+                    break
+                while stack and stack[-1][0] == ASSIGN:
+                    expr = self.nodes.AssignmentExpression(stack.pop()[1], expr)
+                
+                # A complete expression closes a group or a call argument
+                if not stack:
+                    return expr
+                kind, callee, args = stack[-1]
+                if kind == GROUP:
+                    stack.pop()
+                    self.expect(TokenType.RPAREN)
+                    continue
+                args.append(expr)
+                if self.check(TokenType.COMMA):
+                    self.advance()
+                    break
+                self.expect(TokenType.RPAREN)
+                stack.pop()
+                name = self.identifier_name(callee)
+                if name is None:
+                    raise ParserError("Only identifiers can be called", self.current_token)
+                expr = self.nodes.CallExpression(name, args)
 
-def parse_file(filename):
+def parse_file(filename, engine='char', mmap=False, iterative=False, flat=False, lazy=False):
+    if mmap:
+        with map_source(filename) as data:
+            return Parser(scan_bytes(data), iterative, flat, lazy).parse()
     with open(filename) as f:
-        lexer = Lexer(f.read())
-    return Parser(lexer.tokenize()).parse()
+        lexer = Lexer(f.read(), engine)
+    return Parser(lexer.iter_tokens(), iterative, flat, lazy).parse()
 
-def parse_string(source):
-    return Parser(Lexer(source).tokenize()).parse()
+def parse_string(source, engine='char', iterative=False, flat=False, lazy=False):
+    return Parser(Lexer(source, engine).iter_tokens(), iterative, flat, lazy).parse()
@@ -0,0 +1,309 @@
+"""
+Binary AST serialization for MinLang Compiler
+Stores a parsed Program compactly so it can be cached between runs
+"""
+
+import gc
+import struct
+from typing import Any, Dict, List, Tuple
+from .ast_nodes import *
+from .flat_ast import (
+    LAYOUTS, NODE_CLASSES, NODE_BUILDERS, KIND_CODES, FIELD_KINDS, VALUE, NODE, NODES
+)
+
+
+# Leading bytes of every serialized AST; the version changes whenever
+# the layout of a node class or of the format does, so stale cache
+# entries are rejected instead of misread
+MAGIC = b'MLAST'
+FORMAT_VERSION = 4
+
+# Kind byte written for an absent optional child
+NO_NODE = 0xFF
+ABSENT = bytes((NO_NODE,))
+
+# Tags of the value table entries
+NONE_VALUE, FALSE_VALUE, TRUE_VALUE, INT_VALUE, FLOAT_VALUE, STR_VALUE = range(6)
+
+DOUBLE = struct.Struct('<d')
+
+
+def field_plan(hows: Tuple[int, ...]) -> tuple:
+    """
+    Precompute how deserialize() reads the record of one node kind
+    
+    Args:
+        hows: Field kinds of the node class (FIELD_KINDS entry)
+    
+    Returns:
+        Tuple (children, count, fields): the number of single children,
+        made negative (-1 - n) if a child list adds to them; the record
+        position of the list length; and (how, index) per field. For a
+        value, index is its reference's record position; for a child or
+        the start of the list, its position among the node's children,
+        counted from the end for the children after the list.
+    """
+    count = NODES in hows and 2 + sum(how != NODE for how in hows[:hows.index(NODES)])
+    singles = hows.count(NODE)
+    after = hows[hows.index(NODES):].count(NODE) if count else 0
+    fields = []
+    entry = 2
+    child = 0
+    for how in hows:
+        if how == VALUE:
+            fields.append((how, entry))
+            entry += 1
+        elif how == NODES:
+            fields.append((how, child))
+            entry += 1
+        else:
+            fields.append((how, child if child < singles - after else child - singles))
+            child += 1
+    return (-1 - singles if count else singles), count, tuple(fields)
+
+
+FIELD_PLANS = [field_plan(hows) for hows in FIELD_KINDS]
+RECORD_SIZES = [2 + sum(how != NODE for how in hows) for hows in FIELD_KINDS]
+
+
+class ASTFormatError(Exception):
+    """Raised for data that is not a serialized AST of this version"""
+
+
+def write_varint(out: bytearray, value: int):
+    """Append an unsigned LEB128 varint"""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """
+    Read an unsigned LEB128 varint
+    
+    Args:
+        data: Serialized bytes
+        pos: Offset of the varint
+    
+    Returns:
+        Tuple of the value and the offset after it
+    """
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def node_kind(cls: type) -> int:
+    """Kind code of a node class or of a subclass of one (LazyBlock)"""
+    kind = KIND_CODES.get(cls)
+    if kind is None:
+        for base in cls.__mro__:
+            if base in KIND_CODES:
+                kind = KIND_CODES[cls] = KIND_CODES[base]
+                break
+        else:
+            raise TypeError(f"Cannot serialize {cls.__name__}")
+    return kind
+
+
+def serialize(program: Program) -> bytes:
+    """
+    Serialize an AST
+    
+    Layout: MAGIC, a version byte, the value table (a varint count, then
+    each distinct field value as a tag byte and its payload: a zigzag
+    varint, an 8-byte double, or a varint length and UTF-8 text), then
+    the nodes in post-order. A node is its kind byte, its line and
+    column as varints, and one entry per field in constructor order: a
+    varint value-table index for a value, nothing for a child (it comes
+    earlier in the stream), and a varint count for a child list. An
+    absent child is the single byte NO_NODE. Reading the nodes back
+    therefore needs only a stack, whatever the tree's depth.
+    
+    Args:
+        program: Root of the tree
+    
+    Returns:
+        Serialized bytes
+    """
+    values: List[Any] = []
+    value_ids: Dict[Tuple[type, Any], int] = {}
+    
+    # A pre-order walk that visits children last to first emits the
+    # post-order backwards; each record is built reversed, then the
+    # whole stream is reversed once
+    stack = [program]
+    pop, push = stack.pop, stack.append
+    chunks = []
+    while stack:
+        node = pop()
+        if node is None:
+            chunks.append(ABSENT)
+            continue
+        kind = node_kind(node.__class__)
+        record = bytearray((kind,))
+        write_varint(record, node.line)
+        write_varint(record, node.column)
+        for name, how in LAYOUTS[NODE_CLASSES[kind]][1]:
+            value = getattr(node, name)
+            if how == NODE:
+                push(value)
+            elif how == NODES:
+                write_varint(record, len(value))
+                stack.extend(value)
+            else:
+                # Keyed by type too, so 1, 1.0 and True stay distinct
+                key = (value.__class__, value)
+                ref = value_ids.get(key)
+                if ref is None:
+                    ref = value_ids[key] = len(values)
+                    values.append(value)
+                write_varint(record, ref)
+        chunks.append(record)
+    chunks.reverse()
+    
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    write_varint(out, len(values))
+    for value in values:
+        if value is None:
+            out.append(NONE_VALUE)
+        elif value is False or value is True:
+            out.append(TRUE_VALUE if value else FALSE_VALUE)
+        elif isinstance(value, int):
+            out.append(INT_VALUE)
+            write_varint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+        elif isinstance(value, float):
+            out.append(FLOAT_VALUE)
+            out += DOUBLE.pack(value)
+        elif isinstance(value, str):
+            text = value.encode('utf-8')
+            out.append(STR_VALUE)
+            write_varint(out, len(text))
+            out += text
+        else:
+            raise TypeError(f"Cannot serialize field value {value!r}")
+    out += b''.join(chunks)
+    return bytes(out)
+
+
+def read_values(data: bytes, pos: int) -> Tuple[List[Any], int]:
+    """
+    Read the value table
+    
+    Args:
+        data: Serialized bytes
+        pos: Offset of the table
+    
+    Returns:
+        Tuple of the values and the offset after the table
+    """
+    count, pos = read_varint(data, pos)
+    values: List[Any] = []
+    append = values.append
+    for _ in range(count):
+        tag = data[pos]
+        pos += 1
+        if tag == STR_VALUE:
+            length, pos = read_varint(data, pos)
+            append(data[pos:pos + length].decode('utf-8'))
+            pos += length
+        elif tag == INT_VALUE:
+            value, pos = read_varint(data, pos)
+            append(value >> 1 if not value & 1 else ~(value >> 1))
+        elif tag == FLOAT_VALUE:
+            append(DOUBLE.unpack_from(data, pos)[0])
+            pos += DOUBLE.size
+        elif tag <= TRUE_VALUE:
+            append((None, False, True)[tag])
+        else:
+            raise ASTFormatError(f"Unknown value tag {tag}")
+    return values, pos
+
+
+def deserialize(data: bytes, pause_gc: bool = False) -> Program:
+    """
+    Rebuild an AST written by serialize()
+    
+    Args:
+        data: Serialized bytes
+        pause_gc: Disable the garbage collector while reading. The loop
+            allocates nothing but tree nodes, which form no cycles, so
+            collections it triggers cost time and free nothing; but the
+            switch is process-wide, so only callers that own the process
+            (e.g. a worker) should ask for it.
+    
+    Returns:
+        Root Program node, equal to the serialized one
+    
+    Raises:
+        ASTFormatError: If data is not a serialized AST of this version
+    """
+    if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+        raise ASTFormatError("Not a serialized MinLang AST")
+    if data[len(MAGIC)] != FORMAT_VERSION:
+        raise ASTFormatError(f"Unsupported AST format version {data[len(MAGIC)]}")
+    
+    enabled = pause_gc and gc.isenabled()
+    if enabled:
+        gc.disable()
+    try:
+        values, pos = read_values(data, len(MAGIC) + 1)
+        stack: List[Any] = []
+        push = stack.append
+        end = len(data)
+        while pos < end:
+            kind = data[pos]
+            pos += 1
+            if kind == NO_NODE:
+                push(None)
+                continue
+            
+            # The record: line, column, then value references and list
+            # lengths. Its varints nearly always take one byte each, and
+            # then it is read as one slice.
+            size = RECORD_SIZES[kind]
+            record = data[pos:pos + size]
+            if record.isascii() and len(record) == size:
+                pos += size
+            else:
+                record = []
+                for _ in range(size):
+                    entry, pos = read_varint(data, pos)
+                    record.append(entry)
+            
+            plan = FIELD_PLANS[kind]
+            children = plan[0]
+            if children < 0:
+                # A child list: its length gives the number of children
+                children = -1 - children + record[plan[1]]
+            if children:
+                taken = stack[len(stack) - children:]
+                del stack[len(stack) - children:]
+            else:
+                taken = []
+            
+            fields = []
+            for how, index in plan[2]:
+                if how == VALUE:
+                    fields.append(values[record[index]])
+                elif how == NODE:
+                    fields.append(taken[index])
+                else:
+                    fields.append(taken[index:index + record[plan[1]]])
+            push(NODE_BUILDERS[kind](*fields, line=record[0], column=record[1]))
+    except (IndexError, TypeError, UnicodeDecodeError) as e:
+        raise ASTFormatError(f"Corrupt serialized AST: {e}") from e
+    finally:
+        if enabled:
+            gc.enable()
+    
+    if len(stack) != 1 or not isinstance(stack[0], Program):
+        raise ASTFormatError("Corrupt serialized AST: not a single Program")
+    return stack[0]
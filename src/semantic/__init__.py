@@ -3,18 +3,22 @@ Semantic Analysis package for MinLang Compiler
 """
 
 from .symbol_table import (
-    SymbolTable, Symbol, SymbolKind, DataType, TypeChecker, Scope
+    SymbolTable, FlatSymbolTable, Symbol, SymbolKind, DataType, TypeChecker, Scope, ScopeIndex
 )
 from .analyzer import SemanticAnalyzer, SemanticError, analyze_program
+from .parallel import analyze_parallel
 
 __all__ = [
     'SymbolTable',
+    'FlatSymbolTable',
     'Symbol',
     'SymbolKind',
     'DataType',
     'TypeChecker',
     'Scope',
+    'ScopeIndex',
     'SemanticAnalyzer',
     'SemanticError',
     'analyze_program',
+    'analyze_parallel',
 ]
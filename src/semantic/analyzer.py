@@ -3,8 +3,10 @@ Semantic Analyzer for MinLang Compiler
 Performs type checking, scope resolution, and semantic validation
 """
 
-from typing import List, Optional, Any
+import sys
+from typing import Dict, List, Optional, Any, Set, Tuple
 from ..parser.ast_nodes import *
+from ..utils.trampoline import trampoline
 from .symbol_table import (
     SymbolTable, Symbol, SymbolKind, DataType, TypeChecker
 )
@@ -17,6 +19,16 @@ class SemanticError(Exception):
         self.line = line
         self.column = column
         super().__init__(f"Semantic Error at {line}:{column} - {message}")
+    
+    def __reduce__(self):
+        # Rebuilt from its parts when sent back from a worker process
+        return self.__class__, (self.message, self.line, self.column)
+
+
+# What checking one function body yields: its errors, the globals it
+# assigns, and (error index, global) for each read of a global that was
+# uninitialized as far as the body could tell
+BodyResult = Tuple[List[SemanticError], Set[str], List[Tuple[int, str]]]
 
 
 class SemanticAnalyzer:
@@ -26,14 +38,55 @@ class SemanticAnalyzer:
     - Scope resolution
     - Symbol table management
     - Semantic validation
+    
+    Visitors for nodes with children are generators that yield each child
+    and receive its result, and walk() runs them on an explicit stack, so
+    arbitrarily deep nesting never hits the recursion limit.
+    
+    Name resolution happens during the same traversal: every Identifier,
+    AssignmentExpression, CallExpression and ReadStatement gets its
+    symbol slot bound to the Symbol its name resolves to (None if it is
+    undefined), so later phases never look names up by string.
+    
+    Analysis has two phases. collect_declarations() defines the global
+    variables and function signatures in source order; check_function()
+    then checks one function body. A body may therefore call a function
+    defined after it. It depends only on the globals, never on another
+    body, so bodies can be checked in any order or in parallel (see
+    analyze_parallel), and the errors are still reported in source
+    order. For the same reason a global read before initialization is
+    reported unless another function body assigns it; within one body,
+    reads and assignments are checked in order.
     """
     
-    def __init__(self):
-        """Initialize the semantic analyzer"""
-        self.symbol_table = SymbolTable()
+    def __init__(self, symbol_table: Optional[SymbolTable] = None):
+        """
+        Initialize the semantic analyzer
+        
+        Args:
+            symbol_table: Empty symbol table to fill, e.g. a
+                FlatSymbolTable (default: a new SymbolTable)
+        """
+        self.symbol_table = symbol_table if symbol_table is not None else SymbolTable()
         self.errors: List[SemanticError] = []
         self.current_function_return_type: Optional[DataType] = None
         self.has_main = False
+        # Errors of each top-level declaration, its body's included
+        self.declaration_errors: List[List[SemanticError]] = []
+        # Globals assigned by the function bodies checked so far, and
+        # how many bodies assign each
+        self.initialized_globals: Dict[str, int] = {}
+        # Reads of globals the bodies found uninitialized, with the
+        # globals the reading body assigns itself
+        self.global_reads: List[Tuple[SemanticError, str, Set[str]]] = []
+        # Globals assigned and uninitialized globals read by the body
+        # being checked (body_globals is None outside bodies)
+        self.body_globals: Optional[Set[str]] = None
+        self.body_reads: List[Tuple[int, str]] = []
+        # Global name -> its place in declaration order, and the place
+        # of the function being checked
+        self.global_order: Dict[str, int] = {}
+        self.function_order = sys.maxsize
     
     def error(self, message: str, line: int = 0, column: int = 0):
         """
@@ -57,8 +110,133 @@ class SemanticAnalyzer:
         Returns:
             True if no errors, False otherwise
         """
-        self.errors.clear()
-        self.analyze_program(ast)
+        return self.analyze_program(ast)
+    
+    def analyze_program(self, node: Program) -> bool:
+        """
+        Analyze program node: collect the declarations, check each
+        function body, then finish()
+        
+        Args:
+            node: Program AST node
+            
+        Returns:
+            True if no errors, False otherwise
+        """
+        for function, errors in self.collect_declarations(node):
+            self.merge_function(errors, self.check_function(function))
+        return self.finish()
+    
+    def analyze_function_declaration(self, node: FunctionDeclaration):
+        """
+        Analyze function declaration: define its signature and check its
+        body right away, as one more top-level declaration. The errors
+        join the others when finish() is called.
+        
+        Args:
+            node: Function declaration
+        """
+        errors = self.errors
+        self.errors = function_errors = []
+        self.declaration_errors.append(function_errors)
+        if self.declare_function(node):
+            self.merge_function(function_errors, self.check_function(node))
+        self.errors = errors
+    
+    def collect_declarations(self, ast: Program) -> List[Tuple[FunctionDeclaration,
+                                                               List[SemanticError]]]:
+        """
+        First phase: define the global variables and the function
+        signatures in source order, checking the global initializers
+        
+        Args:
+            ast: Program AST node
+            
+        Returns:
+            (function, errors) for each function whose body is to be
+            checked, errors being the list its body's errors go to
+        """
+        self.declaration_errors = []
+        self.initialized_globals = {}
+        self.global_reads = []
+        functions = []
+        for declaration in ast.declarations:
+            self.errors = []
+            self.declaration_errors.append(self.errors)
+            if isinstance(declaration, FunctionDeclaration):
+                if self.declare_function(declaration):
+                    functions.append((declaration, self.errors))
+            elif isinstance(declaration, VariableDeclaration):
+                self.walk(self.analyze_variable_declaration(declaration, is_global=True))
+        self.errors = []
+        self.number_globals()
+        return functions
+    
+    def number_globals(self):
+        """Record the declaration order of the global symbols, which
+        decides which globals a function body sees (see lookup())"""
+        self.global_order = {name: index for index, name
+                             in enumerate(self.symbol_table.global_scope.symbols)}
+    
+    def check_function(self, node: FunctionDeclaration) -> BodyResult:
+        """
+        Second phase, for one function: check its body
+        
+        The body sees the globals as collect_declarations() left them. A
+        global it assigns is recorded instead of being marked initialized,
+        so no body's result depends on another's.
+        
+        Args:
+            node: Function declared by collect_declarations()
+            
+        Returns:
+            The body's BodyResult, for merge_function()
+        """
+        self.errors = []
+        self.body_globals = set()
+        self.body_reads = []
+        self.function_order = self.global_order.get(node.identifier, sys.maxsize)
+        self.walk(self.analyze_function_body(node))
+        result = self.errors, self.body_globals, self.body_reads
+        self.errors = []
+        self.body_globals = None
+        self.body_reads = []
+        self.function_order = sys.maxsize
+        return result
+    
+    def merge_function(self, errors: List[SemanticError], result: BodyResult):
+        """
+        Take in the result of checking one function body
+        
+        Args:
+            errors: The function's list from collect_declarations()
+            result: What check_function() returned for it
+        """
+        body_errors, assigned, reads = result
+        self.global_reads.extend((body_errors[index], name, assigned) for index, name in reads)
+        errors.extend(body_errors)
+        for name in assigned:
+            self.initialized_globals[name] = self.initialized_globals.get(name, 0) + 1
+    
+    def finish(self) -> bool:
+        """
+        Merge the results of both phases once every body is checked
+        
+        Returns:
+            True if no errors, False otherwise
+        """
+        # A global another body assigns may be initialized by the time
+        # this one reads it; the reading body's own assignments were
+        # already checked in order
+        assigned = {id(error) for error, name, own in self.global_reads
+                    if self.initialized_globals.get(name, 0) > (name in own)}
+        self.errors = [error for errors in self.declaration_errors for error in errors
+                       if id(error) not in assigned]
+        self.declaration_errors = []
+        self.global_reads = []
+        globals_ = self.symbol_table.global_scope.symbols
+        for name in self.initialized_globals:
+            globals_[name].is_initialized = True
         
         # Check if main function exists
         if not self.has_main:
@@ -83,16 +261,98 @@ class SemanticAnalyzer:
     
     # AST Traversal Methods
     
-    def analyze_program(self, node: Program):
-        """Analyze program node"""
-        for declaration in node.declarations:
-            if isinstance(declaration, FunctionDeclaration):
-                self.analyze_function_declaration(declaration)
-            elif isinstance(declaration, VariableDeclaration):
-                self.analyze_variable_declaration(declaration, is_global=True)
+    def walk(self, node: Any) -> Any:
+        """
+        Analyze a node (or run a visitor generator) without recursion
+        
+        Args:
+            node: AST node, or a generator returned by a visitor
+            
+        Returns:
+            The visitor's result (DataType for expressions)
+        """
+        return trampoline(node, self.visit)
     
-    def analyze_function_declaration(self, node: FunctionDeclaration):
-        """Analyze function declaration"""
+    def visit(self, node: ASTNode) -> Any:
+        """Dispatch a node to its visitor"""
+        if isinstance(node, Literal):
+            return self.analyze_literal(node)
+        elif isinstance(node, Identifier):
+            return self.analyze_identifier(node)
+        elif isinstance(node, BinaryExpression):
+            return self.analyze_binary_expression(node)
+        elif isinstance(node, UnaryExpression):
+            return self.analyze_unary_expression(node)
+        elif isinstance(node, AssignmentExpression):
+            return self.analyze_assignment_expression(node)
+        elif isinstance(node, CallExpression):
+            return self.analyze_call_expression(node)
+        elif isinstance(node, VariableDeclaration):
+            return self.analyze_variable_declaration(node)
+        elif isinstance(node, ExpressionStatement):
+            return self.analyze_expression_statement(node)
+        elif isinstance(node, IfStatement):
+            return self.analyze_if_statement(node)
+        elif isinstance(node, WhileStatement):
+            return self.analyze_while_statement(node)
+        elif isinstance(node, ForStatement):
+            return self.analyze_for_statement(node)
+        elif isinstance(node, ReturnStatement):
+            return self.analyze_return_statement(node)
+        elif isinstance(node, Block):
+            return self.analyze_block(node)
+        elif isinstance(node, ReadStatement):
+            return self.analyze_read_statement(node)
+        elif isinstance(node, PrintStatement):
+            return self.analyze_print_statement(node)
+        else:
+            self.error(f"Unknown expression type: {type(node)}", 0, 0)
+            return DataType.ERROR
+    
+    def lookup(self, name: str) -> Optional[Symbol]:
+        """
+        Resolve a name used in the code being checked
+        
+        Args:
+            name: Symbol name
+            
+        Returns:
+            Symbol if found, None otherwise. A global variable declared
+            after the function being checked is out of scope, although
+            collect_declarations() has already defined it.
+        """
+        symbol = self.symbol_table.lookup_symbol(name)
+        if (symbol is not None and symbol.scope_level == 0
+                and symbol.kind != SymbolKind.FUNCTION
+                and self.global_order.get(name, -1) > self.function_order):
+            return None
+        return symbol
+    
+    def mark_initialized(self, symbol: Symbol):
+        """Mark a variable initialized; in a function body, a global is
+        only recorded as assigned by that body"""
+        if symbol.scope_level == 0 and self.body_globals is not None:
+            self.body_globals.add(symbol.name)
+        else:
+            symbol.is_initialized = True
+    
+    def is_initialized(self, symbol: Symbol) -> bool:
+        """Whether a variable is initialized at this point of the analysis"""
+        return symbol.is_initialized or (symbol.scope_level == 0 and
+                                         self.body_globals is not None and
+                                         symbol.name in self.body_globals)
+    
+    def declare_function(self, node: FunctionDeclaration) -> bool:
+        """
+        Define a function's signature
+        
+        Args:
+            node: Function declaration
+            
+        Returns:
+            True if its body is to be checked, False if the function is
+            already defined
+        """
         # Check if main function
         if node.identifier == "main":
             self.has_main = True
@@ -118,7 +378,7 @@ class SemanticAnalyzer:
                 f"Function '{node.identifier}' already defined",
                 node.line, node.column
             )
-            return
+            return False
         
         # Process parameters
         param_types = []
@@ -142,9 +402,14 @@ class SemanticAnalyzer:
             parameters=param_types,
             return_type=return_type
         )
+        return True
+    
+    def analyze_function_body(self, node: FunctionDeclaration):
+        """Analyze the parameters and body of a declared function"""
+        return_type = self.symbol_table.lookup_local(node.identifier).return_type
         
         # Enter function scope
-        self.symbol_table.enter_scope()
+        self.symbol_table.enter_scope(node)
         self.current_function_return_type = return_type
         
         # Define parameters in function scope
@@ -165,7 +430,7 @@ class SemanticAnalyzer:
                 self.symbol_table.mark_initialized(param.identifier)
         
         # Analyze function body
-        self.analyze_block(node.body)
+        yield node.body
         
         # Exit function scope
         self.symbol_table.exit_scope()
@@ -203,7 +468,7 @@ class SemanticAnalyzer:
         
         # Check initializer if present
         if node.initializer:
-            init_type = self.analyze_expression(node.initializer)
+            init_type = yield node.initializer
             
             # Check type compatibility
             if not TypeChecker.check_assignment(var_type, init_type):
@@ -223,39 +488,26 @@ class SemanticAnalyzer:
     def analyze_block(self, node: Block):
         """Analyze block statement"""
         # Enter new scope for block
-        self.symbol_table.enter_scope()
+        self.symbol_table.enter_scope(node)
         
         for statement in node.statements:
-            self.analyze_statement(statement)
+            yield statement
         
         # Exit block scope
         self.symbol_table.exit_scope()
     
     def analyze_statement(self, node: ASTNode):
         """Analyze a statement"""
-        if isinstance(node, VariableDeclaration):
-            self.analyze_variable_declaration(node)
-        elif isinstance(node, ExpressionStatement):
-            self.analyze_expression(node.expression)
-        elif isinstance(node, IfStatement):
-            self.analyze_if_statement(node)
-        elif isinstance(node, WhileStatement):
-            self.analyze_while_statement(node)
-        elif isinstance(node, ForStatement):
-            self.analyze_for_statement(node)
-        elif isinstance(node, ReturnStatement):
-            self.analyze_return_statement(node)
-        elif isinstance(node, Block):
-            self.analyze_block(node)
-        elif isinstance(node, ReadStatement):
-            self.analyze_read_statement(node)
-        elif isinstance(node, PrintStatement):
-            self.analyze_print_statement(node)
+        self.walk(node)
+    
+    def analyze_expression_statement(self, node: ExpressionStatement):
+        """Analyze expression statement"""
+        yield node.expression
     
     def analyze_if_statement(self, node: IfStatement):
         """Analyze if statement"""
         # Check condition
-        cond_type = self.analyze_expression(node.condition)
+        cond_type = yield node.condition
         if cond_type != DataType.BOOL:
             self.error(
                 f"If condition must be boolean, got {cond_type.value}",
@@ -263,14 +515,14 @@ class SemanticAnalyzer:
             )
         
         # Analyze branches
-        self.analyze_statement(node.then_branch)
+        yield node.then_branch
         if node.else_branch:
-            self.analyze_statement(node.else_branch)
+            yield node.else_branch
     
     def analyze_while_statement(self, node: WhileStatement):
         """Analyze while statement"""
         # Check condition
-        cond_type = self.analyze_expression(node.condition)
+        cond_type = yield node.condition
         if cond_type != DataType.BOOL:
             self.error(
                 f"While condition must be boolean, got {cond_type.value}",
@@ -278,28 +530,35 @@ class SemanticAnalyzer:
             )
         
         # Analyze body
-        self.analyze_statement(node.body)
+        yield node.body
     
     def analyze_for_statement(self, node: ForStatement):
         """Analyze for statement"""
+        # The loop's own scope holds a variable declared by init
+        self.symbol_table.enter_scope(node)
+        
         # Analyze init
         if node.init:
-            self.analyze_expression(node.init)
+            yield node.init
         
-        # Check condition
-        cond_type = self.analyze_expression(node.condition)
-        if cond_type != DataType.BOOL:
-            self.error(
-                f"For condition must be boolean, got {cond_type.value}",
-                node.line, node.column
-            )
+        # Check condition (an empty one loops forever)
+        if node.condition is not None:
+            cond_type = yield node.condition
+            if cond_type != DataType.BOOL:
+                self.error(
+                    f"For condition must be boolean, got {cond_type.value}",
+                    node.line, node.column
+                )
         
         # Analyze increment
         if node.increment:
-            self.analyze_expression(node.increment)
+            yield node.increment
         
         # Analyze body
-        self.analyze_statement(node.body)
+        yield node.body
+        
+        # Exit loop scope
+        self.symbol_table.exit_scope()
     
     def analyze_return_statement(self, node: ReturnStatement):
         """Analyze return statement"""
@@ -311,7 +570,7 @@ class SemanticAnalyzer:
             return
         
         if node.value:
-            value_type = self.analyze_expression(node.value)
+            value_type = yield node.value
             
             # Check return type matches function
             if not TypeChecker.check_assignment(
@@ -332,7 +591,7 @@ class SemanticAnalyzer:
     
     def analyze_read_statement(self, node: ReadStatement):
         """Analyze read statement"""
-        symbol = self.symbol_table.lookup_symbol(node.identifier)
+        node.symbol = symbol = self.lookup(node.identifier)
         
         if not symbol:
             self.error(
@@ -348,11 +607,11 @@ class SemanticAnalyzer:
             )
         
         # Mark as initialized after read
-        self.symbol_table.mark_initialized(node.identifier)
+        self.mark_initialized(symbol)
     
     def analyze_print_statement(self, node: PrintStatement):
         """Analyze print statement"""
-        self.analyze_expression(node.expression)
+        yield node.expression
     
     def analyze_expression(self, node: ASTNode) -> DataType:
         """
@@ -364,21 +623,7 @@ class SemanticAnalyzer:
         Returns:
             DataType of the expression
         """
-        if isinstance(node, Literal):
-            return self.analyze_literal(node)
-        elif isinstance(node, Identifier):
-            return self.analyze_identifier(node)
-        elif isinstance(node, BinaryExpression):
-            return self.analyze_binary_expression(node)
-        elif isinstance(node, UnaryExpression):
-            return self.analyze_unary_expression(node)
-        elif isinstance(node, AssignmentExpression):
-            return self.analyze_assignment_expression(node)
-        elif isinstance(node, CallExpression):
-            return self.analyze_call_expression(node)
-        else:
-            self.error(f"Unknown expression type: {type(node)}", 0, 0)
-            return DataType.ERROR
+        return self.walk(node)
     
     def analyze_literal(self, node: Literal) -> DataType:
         """Analyze literal value"""
@@ -386,7 +631,7 @@ class SemanticAnalyzer:
     
     def analyze_identifier(self, node: Identifier) -> DataType:
         """Analyze identifier"""
-        symbol = self.symbol_table.lookup_symbol(node.name)
+        node.symbol = symbol = self.lookup(node.name)
         
         if not symbol:
             self.error(
@@ -396,18 +641,20 @@ class SemanticAnalyzer:
             return DataType.ERROR
         
         # Check if variable is initialized
-        if symbol.kind == SymbolKind.VARIABLE and not symbol.is_initialized:
+        if symbol.kind == SymbolKind.VARIABLE and not self.is_initialized(symbol):
             self.error(
                 f"Variable '{node.name}' used before initialization",
                 node.line, node.column
             )
+            if symbol.scope_level == 0 and self.body_globals is not None:
+                self.body_reads.append((len(self.errors) - 1, symbol.name))
         
         return symbol.data_type
     
     def analyze_binary_expression(self, node: BinaryExpression) -> DataType:
         """Analyze binary expression"""
-        left_type = self.analyze_expression(node.left)
-        right_type = self.analyze_expression(node.right)
+        left_type = yield node.left
+        right_type = yield node.right
         
         result_type = TypeChecker.check_binary_operation(
             node.operator, left_type, right_type
@@ -425,7 +672,7 @@ class SemanticAnalyzer:
     
     def analyze_unary_expression(self, node: UnaryExpression) -> DataType:
         """Analyze unary expression"""
-        operand_type = self.analyze_expression(node.operand)
+        operand_type = yield node.operand
         
         result_type = TypeChecker.check_unary_operation(
             node.operator, operand_type
@@ -443,7 +690,7 @@ class SemanticAnalyzer:
     def analyze_assignment_expression(self, node: AssignmentExpression) -> DataType:
         """Analyze assignment expression"""
         # Look up variable
-        symbol = self.symbol_table.lookup_symbol(node.identifier)
+        node.symbol = symbol = self.lookup(node.identifier)
         
         if not symbol:
             self.error(
@@ -469,7 +716,7 @@ class SemanticAnalyzer:
             return DataType.ERROR
         
         # Analyze value
-        value_type = self.analyze_expression(node.value)
+        value_type = yield node.value
         
         # Check type compatibility
         if not TypeChecker.check_assignment(symbol.data_type, value_type):
@@ -479,14 +726,14 @@ class SemanticAnalyzer:
             )
         
         # Mark as initialized
-        self.symbol_table.mark_initialized(node.identifier)
+        self.mark_initialized(symbol)
         
         return symbol.data_type
     
     def analyze_call_expression(self, node: CallExpression) -> DataType:
         """Analyze function call"""
         # Look up function
-        symbol = self.symbol_table.lookup_symbol(node.identifier)
+        node.symbol = symbol = self.lookup(node.identifier)
         
         if not symbol:
             self.error(
@@ -506,13 +753,13 @@ class SemanticAnalyzer:
         if node.identifier in ['read', 'print']:
             # These have flexible signatures
             for arg in node.arguments:
-                self.analyze_expression(arg)
+                yield arg
             return DataType.VOID
         
         # Analyze arguments
         arg_types = []
         for arg in node.arguments:
-            arg_type = self.analyze_expression(arg)
+            arg_type = yield arg
             arg_types.append(arg_type)
         
         # Check argument count and types
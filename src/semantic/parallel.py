@@ -0,0 +1,302 @@
+"""
+Parallel semantic analysis for MinLang Compiler
+Checks function bodies in worker processes once the global declarations
+are collected
+"""
+
+import gc
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+from ..parser.ast_nodes import (
+    Program, FunctionDeclaration, Block, IfStatement, WhileStatement, ForStatement,
+    Identifier, AssignmentExpression, CallExpression, ReadStatement
+)
+from ..parser.flat_ast import LAYOUTS, NODE_CLASSES, NODE, NODES
+from ..parser.serialize import serialize, deserialize, node_kind
+from .analyzer import SemanticAnalyzer, SemanticError, BodyResult
+from .symbol_table import SymbolTable, Symbol, SymbolKind, DataType, Scope
+
+
+# Fewer function bodies than this are checked in-process
+PARALLEL_MIN_FUNCTIONS = 64
+
+# Chunks per worker, so one slow chunk does not idle the others
+CHUNKS_PER_WORKER = 4
+
+# The scopes of one function as a worker returns them: (index of the
+# parent scope, or -1 for the function's own scope, symbols) per scope,
+# in pre-order
+FlatScopes = List[Tuple[int, Dict[str, Symbol]]]
+
+# What each of bound_nodes() of a function is bound to: (index of the
+# scope in FlatScopes, or -1 for the global scope, name), or None for an
+# undefined name
+Bindings = List[Optional[Tuple[int, str]]]
+
+# Nodes whose symbol slot analysis binds
+BOUND_CLASSES = (Identifier, AssignmentExpression, CallExpression, ReadStatement)
+
+# Enum members sent between processes by index; unpickling a member by
+# value costs more than checking the code that declared it
+SYMBOL_KINDS = list(SymbolKind)
+KIND_INDEX = {kind: index for index, kind in enumerate(SYMBOL_KINDS)}
+DATA_TYPES = list(DataType)
+TYPE_INDEX = {data_type: index for index, data_type in enumerate(DATA_TYPES)}
+
+# Work for forked workers, which inherit it rather than receive a copy:
+# (symbol table class, global symbols, functions)
+_forked_work: Optional[tuple] = None
+
+
+def free_threaded() -> bool:
+    """Whether threads run Python code in parallel (a free-threaded build
+    running with the GIL disabled)"""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def scope_nodes(function: FunctionDeclaration) -> list:
+    """The function, its Blocks and its for loops, in the order analysis
+    opens their scopes (the pre-order of Scope.walk())"""
+    nodes = [function]
+    stack = [function.body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Block):
+            nodes.append(node)
+            stack.extend(reversed(node.statements))
+        elif isinstance(node, IfStatement):
+            if node.else_branch is not None:
+                stack.append(node.else_branch)
+            stack.append(node.then_branch)
+        elif isinstance(node, ForStatement):
+            nodes.append(node)
+            stack.append(node.body)
+        elif isinstance(node, WhileStatement):
+            stack.append(node.body)
+    return nodes
+
+
+def bound_nodes(function: FunctionDeclaration) -> list:
+    """The nodes of a function's body that have a symbol slot, in an
+    order that depends only on the tree"""
+    nodes = []
+    stack = [function.body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, BOUND_CLASSES):
+            nodes.append(node)
+        # A LazyBlock is laid out as the Block it parses to
+        for name, how in LAYOUTS[NODE_CLASSES[node_kind(node.__class__)]][1]:
+            if how == NODE:
+                child = getattr(node, name)
+                if child is not None:
+                    stack.append(child)
+            elif how == NODES:
+                stack.extend(getattr(node, name))
+    return nodes
+
+
+def flatten_scopes(scopes: List[Scope]) -> FlatScopes:
+    """Scope tree of one function (the result of Scope.walk()) as a flat
+    list, which pickles without recursing however deep the blocks nest"""
+    index = {id(scope): position for position, scope in enumerate(scopes)}
+    return [(index.get(id(scope.parent), -1), scope.symbols) for scope in scopes]
+
+
+def function_bindings(function: FunctionDeclaration, scopes: List[Scope]) -> Bindings:
+    """Where the symbols bound to a function's bound_nodes() live, given
+    its scopes (the result of Scope.walk())"""
+    positions = {id(symbol): position for position, scope in enumerate(scopes)
+                 for symbol in scope.symbols.values()}
+    bindings: Bindings = []
+    for node in bound_nodes(function):
+        symbol = node.symbol
+        if symbol is None:
+            bindings.append(None)
+        else:
+            bindings.append((positions.get(id(symbol), -1), symbol.name))
+    return bindings
+
+
+def attach_scopes(table: SymbolTable, function: FunctionDeclaration, flat: FlatScopes,
+                  bindings: Bindings):
+    """Rebuild a function's scope tree under the global scope of table,
+    linking each scope to its node, and bind the function's names to
+    the symbols of the rebuilt scopes"""
+    scopes: List[Scope] = []
+    for (parent, symbols), node in zip(flat, scope_nodes(function)):
+        parent_scope = scopes[parent] if parent >= 0 else table.global_scope
+        scope = Scope(parent_scope.level + 1, parent_scope, node)
+        scope.symbols = symbols
+        scopes.append(scope)
+    
+    global_symbols = table.global_scope.symbols
+    for node, binding in zip(bound_nodes(function), bindings):
+        if binding is not None:
+            position, name = binding
+            node.symbol = (scopes[position].symbols if position >= 0 else global_symbols)[name]
+
+
+def check_bodies(table_class: type, symbols: List[Symbol], functions: List[FunctionDeclaration]
+                 ) -> List[Tuple[BodyResult, FlatScopes, Bindings]]:
+    """
+    Check a chunk of function bodies (runs in a worker)
+    
+    Args:
+        table_class: Symbol table class to check them with
+        symbols: Global symbols from collect_declarations()
+        functions: Functions of the chunk
+    
+    Returns:
+        Result of check_function(), the scope tree and the bindings of
+        each function
+    """
+    analyzer = SemanticAnalyzer(table_class())
+    table = analyzer.symbol_table
+    for symbol in symbols:
+        # The new table defines the built-ins itself
+        if table.lookup_local(symbol.name) is None:
+            table.add_symbol(symbol)
+    analyzer.number_globals()
+    results = []
+    for function in functions:
+        result = analyzer.check_function(function)
+        scopes = table.global_scope.children.pop().walk()
+        results.append((result, flatten_scopes(scopes), function_bindings(function, scopes)))
+    return results
+
+
+def pack_scopes(results: List[Tuple[BodyResult, FlatScopes, Bindings]]) -> list:
+    """Replace the Symbols of check_bodies() results by plain tuples
+    (locals have no parameters or return type), which pickle cheaply"""
+    return [(result, [(parent, [(symbol.name, KIND_INDEX[symbol.kind],
+                                 TYPE_INDEX[symbol.data_type], symbol.scope_level,
+                                 symbol.is_initialized, symbol.line, symbol.column)
+                                for symbol in symbols.values()])
+                      for parent, symbols in scopes], bindings)
+            for result, scopes, bindings in results]
+
+
+def unpack_scopes(packed: list) -> List[Tuple[BodyResult, FlatScopes, Bindings]]:
+    """Rebuild the Symbols of pack_scopes() results"""
+    return [(result, [(parent, {name: Symbol(name, SYMBOL_KINDS[kind], DATA_TYPES[data_type],
+                                             level, initialized, line=line, column=column)
+                                for name, kind, data_type, level, initialized, line, column
+                                in symbols})
+                      for parent, symbols in scopes], bindings)
+            for result, scopes, bindings in packed]
+
+
+def check_forked_bodies(start: int, end: int) -> list:
+    """Check functions start to end of the inherited _forked_work (runs in
+    a forked worker); returns pack_scopes() results"""
+    table_class, symbols, functions = _forked_work
+    return pack_scopes(check_bodies(table_class, symbols, functions[start:end]))
+
+
+def check_serialized_bodies(table_class: type, symbols: List[Symbol], data: bytes) -> list:
+    """Check functions sent as a serialized Program (runs in a spawned
+    worker); unlike pickle, serialize() does not recurse into deeply
+    nested blocks. Returns pack_scopes() results."""
+    functions = deserialize(data, pause_gc=True).declarations
+    return pack_scopes(check_bodies(table_class, symbols, functions))
+
+
+def analyze_parallel(ast: Program, workers: Optional[int] = None,
+                     symbol_table: Optional[SymbolTable] = None,
+                     min_functions: int = PARALLEL_MIN_FUNCTIONS
+                     ) -> Tuple[bool, SymbolTable, List[SemanticError]]:
+    """
+    Analyze a program, spreading function bodies over processes
+    
+    SemanticAnalyzer.collect_declarations() runs in this process. The
+    function bodies are then split into contiguous chunks and checked by
+    a ProcessPoolExecutor (a ThreadPoolExecutor on a free-threaded
+    build), each worker with a copy of the global symbols, and their
+    results are merged in source order. Forked workers inherit the AST;
+    where processes cannot be forked, each chunk is sent serialized. The errors and the scope tree
+    are those of SemanticAnalyzer.analyze(), and the workers report what
+    each name was bound to, so the symbol slots of this process's AST
+    are bound to the merged scope tree's symbols as well. A FlatAST's
+    node views are always checked in this process.
+    
+    Args:
+        ast: Program AST node
+        workers: Number of workers (default: CPU count)
+        symbol_table: Empty symbol table to fill (default: a new
+            SymbolTable)
+        min_functions: Fewest function bodies worth using workers for
+    
+    Returns:
+        Tuple of (success, symbol_table, errors)
+    """
+    workers = workers or os.cpu_count() or 1
+    analyzer = SemanticAnalyzer(symbol_table)
+    functions = analyzer.collect_declarations(ast)
+    
+    if (workers < 2 or len(functions) < min_functions
+            or any(type(function) is not FunctionDeclaration for function, _ in functions)):
+        for function, errors in functions:
+            analyzer.merge_function(errors, analyzer.check_function(function))
+        return analyzer.finish(), analyzer.symbol_table, analyzer.errors
+    
+    # Contiguous chunks of equal numbers of functions
+    count = min(len(functions), workers * CHUNKS_PER_WORKER)
+    bounds = [len(functions) * index // count for index in range(count + 1)]
+    table = analyzer.symbol_table
+    work = (table.__class__, list(table.global_scope.symbols.values()),
+            [function for function, _ in functions])
+    results = check_chunks(work, bounds, min(workers, count))
+    
+    for (function, errors), (result, scopes, bindings) in zip(functions, results):
+        analyzer.merge_function(errors, result)
+        attach_scopes(table, function, scopes, bindings)
+    return analyzer.finish(), table, analyzer.errors
+
+
+def check_chunks(work: tuple, bounds: List[int],
+                 workers: int) -> List[Tuple[BodyResult, FlatScopes, Bindings]]:
+    """
+    Check the chunks of functions bounds[i] to bounds[i + 1] in workers
+    
+    Args:
+        work: (symbol table class, global symbols, functions)
+        bounds: Chunk boundaries, from 0 to the number of functions
+        workers: Number of workers
+    
+    Returns:
+        check_bodies() result of each function, in order
+    """
+    global _forked_work
+    table_class, symbols, functions = work
+    starts, ends = bounds[:-1], bounds[1:]
+    if free_threaded():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(check_bodies, repeat(table_class), repeat(symbols),
+                                  [functions[start:end] for start, end in zip(starts, ends)])
+            return [result for chunk in chunks for result in chunk]
+    
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # Frozen objects are left alone by the workers' garbage
+        # collections, which would otherwise write to every page of the
+        # inherited AST and so copy it
+        _forked_work = work
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork')) as executor:
+                chunks = executor.map(check_forked_bodies, starts, ends)
+                return [result for chunk in chunks for result in unpack_scopes(chunk)]
+        finally:
+            gc.unfreeze()
+            _forked_work = None
+    
+    parts = [serialize(Program(functions[start:end])) for start, end in zip(starts, ends)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(check_serialized_bodies, repeat(table_class), repeat(symbols), parts)
+        return [result for chunk in chunks for result in unpack_scopes(chunk)]
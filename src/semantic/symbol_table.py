@@ -3,9 +3,18 @@ Symbol Table for MinLang Compiler
 Manages scopes, symbols, and type information
 """
 
+import sys
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
+from ..parser.ast_nodes import Block, FunctionDeclaration, ForStatement
+
+# A source position as (line, column); tuples compare in source order
+Position = Tuple[int, int]
+
+# Span of the global scope: the whole source
+WHOLE_SOURCE = ((0, 0), (sys.maxsize, sys.maxsize))
 
 
 class SymbolKind(Enum):
@@ -28,14 +37,10 @@ class DataType(Enum):
     @classmethod
     def from_string(cls, type_str: str) -> 'DataType':
         """Convert string to DataType"""
-        type_map = {
-            'int': cls.INT,
-            'float': cls.FLOAT,
-            'bool': cls.BOOL,
-            'char': cls.CHAR,
-            'void': cls.VOID,
-        }
-        return type_map.get(type_str.lower(), cls.ERROR)
+        data_type = TYPE_NAMES.get(type_str)
+        if data_type is None:
+            data_type = TYPE_NAMES.get(type_str.lower(), cls.ERROR)
+        return data_type
     
     def is_numeric(self) -> bool:
         """Check if type is numeric"""
@@ -51,6 +56,16 @@ class DataType(Enum):
         return False
 
 
+# Type names of the source language, as written
+TYPE_NAMES: Dict[str, DataType] = {
+    'int': DataType.INT,
+    'float': DataType.FLOAT,
+    'bool': DataType.BOOL,
+    'char': DataType.CHAR,
+    'void': DataType.VOID,
+}
+
+
 @dataclass
 class Symbol:
     """
@@ -88,16 +103,42 @@ class Scope:
     """
     Represents a single scope in the program
     
+    Scopes form a tree that outlives analysis: a scope stays among its
+    parent's children after it is exited.
+    
     Attributes:
         level: Scope nesting level (0 = global)
         symbols: Dictionary of symbols in this scope
         parent: Parent scope (None for global scope)
+        children: Nested scopes, in the order they were entered
+        node: AST node that opened the scope (FunctionDeclaration for
+            the parameters, Block for a block, ForStatement for a for
+            loop's header), or None
     """
     
-    def __init__(self, level: int, parent: Optional['Scope'] = None):
+    def __init__(self, level: int, parent: Optional['Scope'] = None, node: Any = None):
         self.level = level
         self.symbols: Dict[str, Symbol] = {}
         self.parent = parent
+        self.children: List['Scope'] = []
+        self.node = node
+        if parent is not None:
+            parent.children.append(self)
+    
+    @property
+    def span(self) -> Optional[Tuple[Position, Position]]:
+        """First and last source positions of the scope, both inclusive,
+        or None if it has no node with a recorded position"""
+        node = self.node
+        if isinstance(node, (Block, ForStatement)):
+            end = node
+        elif isinstance(node, FunctionDeclaration):
+            end = node.body
+        else:
+            return WHOLE_SOURCE if self.parent is None else None
+        if not node.line:
+            return None
+        return (node.line, node.column), (end.end_line, end.end_column)
     
     def define(self, symbol: Symbol) -> bool:
         """
@@ -136,18 +177,142 @@ class Scope:
         Returns:
             Symbol if found, None otherwise
         """
-        symbol = self.symbols.get(name)
-        if symbol is not None:
-            return symbol
-        if self.parent is not None:
-            return self.parent.lookup(name)
+        # A loop rather than recursion: block nesting in generated code
+        # can be deeper than the recursion limit
+        scope = self
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
         return None
     
+    def walk(self) -> List['Scope']:
+        """This scope and all scopes nested in it, in pre-order"""
+        scopes = []
+        stack = [self]
+        while stack:
+            scope = stack.pop()
+            scopes.append(scope)
+            stack.extend(reversed(scope.children))
+        return scopes
+    
     def __repr__(self) -> str:
         symbols_str = ', '.join(self.symbols.keys())
         return f"Scope(level={self.level}, symbols=[{symbols_str}])"
 
 
+def declared_by(symbol: Symbol, position: Position) -> bool:
+    """Whether a symbol is in scope at a position of its scope: a
+    function anywhere, as the analyzer checks bodies after collecting
+    every signature; anything else from its declaration on"""
+    return symbol.kind == SymbolKind.FUNCTION or (symbol.line, symbol.column) <= position
+
+
+class ScopeIndex:
+    """
+    Interval index answering which symbols are visible at a position
+    
+    Scope spans nest, so their boundaries cut the source into segments
+    that each lie in one innermost scope. The index keeps the segment
+    starts sorted, and scope_at() finds a position's segment by binary
+    search. Scopes without a span (entered without a node) are left out.
+    
+    Attributes:
+        root: Global scope of the tree
+        starts: First position of each segment, ascending
+        owners: Innermost scope of each segment
+    """
+    
+    def __init__(self, root: Scope):
+        self.root = root
+        self.starts: List[Position] = []
+        self.owners: List[Scope] = []
+        self._add_segment((0, 0), root)
+        stack = [(root, iter(root.children))]
+        while stack:
+            scope, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    # The parent resumes right after the child's last position
+                    line, column = scope.span[1]
+                    self._add_segment((line, column + 1), stack[-1][0])
+                continue
+            span = child.span
+            if span is not None:
+                self._add_segment(span[0], child)
+                stack.append((child, iter(child.children)))
+    
+    def _add_segment(self, start: Position, scope: Scope):
+        """Start a segment; it replaces an empty one at the same start"""
+        if self.starts and self.starts[-1] >= start:
+            self.owners[-1] = scope
+        else:
+            self.starts.append(start)
+            self.owners.append(scope)
+    
+    def scope_at(self, line: int, column: int) -> Scope:
+        """
+        Innermost scope enclosing a position
+        
+        Args:
+            line: Source line
+            column: Source column
+            
+        Returns:
+            The scope (the global scope outside every other one)
+        """
+        return self.owners[bisect_right(self.starts, (line, column)) - 1]
+    
+    def lookup(self, name: str, line: int, column: int) -> Optional[Symbol]:
+        """
+        Look up the symbol a name refers to at a position
+        
+        Args:
+            name: Symbol name
+            line: Source line
+            column: Source column
+            
+        Returns:
+            Symbol if one is declared by then in an enclosing scope (or
+            is a function, which can be called before its definition),
+            None otherwise
+        """
+        position = (line, column)
+        scope = self.scope_at(line, column)
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None and declared_by(symbol, position):
+                return symbol
+            scope = scope.parent
+        return None
+    
+    def visible_symbols(self, line: int, column: int) -> Dict[str, Symbol]:
+        """
+        All symbols visible at a position
+        
+        Args:
+            line: Source line
+            column: Source column
+            
+        Returns:
+            Dictionary of name to symbol, inner declarations shadowing
+            outer ones; variables declared after the position are left
+            out, functions are not
+        """
+        position = (line, column)
+        visible: Dict[str, Symbol] = {}
+        scope = self.scope_at(line, column)
+        while scope is not None:
+            for name, symbol in scope.symbols.items():
+                if name not in visible and declared_by(symbol, position):
+                    visible[name] = symbol
+            scope = scope.parent
+        return visible
+
+
 class SymbolTable:
     """
     Symbol table with scope management
@@ -165,38 +330,37 @@ class SymbolTable:
     def _initialize_built_ins(self):
         """Initialize built-in functions"""
         # read() function - void read(identifier)
-        read_symbol = Symbol(
+        self.define_symbol(
             name="read",
             kind=SymbolKind.FUNCTION,
             data_type=DataType.VOID,
-            scope_level=0,
-            is_initialized=True,
             parameters=[],  # Takes identifier, handled specially
             return_type=DataType.VOID
         )
-        self.global_scope.define(read_symbol)
         
         # print() function - void print(any)
-        print_symbol = Symbol(
+        self.define_symbol(
             name="print",
             kind=SymbolKind.FUNCTION,
             data_type=DataType.VOID,
-            scope_level=0,
-            is_initialized=True,
             parameters=[],  # Takes any type
             return_type=DataType.VOID
         )
-        self.global_scope.define(print_symbol)
     
-    def enter_scope(self):
-        """Enter a new scope (e.g., function body, block)"""
+    def enter_scope(self, node: Any = None):
+        """
+        Enter a new scope (e.g., function body, block)
+        
+        Args:
+            node: AST node that opens the scope, which gives it its span
+        """
         new_level = self.current_scope.level + 1
-        new_scope = Scope(level=new_level, parent=self.current_scope)
+        new_scope = Scope(level=new_level, parent=self.current_scope, node=node)
         self.scope_stack.append(new_scope)
         self.current_scope = new_scope
     
     def exit_scope(self):
-        """Exit the current scope"""
+        """Exit the current scope; it stays in the scope tree"""
         if len(self.scope_stack) <= 1:
             raise RuntimeError("Cannot exit global scope")
         self.scope_stack.pop()
@@ -232,6 +396,18 @@ class SymbolTable:
             line=line,
             column=column
         )
+        return self.add_symbol(symbol)
+    
+    def add_symbol(self, symbol: Symbol) -> bool:
+        """
+        Add an existing symbol to the current scope
+        
+        Args:
+            symbol: Symbol to add, e.g. one copied from another table
+            
+        Returns:
+            True if successful, False if already defined in current scope
+        """
         return self.current_scope.define(symbol)
     
     def lookup_symbol(self, name: str) -> Optional[Symbol]:
@@ -287,26 +463,202 @@ class SymbolTable:
         return self.current_scope.level
     
     def get_all_symbols(self) -> List[Symbol]:
-        """Get all symbols from all scopes"""
+        """Get all symbols from all scopes, exited ones included"""
         symbols = []
-        for scope in self.scope_stack:
+        for scope in self.global_scope.walk():
             symbols.extend(scope.symbols.values())
         return symbols
     
+    def scope_index(self) -> ScopeIndex:
+        """
+        Index the scope tree by source position
+        
+        Returns:
+            ScopeIndex over every scope entered so far
+        """
+        return ScopeIndex(self.global_scope)
+    
     def print_table(self):
         """Print the symbol table (for debugging)"""
         print("\n=== SYMBOL TABLE ===")
-        for scope in self.scope_stack:
-            print(f"\nScope Level {scope.level}:")
+        for scope in self.global_scope.walk():
+            indent = "  " * scope.level
+            span = scope.span if scope.parent else None
+            where = f" at {span[0][0]}:{span[0][1]}-{span[1][0]}:{span[1][1]}" if span else ""
+            print(f"\n{indent}Scope Level {scope.level}{where}:")
             for name, symbol in scope.symbols.items():
                 init_status = "✓" if symbol.is_initialized else "✗"
-                print(f"  [{init_status}] {symbol}")
+                print(f"{indent}  [{init_status}] {symbol}")
         print("=" * 20 + "\n")
 
 
+class FlatSymbolTable(SymbolTable):
+    """
+    Symbol table that keeps every visible symbol in one dict
+    
+    Each name maps to a stack of the symbols declared with it, innermost
+    last. lookup_symbol reads the top of one stack, and exit_scope pops
+    the exited scope's own symbols off their stacks, so no operation
+    depends on the nesting depth (a SymbolTable walks the scope chain on
+    every lookup that does not hit the innermost scope). The scopes and
+    the scope tree are kept exactly as in a SymbolTable.
+    """
+    
+    def __init__(self):
+        """Initialize with global scope"""
+        self.bindings: Dict[str, List[Symbol]] = {}
+        super().__init__()
+    
+    def exit_scope(self):
+        """Exit the current scope; it stays in the scope tree"""
+        if len(self.scope_stack) <= 1:
+            raise RuntimeError("Cannot exit global scope")
+        bindings = self.bindings
+        for name in self.current_scope.symbols:
+            shadowed = bindings[name]
+            shadowed.pop()
+            if not shadowed:
+                del bindings[name]
+        super().exit_scope()
+    
+    def add_symbol(self, symbol: Symbol) -> bool:
+        """
+        Add an existing symbol to the current scope
+        
+        Args:
+            symbol: Symbol to add, e.g. one copied from another table
+            
+        Returns:
+            True if successful, False if already defined in current scope
+        """
+        if not super().add_symbol(symbol):
+            return False
+        self.bindings.setdefault(symbol.name, []).append(symbol)
+        return True
+    
+    def lookup_symbol(self, name: str) -> Optional[Symbol]:
+        """
+        Look up a symbol in current and parent scopes
+        
+        Args:
+            name: Symbol name
+            
+        Returns:
+            Symbol if found, None otherwise
+        """
+        shadowed = self.bindings.get(name)
+        return shadowed[-1] if shadowed else None
+
+
+# Operator groups of the typing rules
+ARITHMETIC_OPERATORS = ('+', '-', '*', '/', '%')
+RELATIONAL_OPERATORS = ('<', '>', '<=', '>=')
+EQUALITY_OPERATORS = ('==', '!=')
+LOGICAL_OPERATORS = ('&&', '||')
+UNARY_OPERATORS = ('-', '!')
+
+
+def binary_rule(op: str, left_type: DataType, right_type: DataType) -> Optional[DataType]:
+    """
+    Typing rule of a binary operation (BINARY_RESULTS is built from it)
+    
+    Args:
+        op: Operator (+, -, *, /, etc.)
+        left_type: Left operand type
+        right_type: Right operand type
+        
+    Returns:
+        Result type if valid, None if invalid
+    """
+    # Arithmetic operators: +, -, *, /, %
+    if op in ARITHMETIC_OPERATORS:
+        if left_type.is_numeric() and right_type.is_numeric():
+            # If either is float, result is float
+            if left_type == DataType.FLOAT or right_type == DataType.FLOAT:
+                return DataType.FLOAT
+            return DataType.INT
+        return None
+    
+    # Relational operators: <, >, <=, >=
+    elif op in RELATIONAL_OPERATORS:
+        if left_type.is_numeric() and right_type.is_numeric():
+            return DataType.BOOL
+        return None
+    
+    # Equality operators: ==, !=
+    elif op in EQUALITY_OPERATORS:
+        if left_type.is_compatible_with(right_type):
+            return DataType.BOOL
+        return None
+    
+    # Logical operators: &&, ||
+    elif op in LOGICAL_OPERATORS:
+        if left_type == DataType.BOOL and right_type == DataType.BOOL:
+            return DataType.BOOL
+        return None
+    
+    return None
+
+
+def unary_rule(op: str, operand_type: DataType) -> Optional[DataType]:
+    """
+    Typing rule of a unary operation (UNARY_RESULTS is built from it)
+    
+    Args:
+        op: Operator (-, !)
+        operand_type: Operand type
+        
+    Returns:
+        Result type if valid, None if invalid
+    """
+    # Unary minus
+    if op == '-':
+        if operand_type.is_numeric():
+            return operand_type
+        return None
+    
+    # Logical NOT
+    elif op == '!':
+        if operand_type == DataType.BOOL:
+            return DataType.BOOL
+        return None
+    
+    return None
+
+
+# The rules above evaluated once for every operator and operand types.
+# A combination missing from a table is invalid, so typing an
+# expression is a single dict lookup.
+BINARY_RESULTS: Dict[Tuple[str, DataType, DataType], DataType] = {
+    (op, left, right): result
+    for op in ARITHMETIC_OPERATORS + RELATIONAL_OPERATORS + EQUALITY_OPERATORS + LOGICAL_OPERATORS
+    for left in DataType
+    for right in DataType
+    if (result := binary_rule(op, left, right)) is not None
+}
+UNARY_RESULTS: Dict[Tuple[str, DataType], DataType] = {
+    (op, operand): result
+    for op in UNARY_OPERATORS
+    for operand in DataType
+    if (result := unary_rule(op, operand)) is not None
+}
+
+# (target, value) pairs for which a value may be assigned or passed as
+# an argument: the same type, or two numeric types
+COMPATIBLE_TYPES = frozenset(
+    (target, value)
+    for target in DataType
+    for value in DataType
+    if target.is_compatible_with(value)
+)
+
+
 class TypeChecker:
     """
     Helper class for type checking operations
+    
+    Every check reads the tables precomputed from the typing rules
+    (BINARY_RESULTS, UNARY_RESULTS, COMPATIBLE_TYPES).
     """
     
     @staticmethod
@@ -323,34 +675,7 @@ class TypeChecker:
         Returns:
             Result type if valid, None if invalid
         """
-        # Arithmetic operators: +, -, *, /, %
-        if op in ['+', '-', '*', '/', '%']:
-            if left_type.is_numeric() and right_type.is_numeric():
-                # If either is float, result is float
-                if left_type == DataType.FLOAT or right_type == DataType.FLOAT:
-                    return DataType.FLOAT
-                return DataType.INT
-            return None
-        
-        # Relational operators: <, >, <=, >=
-        elif op in ['<', '>', '<=', '>=']:
-            if left_type.is_numeric() and right_type.is_numeric():
-                return DataType.BOOL
-            return None
-        
-        # Equality operators: ==, !=
-        elif op in ['==', '!=']:
-            if left_type.is_compatible_with(right_type):
-                return DataType.BOOL
-            return None
-        
-        # Logical operators: &&, ||
-        elif op in ['&&', '||']:
-            if left_type == DataType.BOOL and right_type == DataType.BOOL:
-                return DataType.BOOL
-            return None
-        
-        return None
+        return BINARY_RESULTS.get((op, left_type, right_type))
     
     @staticmethod
     def check_unary_operation(op: str, operand_type: DataType) -> Optional[DataType]:
@@ -364,19 +689,7 @@ class TypeChecker:
         Returns:
             Result type if valid, None if invalid
         """
-        # Unary minus
-        if op == '-':
-            if operand_type.is_numeric():
-                return operand_type
-            return None
-        
-        # Logical NOT
-        elif op == '!':
-            if operand_type == DataType.BOOL:
-                return DataType.BOOL
-            return None
-        
-        return None
+        return UNARY_RESULTS.get((op, operand_type))
     
     @staticmethod
     def check_assignment(var_type: DataType, value_type: DataType) -> bool:
@@ -390,15 +703,7 @@ class TypeChecker:
         Returns:
             True if valid, False otherwise
         """
-        # Exact match
-        if var_type == value_type:
-            return True
-        
-        # Numeric types are compatible
-        if var_type.is_numeric() and value_type.is_numeric():
-            return True
-        
-        return False
+        return (var_type, value_type) in COMPATIBLE_TYPES
     
     @staticmethod
     def check_function_call(func_params: List[DataType], 
@@ -415,12 +720,7 @@ class TypeChecker:
         """
         if len(func_params) != len(call_args):
             return False
-        
-        for param_type, arg_type in zip(func_params, call_args):
-            if not param_type.is_compatible_with(arg_type):
-                return False
-        
-        return True
+        return COMPATIBLE_TYPES.issuperset(zip(func_params, call_args))
     
     @staticmethod
     def get_literal_type(literal_type_str: str) -> DataType:
@@ -3,5 +3,6 @@ Utilities Package for MinLang Compiler
 """
 
 from .error_handler import CompilerError, ErrorHandler
+from .trampoline import trampoline
 
-__all__ = ['CompilerError', 'ErrorHandler']
+__all__ = ['CompilerError', 'ErrorHandler', 'trampoline']
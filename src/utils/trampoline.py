@@ -0,0 +1,47 @@
+"""
+Recursion-free tree walking for MinLang Compiler
+Runs visitors written as generators on an explicit stack
+"""
+
+from types import GeneratorType
+from typing import Any, Callable
+
+
+def trampoline(root: Any, visit: Callable[[Any], Any]) -> Any:
+    """
+    Run a tree walk without growing the Python call stack
+
+    A visitor for a node with children is a generator: it yields each
+    child it needs (a node, or a generator for a sub-step) and receives
+    that child's result back from the yield; its return value is its own
+    result. Visitors for leaf nodes may simply return their result.
+    Nesting depth is therefore limited only by memory.
+
+    Args:
+        root: Node or generator to run
+        visit: Maps a node to its result or to a generator producing it
+
+    Returns:
+        Result of the root
+    """
+    result = root if type(root) is GeneratorType else visit(root)
+    if type(result) is not GeneratorType:
+        return result
+
+    stack = [result]
+    result = None
+    while stack:
+        try:
+            child = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+            continue
+        if type(child) is not GeneratorType:
+            child = visit(child)
+        if type(child) is GeneratorType:
+            stack.append(child)
+            result = None
+        else:
+            result = child
+    return result
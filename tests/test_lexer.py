@@ -1,7 +1,14 @@
 """Unit tests for the Lexer"""
 
+import glob
+import pickle
+import random
 import pytest
-from src.lexer import Lexer, TokenType, LexerError
+from src.lexer import Lexer, Token, TokenType, LexerError, Tokenizer
+from src.lexer.lexer import LEXER_ENGINES, scan_bytes, tokenize_file
+from src.lexer.parallel import find_split_points, tokenize_file_parallel
+from src.lexer.incremental import Edit, IncrementalLexer
+from src.lexer.token import ByteLineIndex, LineIndex, NameTable, KEYWORDS
 
 
 def test_keywords():
@@ -120,5 +127,317 @@ def test_simple_program():
     assert TokenType.RETURN in token_types
 
 
+
+def test_long_lexemes():
+    """Long identifiers and strings are lexed from single slices"""
+    name = 'v' * 5000
+    text = 'abc ' * 5000
+    source = f'{name} "{text}" "{text}\\t{text}\\"" 123456789.25'
+    tokens = Lexer(source).tokenize()
+    
+    assert tokens[0].value == name
+    assert tokens[1].value == text
+    assert tokens[2].value == text + '\t' + text + '"'
+    assert tokens[3].value == 123456789.25
+    assert tokens[3].column == len(source) - len('123456789.25') + 1
+
+
+def test_positions_resolve_from_offsets():
+    """Token line/column are computed from the offset on demand"""
+    source = "int x;\n\n  /* a\n b */ y = 'c';\n"
+    tokens = Lexer(source).tokenize()
+    
+    y = tokens[3]
+    assert y.value == 'y'
+    assert y.offset == source.index('y')
+    assert (y.line, y.column) == (4, 7)
+    assert (tokens[-1].line, tokens[-1].column) == (5, 1)
+
+
+def test_line_index():
+    """LineIndex maps offsets to 1-indexed line and column"""
+    index = LineIndex("ab\ncd\n\ne")
+    
+    assert index.position(0) == (1, 1)
+    assert index.position(2) == (1, 3)
+    assert index.position(3) == (2, 1)
+    assert index.position(6) == (3, 1)
+    assert index.position(8) == (4, 2)
+
+
+def lex_outcome(source, engine):
+    """Token stream or error message produced by the given engine"""
+    try:
+        return [(t.type, t.value, t.line, t.column)
+                for t in Lexer(source, engine=engine).tokenize()]
+    except LexerError as e:
+        return str(e)
+
+
+@pytest.mark.parametrize('source', [
+    '"a\\nb\\"c" \'x\' \'\\n\' \'\n\' 1.5 x1 _y',
+    'x\n/* a\nb */ y\n\tz // tail',
+    '/**/ a <= b && c || !d != e',
+    '1.', '1..2', '1.5.3', '.5', '/* open', '/*/', '"open', '"a\nb"',
+    '"\\q"', "''", "'ab'", "'\\q'", '&', 'a | b', 'int x @ y;',
+] + sorted(glob.glob('examples/*')))
+def test_regex_engine_matches_char_engine(source):
+    """Regex engine produces the same tokens and errors as the char engine"""
+    if source.startswith('examples/'):
+        with open(source) as f:
+            source = f.read()
+    assert lex_outcome(source, 'regex') == lex_outcome(source, 'char')
+
+
+def test_regex_engine_random_sources():
+    """Differential check of both engines over random character soup"""
+    alphabet = 'ab1_ \n\t"\'\\/*.+-<>=!&|;(){}[]@'
+    rng = random.Random(1234)
+    for _ in range(2000):
+        source = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        assert lex_outcome(source, 'regex') == lex_outcome(source, 'char'), source
+
+
+def test_unknown_engine():
+    """Unknown engine names are rejected"""
+    with pytest.raises(ValueError):
+        Lexer("int x;", engine='bogus')
+
+
+def test_token_buffer_round_trip():
+    """TokenBuffer yields the same tokens as the lexer"""
+    source = 'int x = 1; float y = 1.0; bool b = true; x = x + 1;\nprint("hi", \'c\');'
+    tokens = Lexer(source).tokenize()
+    buffer = Lexer(source).tokenize_buffer()
+    assert len(buffer) == len(tokens)
+    assert list(buffer) == tokens
+    assert buffer[-1].type == TokenType.EOF
+    assert [buffer[i] for i in range(len(buffer))] == tokens
+    # 1, 1.0 and True stay distinct in the value pool
+    assert buffer.value_at(3) == 1 and type(buffer.value_at(3)) is int
+    assert type(buffer.value_at(8)) is float
+    assert buffer.value_at(13) is True
+    # Repeated identifiers share one pool entry
+    assert buffer.values.count('x') == 1
+
+
+def test_token_buffer_is_compact():
+    """Per-token storage is a few bytes, not an object per token"""
+    buffer = Lexer('x = y + 1; ' * 100).tokenize_buffer()
+    assert buffer.nbytes() == 9 * len(buffer)
+    assert len(buffer.values) == 3
+
+
+def test_token_buffer_slice():
+    """A slice holds only its own values and line starts"""
+    source = 'int a = 1;\nint b = 2;\nint c = 3;\nint d = 4;\n'
+    buffer = Lexer(source).tokenize_buffer()
+    part = buffer.slice(5, 15)
+    assert list(part) == list(buffer)[5:15]
+    assert part.values == ['b', 2, 'c', 3]
+    assert part.lines.starts == buffer.lines.starts[1:3]
+    assert len(pickle.dumps(part)) < len(pickle.dumps(buffer))
+
+
+def test_byte_line_index_section():
+    """A section resolves its lines like the whole index"""
+    data = 'ab\néé x\nz\nü y'.encode('utf-8')
+    index = ByteLineIndex(data)
+    section = index.section(data.index(b'x'), data.index(b'y'))
+    assert section.wide_lines.keys() == {2, 4}
+    for name in b'xzy':
+        offset = data.index(bytes([name]))
+        assert section.position(offset) == index.position(offset)
+        assert section.section(offset, offset).position(offset) == index.position(offset)
+
+
+def test_extended_escapes():
+    """\\r and \\0 escapes are accepted by both engines"""
+    source = "'\\r' '\\0' \"a\\rb\\0\""
+    for engine in LEXER_ENGINES:
+        tokens = Lexer(source, engine).tokenize()
+        assert [t.value for t in tokens[:3]] == ['\r', '\0', 'a\rb\0']
+
+
+def test_tokenizer_front_end():
+    """Tokenizer is a Lexer that records the file name"""
+    from src.lexer import Tokenizer, tokenize
+    from src.lexer import token_types
+    
+    tokens = tokenize("f(x);", "prog.min")
+    assert tokens == Lexer("f(x);", filename="prog.min").tokenize()
+    assert all(t.file == "prog.min" for t in tokens)
+    assert tokens[1].type is token_types.TokenType.LEFT_PAREN
+    assert TokenType.LEFT_PAREN is TokenType.LPAREN
+    assert token_types.Token is Token
+    assert isinstance(Tokenizer("x"), Lexer)
+    assert str(tokens[0]) == "<IDENTIFIER: 'f'>"
+    assert str(tokens[-1]) == "<EOF>"
+
+
+def test_print_tokens_format(capsys):
+    """Token listings show each token's position"""
+    tokenizer = Tokenizer("int x;\nx = 1;")
+    tokenizer.tokenize()
+    tokenizer.print_tokens()
+    assert capsys.readouterr().out.splitlines()[:4] == [
+        "   0: Token(INT, 'int', 1:1)",
+        "   1: Token(IDENTIFIER, 'x', 1:5)",
+        "   2: Token(SEMICOLON, 1:6)",
+        "   3: Token(IDENTIFIER, 'x', 2:1)",
+    ]
+
+
+def bytes_outcome(source):
+    """Token tuples or error text from lexing source as UTF-8 bytes"""
+    try:
+        return [(t.type, t.value, t.line, t.column)
+                for t in scan_bytes(source.encode('utf-8'))]
+    except LexerError as e:
+        return str(e)
+
+
+@pytest.mark.parametrize('source', [
+    'int x = 1;', 'é = "ü\\n";\n  \'ü\' ab€', '1٣ x', "''", '"abc',
+    'x\n  @', '/* é */ y // ü', "'😀' '\\r'",
+] + sorted(glob.glob('examples/*')))
+def test_bytes_mode_matches_char_engine(source):
+    """Bytes mode produces the same tokens and errors as the char engine"""
+    if source.startswith('examples/'):
+        with open(source) as f:
+            source = f.read()
+    assert bytes_outcome(source) == lex_outcome(source, 'char')
+
+
+def test_tokenize_file_mmap(tmp_path):
+    """tokenize_file(mmap=True) lexes the mapped file"""
+    path = tmp_path / "prog.min"
+    path.write_text('char c = \'é\';\nint x = 42;', encoding='utf-8')
+    tokens = tokenize_file(str(path), mmap=True)
+    assert tokens == tokenize_file(str(path))
+    assert tokens[3].value == 'é'
+    assert tokens[8].offset == len('char c = \'é\';\nint x = '.encode('utf-8'))
+    
+    empty = tmp_path / "empty.min"
+    empty.write_bytes(b'')
+    assert [t.type for t in tokenize_file(str(empty), mmap=True)] == [TokenType.EOF]
+
+
+def test_byte_line_index():
+    """Byte offsets resolve to character columns"""
+    data = 'ab\néé x\nz'.encode('utf-8')
+    index = ByteLineIndex(data)
+    assert index.position(0) == (1, 1)
+    assert index.position(data.index(b'x')) == (2, 4)
+    assert index.position(data.index(b'z')) == (3, 1)
+    assert pickle.loads(pickle.dumps(index)).position(data.index(b'x')) == (2, 4)
+
+
+def test_identifiers_are_interned():
+    """Each distinct name is one shared object with a stable id"""
+    source = "int count = 0; count = count + other; int other;"
+    for engine in LEXER_ENGINES:
+        lexer = Lexer(source, engine)
+        tokens = lexer.tokenize()
+        names = [t.value for t in tokens if t.type == TokenType.IDENTIFIER]
+        assert names == ['count', 'count', 'count', 'other', 'other']
+        assert names[0] is names[1] is names[2]
+        assert lexer.name_table.names == ['count', 'other']
+        assert lexer.name_table.ids == {'count': 0, 'other': 1}
+        assert tokens[0].value is next(k for k in KEYWORDS if k == 'int')
+    
+    bytes_tokens = list(scan_bytes(source.encode()))
+    assert bytes_tokens[1].value is bytes_tokens[5].value
+
+
+def test_shared_name_table():
+    """Lexers sharing a NameTable number names program-wide"""
+    table = NameTable()
+    Lexer("a b", name_table=table).tokenize()
+    Lexer("c a", engine='regex', name_table=table).tokenize()
+    assert table.ids == {'a': 0, 'b': 1, 'c': 2}
+
+
+PARALLEL_SOURCE = """int a = 1; /* block
+comment */ char c = '
+';
+string s = "x // not a comment";
+// line comment "
+float f = 2.5; /* x */ char q = '/';
+int é = a + 2;
+"""
+
+
+def test_split_points_are_token_boundaries():
+    """Lexing split chunks separately gives the serial token stream"""
+    data = PARALLEL_SOURCE.encode('utf-8')
+    serial = [(t.type, t.value, t.offset) for t in scan_bytes(data)][:-1]
+    points = find_split_points(data, list(range(0, len(data), 3)))
+    assert points == sorted(set(points))
+    assert all(data[p - 1:p] == b'\n' for p in points)
+    # Newlines inside the block comment and char literal are never used
+    assert data.index(b'comment') not in points
+    assert data.index(b"';") not in points
+    
+    chunked = []
+    for start, end in zip([0] + points, points + [len(data)]):
+        chunked += [(t.type, t.value, t.offset + start)
+                    for t in scan_bytes(data[start:end])][:-1]
+    assert chunked == serial
+
+
+def test_tokenize_file_parallel(tmp_path):
+    """Parallel lexing matches the serial lexer, including errors"""
+    path = tmp_path / "big.min"
+    path.write_text(PARALLEL_SOURCE * 20, encoding='utf-8')
+    tokens = tokenize_file_parallel(str(path), workers=3, min_chunk=1)
+    assert list(tokens) == tokenize_file(str(path), mmap=True)
+    
+    path.write_text(PARALLEL_SOURCE * 10 + "int x = 1 @ 2;\n" + PARALLEL_SOURCE * 10,
+                    encoding='utf-8')
+    with pytest.raises(LexerError) as serial:
+        tokenize_file(str(path))
+    with pytest.raises(LexerError) as parallel:
+        tokenize_file_parallel(str(path), workers=3, min_chunk=1)
+    assert str(parallel.value) == str(serial.value)
+
+
+def test_line_index_apply_edit():
+    """Editing the line index matches rebuilding it"""
+    source = "ab\ncd\nef\ngh"
+    index = LineIndex(source)
+    index.apply_edit(4, 4, "X\nY\nZ")
+    assert index.starts == LineIndex(source[:4] + "X\nY\nZ" + source[8:]).starts
+
+
+def test_incremental_relex():
+    """Re-lexing an edit only replaces the affected tokens"""
+    source = "int total = 0;\nint count = 1;\nint limit = 10;\n"
+    inc = IncrementalLexer(source)
+    tail = inc.tokens[-5]
+    
+    # Rename count -> counter: one token replaced
+    edit = Edit(source.index("count") + 5, 0, "er")
+    assert inc.relex(edit) == (6, 1, 1)
+    assert inc.tokens == Lexer(inc.source).tokenize()
+    assert inc.tokens[6].value == "counter"
+    # Tokens after the edit are reused and moved
+    assert inc.tokens[-5] is tail and (tail.line, tail.column) == (3, 5)
+    
+    # Opening a comment swallows the rest of the line
+    inc.relex(Edit(inc.source.index("int count"), 0, "// "))
+    assert inc.tokens == Lexer(inc.source).tokenize()
+
+
+def test_incremental_relex_error_recovery():
+    """After a lexer error the next edit re-lexes the whole buffer"""
+    inc = IncrementalLexer("int x = 1;")
+    with pytest.raises(LexerError):
+        inc.relex(Edit(8, 0, "@"))
+    assert inc.tokens is None
+    inc.relex(Edit(8, 1, ""))
+    assert inc.tokens == Lexer("int x = 1;").tokenize()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
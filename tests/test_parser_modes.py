@@ -0,0 +1,534 @@
+"""
+Tests for the Parser's input and construction modes
+Each mode must build the same AST as the default parser
+"""
+
+import gc
+import pickle
+import pytest
+from src.lexer import Lexer, Token, Edit, IncrementalLexer
+from src.parser import Parser, ParserError, FlatAST, LazyBlock, parse_string, parse_parallel
+from src.parser import serialize, deserialize, ASTFormatError
+from src.parser.ast_nodes import *
+from src.semantic import SemanticAnalyzer
+from src.codegen import generate_tac, format_tac_output
+
+
+PROGRAM = """
+int limit = 10;
+
+int square(int n) {
+    return n * n;
+}
+
+int main() {
+    int total = 0;
+    int i = 0;
+    while (i < limit) {
+        if (i % 2 == 0 && !(i == 4)) {
+            total = total + square(i);
+        } else {
+            total = total - -i;
+        }
+        i = i + 1;
+    }
+    return total;
+}
+"""
+
+
+def parse_list(source):
+    """Parse from a fully materialized token list"""
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+class TestStreaming:
+    """Parsing straight from a token iterator"""
+    
+    def test_stream_matches_list(self):
+        """A token iterator yields the same AST as a token list"""
+        parser = Parser(Lexer(PROGRAM).iter_tokens())
+        
+        assert parser.tokens is None
+        assert parser.parse() == parse_list(PROGRAM)
+    
+    def test_stream_is_consumed_lazily(self):
+        """The parser pulls tokens only as it needs them"""
+        pulled = []
+        
+        def tokens():
+            for token in Lexer("int x; int y;").iter_tokens():
+                pulled.append(token)
+                yield token
+        
+        parser = Parser(tokens())
+        assert len(pulled) == 1
+        parser.parse_declaration()
+        assert len(pulled) == 4
+    
+    def test_stream_errors(self):
+        """Errors carry positions of streamed tokens"""
+        with pytest.raises(ParserError, match="2:7"):
+            parse_string("int x;\nint y int z;")
+
+
+class TestTokenBuffer:
+    """Parser consumes a TokenBuffer directly"""
+    
+    def test_buffer_matches_list(self):
+        buffer = Lexer(PROGRAM, engine='regex').tokenize_buffer()
+        assert Parser(buffer).parse() == parse_list(PROGRAM)
+    
+    def test_buffer_errors(self):
+        buffer = Lexer("int x;\nint y = ;").tokenize_buffer()
+        with pytest.raises(ParserError, match="2:9"):
+            Parser(buffer).parse()
+
+
+
+def parse_expr(source):
+    """Parse a single expression statement inside main()"""
+    program = parse_string("int main() { %s; }" % source)
+    return program.declarations[0].body.statements[0].expression
+
+
+class TestPrecedence:
+    """Binding powers reproduce the grammar's precedence levels"""
+    
+    def test_levels(self):
+        expr = parse_expr("a || b && c == d < e + f * g")
+        assert expr == BinaryExpression('||', Identifier('a'), BinaryExpression(
+            '&&', Identifier('b'), BinaryExpression(
+                '==', Identifier('c'), BinaryExpression(
+                    '<', Identifier('d'), BinaryExpression(
+                        '+', Identifier('e'), BinaryExpression(
+                            '*', Identifier('f'), Identifier('g')))))))
+    
+    def test_left_associative(self):
+        expr = parse_expr("a - b - c * d % e")
+        assert expr == BinaryExpression(
+            '-', BinaryExpression('-', Identifier('a'), Identifier('b')),
+            BinaryExpression('%', BinaryExpression('*', Identifier('c'), Identifier('d')),
+                             Identifier('e')))
+    
+    def test_unary_and_assignment(self):
+        expr = parse_expr("x = y = -a * !b")
+        assert expr == AssignmentExpression('x', AssignmentExpression('y', BinaryExpression(
+            '*', UnaryExpression('-', Identifier('a')), UnaryExpression('!', Identifier('b')))))
+    
+    def test_invalid_assignment_target(self):
+        with pytest.raises(ParserError, match="Invalid assignment target"):
+            parse_expr("a + b = c")
+
+
+STATEMENTS = """
+const int N = 3;
+
+int main() {
+    const float scale = 0.5;
+    int total = 0;
+    int i;
+    read(i);
+    for (i = 0; i < N; i = i + 1) print(i * scale);
+    for (int j = 0; j < N; ) {
+        total = total + j;
+        j = j + 1;
+    }
+    for (; total > 0;) total = total - 1;
+    print(total);
+    return 0;
+}
+"""
+
+
+class TestStatements:
+    """for, read, print and const build their dedicated nodes"""
+    
+    @pytest.mark.parametrize("iterative", [False, True])
+    def test_nodes(self, iterative):
+        program = parse_string(STATEMENTS, iterative=iterative)
+        assert program.declarations[0] == VariableDeclaration('int', 'N', Literal(3, 'int'), True, 2, 1)
+        body = program.declarations[1].body.statements
+        assert body[0].is_const and not body[1].is_const
+        assert body[3] == ReadStatement('i')
+        assert body[4] == ForStatement(
+            AssignmentExpression('i', Literal(0, 'int')),
+            BinaryExpression('<', Identifier('i'), Identifier('N')),
+            AssignmentExpression('i', BinaryExpression('+', Identifier('i'), Literal(1, 'int'))),
+            PrintStatement(BinaryExpression('*', Identifier('i'), Identifier('scale'))),
+            9, 5, 10, 4)
+        assert (body[5].end_line, body[5].end_column) == (14, 4)
+        assert isinstance(body[5].init, VariableDeclaration) and body[5].increment is None
+        assert body[6].init is None and isinstance(body[6].body, ExpressionStatement)
+        assert body[7] == PrintStatement(Identifier('total'))
+    
+    @pytest.mark.parametrize("iterative", [False, True])
+    def test_optional_for_parts(self, iterative):
+        source = "int main() { for (const int n = 3;;) return n; }"
+        loop = parse_string(source, iterative=iterative).declarations[0].body.statements[0]
+        assert loop.init.is_const and loop.init.identifier == 'n'
+        assert loop.condition is None and loop.increment is None
+        assert parse_string(source, flat=True).to_ast() == parse_string(source)
+    
+    def test_endless_for_passes(self):
+        program = parse_string("int main() { int i = 0; for (;;) { i = i + 1; } }")
+        analyzer = SemanticAnalyzer()
+        assert analyzer.analyze(program), analyzer.errors
+        tac = format_tac_output(generate_tac(program, analyzer.symbol_table))
+        assert "for_start" in tac and "iffalse" not in tac
+    
+    def test_other_modes(self):
+        program = parse_string(STATEMENTS)
+        assert parse_string(STATEMENTS, flat=True).to_ast() == program
+        assert parse_string(STATEMENTS, lazy=True) == program
+    
+    def test_positions(self):
+        program = parse_string(STATEMENTS)
+        main = program.declarations[1]
+        assert (main.line, main.column) == (4, 1)
+        assert (main.body.line, main.body.column) == (4, 12)
+        assert (main.body.end_line, main.body.end_column) == (17, 1)
+        assert Block(main.body.statements, 4, 12, 17, 1) == main.body
+        for copy in (deserialize(serialize(program)), parse_string(STATEMENTS, flat=True).to_ast()):
+            body = copy.declarations[1].body
+            assert (body.line, body.column, body.end_line, body.end_column) == (4, 12, 17, 1)
+        assert (main.body.statements[0].line, main.body.statements[0].column) == (5, 5)
+        for mode in ({'iterative': True}, {'lazy': True}):
+            assert parse_string(STATEMENTS, **mode) == program
+    
+    def test_passes(self):
+        program = parse_string(STATEMENTS)
+        analyzer = SemanticAnalyzer()
+        assert analyzer.analyze(program), analyzer.errors
+        tac = format_tac_output(generate_tac(program, analyzer.symbol_table))
+        assert "read i" in tac and "print total" in tac
+        assert "for_start" in tac and "call" not in tac
+    
+    def test_const_is_checked(self):
+        analyzer = SemanticAnalyzer()
+        assert not analyzer.analyze(parse_string("int main() { const int x; return 0; }"))
+        assert "must be initialized" in str(analyzer.errors[0])
+    
+    @pytest.mark.parametrize("source, message", [
+        ("int main() { read(1); }", "Expected IDENTIFIER"),
+        ("int main() { print(); }", "Unexpected token"),
+        ("int main() { for (i = 0; i < 1) { } }", "Expected SEMICOLON"),
+        ("int main() { const x = 1; }", "Expected type"),
+        ("const int f() { }", "Expected SEMICOLON"),
+    ])
+    def test_errors(self, source, message):
+        with pytest.raises(ParserError, match=message) as recursive:
+            parse_string(source)
+        with pytest.raises(ParserError) as iterative:
+            parse_string(source, iterative=True)
+        assert str(iterative.value) == str(recursive.value)
+
+
+class TestNodes:
+    """AST nodes are slotted and keep their dataclass behaviour"""
+    
+    @pytest.mark.parametrize("cls", ASTNode.__subclasses__())
+    def test_no_instance_dict(self, cls):
+        assert all('__slots__' in klass.__dict__ for klass in cls.__mro__[:-1])
+    
+    def test_defaults_and_equality(self):
+        node = VariableDeclaration('int', 'x')
+        assert node.initializer is None and node.is_const is False
+        assert not hasattr(node, '__dict__')
+        assert node == VariableDeclaration('int', 'x', None, False)
+        assert node != VariableDeclaration('int', 'y')
+    
+    def test_pickle_round_trip(self):
+        program = parse_string(PROGRAM)
+        assert pickle.loads(pickle.dumps(program)) == program
+        lazy = parse_string(PROGRAM, lazy=True)
+        assert type(pickle.loads(pickle.dumps(lazy.declarations[1].body))) is Block
+
+
+class TestFlat:
+    """A FlatAST holds the same tree as the object AST"""
+    
+    @pytest.mark.parametrize("iterative", [False, True])
+    def test_same_tree(self, iterative):
+        flat = parse_string(PROGRAM, iterative=iterative, flat=True)
+        assert isinstance(flat, FlatAST)
+        assert flat.to_ast() == parse_string(PROGRAM)
+    
+    def test_from_ast_round_trip(self):
+        program = parse_string(PROGRAM)
+        assert FlatAST.from_ast(program).to_ast() == program
+    
+    def test_views(self):
+        flat = parse_string(PROGRAM, flat=True)
+        square = flat.program.declarations[1]
+        assert isinstance(square, FunctionDeclaration)
+        assert square.identifier == 'square'
+        assert square.parameters[0].param_type == 'int'
+        product = square.body.statements[0].value
+        assert isinstance(product, BinaryExpression)
+        assert (product.operator, product.left.name, product.right.name) == ('*', 'n', 'n')
+        assert flat.program.declarations[0].initializer.value == 10
+    
+    def test_passes_walk_views(self):
+        results = []
+        for program in (parse_string(PROGRAM), parse_string(PROGRAM, flat=True).program):
+            analyzer = SemanticAnalyzer()
+            assert analyzer.analyze(program)
+            results.append(format_tac_output(generate_tac(program, analyzer.symbol_table)))
+        assert results[0] == results[1]
+    
+    def test_is_compact(self):
+        flat = parse_string("int main() { return %s; }" % " + ".join(["x"] * 1000), flat=True)
+        assert flat.nbytes() < 32 * len(flat)
+
+
+class TestLazy:
+    """Lazy mode defers function bodies until they are used"""
+    
+    @pytest.mark.parametrize("tokens", [
+        lambda source: Lexer(source).tokenize(),
+        lambda source: Lexer(source).iter_tokens(),
+        lambda source: Lexer(source).tokenize_buffer(),
+    ])
+    def test_same_tree(self, tokens):
+        program = Parser(tokens(PROGRAM), lazy=True).parse()
+        assert program == parse_string(PROGRAM)
+    
+    def test_signatures_only(self):
+        program = parse_string(PROGRAM, lazy=True)
+        square = program.declarations[1]
+        assert isinstance(square.body, LazyBlock)
+        assert (square.identifier, square.parameters[0].identifier) == ('square', 'n')
+        assert not square.body.parsed
+        assert isinstance(square.body.statements[0], ReturnStatement)
+        assert square.body.parsed
+    
+    def test_body_errors_are_deferred(self):
+        program = parse_string("int f() { return 1 +; } int main() { return 0; }", lazy=True)
+        assert program.declarations[1].body.statements[0].value.value == 0
+        with pytest.raises(ParserError, match="1:21 - Unexpected token"):
+            program.declarations[0].body.statements
+    
+    def test_unclosed_body(self):
+        with pytest.raises(ParserError, match="Expected RBRACE"):
+            parse_string("int main() { if (x) { }", lazy=True)
+
+
+class TestParallel:
+    """parse_parallel reassembles the serial parse"""
+    
+    @pytest.mark.parametrize("tokens", [
+        lambda source: Lexer(source).tokenize(),
+        lambda source: Lexer(source).tokenize_buffer(),
+    ])
+    def test_same_program(self, tokens):
+        program = parse_parallel(tokens(PROGRAM), workers=2, min_tokens=0)
+        assert program == parse_string(PROGRAM)
+        assert not any(isinstance(d.body, LazyBlock) for d in program.declarations[1:])
+    
+    @pytest.mark.parametrize("source", [
+        "int f() { return 1 +; } int main() { return 0; }",
+        "int f() { return (1; } int g() { return 0; } int 5;",
+        "int f() { return 0; } int main() { {",
+    ])
+    def test_first_error(self, source):
+        with pytest.raises(ParserError) as serial:
+            parse_string(source)
+        with pytest.raises(ParserError) as parallel:
+            parse_parallel(Lexer(source).tokenize(), workers=2, min_tokens=0)
+        assert str(parallel.value) == str(serial.value)
+    
+    def test_no_functions(self):
+        source = "int x = 1; const float y = 2.5;"
+        program = parse_parallel(Lexer(source).tokenize(), workers=2, min_tokens=0)
+        assert program == parse_string(source)
+    
+    def test_hand_built_tokens(self):
+        tokens = [Token(token.type, token.value, token.line, token.column)
+                  for token in Lexer(PROGRAM).tokenize()]
+        program = parse_parallel(tokens, workers=2, min_tokens=0)
+        assert program == parse_string(PROGRAM)
+        body = program.declarations[-1].body
+        assert (body.line, body.column) != (0, 0)
+    
+    def test_error_pickles(self):
+        with pytest.raises(ParserError) as error:
+            parse_string("int main() { 1 = 2; }")
+        copy = pickle.loads(pickle.dumps(error.value))
+        assert str(copy) == str(error.value)
+        assert copy.message == "Invalid assignment target"
+
+
+class TestSerialize:
+    """serialize/deserialize round-trip a Program through bytes"""
+    
+    def test_round_trip(self):
+        program = parse_string(PROGRAM)
+        data = serialize(program)
+        assert deserialize(data) == program
+        assert len(data) < len(pickle.dumps(program)) / 2
+    
+    def test_values_and_positions(self):
+        program = Program([
+            VariableDeclaration('float', 'f', Literal(-2.5, 'float'), True, 300, 7),
+            VariableDeclaration('int', 'i', Literal(-70000, 'int')),
+            VariableDeclaration('bool', 'b', Literal(True, 'bool')),
+            VariableDeclaration('int', 'one', Literal(1, 'int')),
+            VariableDeclaration('char', 's', Literal("\u00e9t\u00e9", 'string'), line=1 << 20),
+        ])
+        copy = deserialize(serialize(program))
+        assert copy == program
+        values = [d.initializer.value for d in copy.declarations]
+        assert [type(value) for value in values] == [float, int, bool, int, str]
+        assert (copy.declarations[0].line, copy.declarations[0].column) == (300, 7)
+    
+    def test_empty_lists(self):
+        program = parse_string('int main() { }')
+        copy = deserialize(serialize(program))
+        assert copy == program
+        assert copy.declarations[0].body.statements == []
+        assert copy.declarations[0].parameters == []
+    
+    def test_leaves_gc_alone(self):
+        data = serialize(parse_string(PROGRAM))
+        gc.disable()
+        try:
+            deserialize(data, pause_gc=True)
+            assert not gc.isenabled()
+        finally:
+            gc.enable()
+        deserialize(data, pause_gc=True)
+        assert gc.isenabled()
+    
+    def test_lazy_bodies(self):
+        assert deserialize(serialize(parse_string(PROGRAM, lazy=True))) == parse_string(PROGRAM)
+    
+    def test_deep_tree(self):
+        program = parse_string("int main() { return %s1%s; }" % ("-(" * DEPTH, ")" * DEPTH),
+                               iterative=True)
+        data = serialize(program)
+        copy = deserialize(data)
+        assert serialize(copy) == data
+    
+    @pytest.mark.parametrize("data", [b"", b"MLAST", b"PK\x03\x04", b"MLAST\x63"])
+    def test_not_an_ast(self, data):
+        with pytest.raises(ASTFormatError):
+            deserialize(data)
+    
+    def test_truncated(self):
+        data = serialize(parse_string(PROGRAM))
+        with pytest.raises(ASTFormatError, match="Corrupt"):
+            deserialize(data[:-10])
+
+
+def reparse(source, old, new):
+    """Edit the first occurrence of old in source and reparse it incrementally"""
+    lexer = IncrementalLexer(source)
+    program = Parser(lexer.tokens).parse()
+    old_tokens = list(lexer.tokens)
+    edit = Edit(source.index(old), len(old), new)
+    lexer.relex(edit)
+    result = Parser.reparse(program, old_tokens, lexer.tokens, edit)
+    assert result[0] == parse_string(edit.apply(source))
+    return program, result
+
+
+class TestReparse:
+    """Parser.reparse reuses the declarations an edit leaves alone"""
+    
+    def test_edit_in_function(self):
+        old, (new, rebuilt) = reparse(PROGRAM, "n * n", "n * n * n")
+        assert rebuilt == [1]
+        assert new.declarations[0] is old.declarations[0]
+        assert new.declarations[2] is old.declarations[2]
+        assert new.declarations[1].body.statements[0].value.left.operator == '*'
+    
+    def test_insert_declaration(self):
+        old, (new, rebuilt) = reparse(PROGRAM, "\n\n", "\nint other;\n")
+        assert rebuilt == [0, 1]
+        assert new.declarations[2:] == old.declarations[1:]
+        assert new.declarations[3] is old.declarations[2]
+    
+    def test_remove_declaration(self):
+        old, (new, rebuilt) = reparse(PROGRAM, "int limit = 10;", "")
+        assert rebuilt == []
+        assert new.declarations == old.declarations[1:]
+    
+    def test_fresh_tokens(self):
+        program = parse_string(PROGRAM)
+        edit = Edit(PROGRAM.index("10"), 2, "20")
+        tokens = Lexer(edit.apply(PROGRAM)).tokenize()
+        new, rebuilt = Parser.reparse(program, Lexer(PROGRAM).tokenize(), tokens, edit)
+        assert rebuilt == [0]
+        assert new.declarations[0].initializer.value == 20
+        assert new.declarations[1:] == program.declarations[1:]
+    
+    def test_merged_declarations(self):
+        source = "int f() { x; } int g() { y; } int h() { z; }"
+        old, (new, rebuilt) = reparse(source, "; } int g() {", ";")
+        assert rebuilt == [0] and len(new.declarations) == 2
+        assert new.declarations[1] is old.declarations[2]
+    
+    def test_errors(self):
+        with pytest.raises(ParserError, match="Expected RBRACE"):
+            reparse(PROGRAM, "return total;\n}", "return total;\n")
+
+
+DEPTH = 100000
+
+
+def analyze_deep(source):
+    """Parse iteratively, then run the semantic and TAC passes"""
+    program = parse_string(source, iterative=True)
+    analyzer = SemanticAnalyzer()
+    assert analyzer.analyze(program), analyzer.errors
+    generate_tac(program, analyzer.symbol_table)
+    return program
+
+
+class TestIterative:
+    """The explicit-stack mode handles nesting beyond the recursion limit"""
+    
+    def test_same_ast(self):
+        assert parse_string(PROGRAM, iterative=True) == parse_string(PROGRAM)
+    
+    @pytest.mark.parametrize("source", [
+        "x = (f)(a, g(b, -c), h())",
+        "-f(x) * !(a || b) - - - c",
+        "a = b = (c = d) + e",
+    ])
+    def test_same_expression(self, source):
+        program = "int main() { if (a) { %s; } else if (b) while (c) { } return 0; }" % source
+        assert parse_string(program, iterative=True) == parse_string(program)
+    
+    @pytest.mark.parametrize("source, message", [
+        ("int main() { a + b = c; }", "Invalid assignment target"),
+        ("int main() { (a)(b)(c); 1(2); }", "Only identifiers can be called"),
+        ("int main() { if (a) { b; }", "Expected RBRACE"),
+        ("int main() { f(a, ; }", "Unexpected token"),
+    ])
+    def test_same_errors(self, source, message):
+        with pytest.raises(ParserError, match=message) as recursive:
+            parse_string(source)
+        with pytest.raises(ParserError) as iterative:
+            parse_string(source, iterative=True)
+        assert str(iterative.value) == str(recursive.value)
+    
+    def test_deep_parentheses(self):
+        program = analyze_deep("int main() { return %s1%s; }" % ("(" * DEPTH, ")" * DEPTH))
+        assert isinstance(program.declarations[0].body.statements[0].value, Literal)
+    
+    def test_deep_unary(self):
+        analyze_deep("int main() { bool b = %strue; return 0; }" % ("!" * DEPTH))
+        analyze_deep("int main() { return %s1%s; }" % ("-(" * DEPTH, ")" * DEPTH))
+    
+    def test_deep_blocks(self):
+        analyze_deep("int main() { %s{ } return 0; }" % ("if (true) " * DEPTH))
+        program = analyze_deep("int main() { %s%s return 0; }" % ("{" * DEPTH, "}" * DEPTH))
+        block = program.declarations[0].body
+        for _ in range(DEPTH):
+            block = block.statements[0]
+        assert block.statements == []
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,413 @@
+"""
+Tests for the semantic passes over parsed programs
+Name resolution and the symbol information analysis leaves behind
+"""
+
+import pytest
+from src.parser import parse_string
+from src.parser.ast_nodes import *
+import pickle
+from src.semantic import SemanticAnalyzer, SymbolTable, FlatSymbolTable, SymbolKind, DataType, TypeChecker
+from src.semantic import SemanticError, analyze_parallel
+from src.semantic import parallel
+from src.semantic.symbol_table import binary_rule, unary_rule
+from src.codegen import generate_tac, format_tac_output
+
+
+SHADOWING = """
+int x = 1;
+
+int twice(int n) {
+    return n * 2;
+}
+
+int main() {
+    int y;
+    read(y);
+    {
+        float x = 2.5;
+        x = x + y;
+    }
+    x = twice(x);
+    return x;
+}
+"""
+
+
+def analyze(program):
+    """Analyze a program, which must be free of errors"""
+    analyzer = SemanticAnalyzer()
+    assert analyzer.analyze(program), analyzer.errors
+    return analyzer
+
+
+class TestResolution:
+    """Analysis binds every name-using node to its Symbol"""
+    
+    def test_bindings(self):
+        program = parse_string(SHADOWING)
+        analyze(program)
+        main = program.declarations[2].body.statements
+        
+        read = main[1]
+        assert read.symbol.name == 'y' and read.symbol.kind == SymbolKind.VARIABLE
+        
+        inner = main[2].statements[1].expression
+        assert inner.symbol.data_type == DataType.FLOAT
+        assert inner.value.left.symbol is inner.symbol
+        assert inner.value.right.symbol is read.symbol
+        
+        outer = main[3].expression
+        assert outer.symbol.data_type == DataType.INT and outer.symbol.scope_level == 0
+        assert outer.value.symbol.kind == SymbolKind.FUNCTION
+        assert outer.value.arguments[0].symbol is outer.symbol
+        assert main[4].value.symbol is outer.symbol
+    
+    def test_parameters(self):
+        program = parse_string(SHADOWING)
+        analyze(program)
+        product = program.declarations[1].body.statements[0].value
+        assert product.left.symbol.kind == SymbolKind.PARAMETER
+    
+    def test_undefined_is_unbound(self):
+        program = parse_string("int main() { return z; }")
+        assert not SemanticAnalyzer().analyze(program)
+        assert program.declarations[0].body.statements[0].value.symbol is None
+    
+    def test_not_a_field(self):
+        program = parse_string(SHADOWING)
+        analyze(program)
+        assert program == parse_string(SHADOWING)
+        assert 'symbol' not in repr(program.declarations[2])
+    
+    def test_flat_views(self):
+        flat = parse_string(SHADOWING, flat=True)
+        analyze(flat.program)
+        read = flat.program.declarations[2].body.statements[1]
+        assert read.symbol.name == 'y'
+        assert len(flat.symbols) > 0
+    
+    def test_generator_reads_bindings(self, monkeypatch):
+        program = parse_string(SHADOWING)
+        analyzer = analyze(program)
+        expected = format_tac_output(generate_tac(program, analyzer.symbol_table))
+        
+        def lookup(name):
+            raise AssertionError(f"looked up {name}")
+        monkeypatch.setattr(analyzer.symbol_table, 'lookup_symbol', lookup)
+        assert format_tac_output(generate_tac(program, analyzer.symbol_table)) == expected
+        assert "t2 = call twice, 1" in expected
+    
+    def test_deep_scopes(self):
+        depth = 5000
+        source = "int main() { int x = 0; %s x = x + 1; %s return x; }" % ("{" * depth, "}" * depth)
+        program = parse_string(source, iterative=True)
+        analyze(program)
+
+
+class TestFlatSymbolTable:
+    """FlatSymbolTable behaves like SymbolTable"""
+    
+    def test_shadowing(self):
+        table = FlatSymbolTable()
+        assert table.define_symbol('x', SymbolKind.VARIABLE, DataType.INT)
+        outer = table.lookup_symbol('x')
+        table.enter_scope()
+        assert table.lookup_local('x') is None
+        assert table.define_symbol('x', SymbolKind.VARIABLE, DataType.FLOAT)
+        assert not table.define_symbol('x', SymbolKind.VARIABLE, DataType.BOOL)
+        inner = table.lookup_symbol('x')
+        assert inner.data_type == DataType.FLOAT and inner.scope_level == 1
+        assert table.lookup_symbol('print').kind == SymbolKind.FUNCTION
+        assert [scope.level for scope in table.scope_stack] == [0, 1]
+        assert table.current_scope.symbols == {'x': inner}
+        table.exit_scope()
+        assert table.lookup_symbol('x') is outer
+        assert table.get_current_scope_level() == 0
+        with pytest.raises(RuntimeError):
+            table.exit_scope()
+    
+    def test_unwinds_bindings(self):
+        table = FlatSymbolTable()
+        table.enter_scope()
+        table.define_symbol('local', SymbolKind.VARIABLE, DataType.INT)
+        table.exit_scope()
+        assert table.lookup_symbol('local') is None
+        assert 'local' not in table.bindings
+    
+    @pytest.mark.parametrize("source", [
+        SHADOWING,
+        "int main() { int x; { x = y; int x = 1; } return x; }",
+        "int f(int a, int a) { return a; } int main() { const int c = 1; c = 2; return f(1); }",
+        "int main() { for (int i = 0; i < 3; i = i + 1) { read(i); } return i; }",
+    ])
+    def test_same_analysis(self, source):
+        results = []
+        for table in (SymbolTable(), FlatSymbolTable()):
+            program = parse_string(source)
+            analyzer = SemanticAnalyzer(table)
+            analyzer.analyze(program)
+            tac = format_tac_output(generate_tac(program, table))
+            results.append(([str(error) for error in analyzer.errors],
+                            [repr(symbol) for symbol in table.get_all_symbols()], tac))
+        assert results[0] == results[1]
+
+
+
+class TestScopeTree:
+    """Analysis leaves a scope tree that answers positional queries"""
+    
+    @pytest.mark.parametrize("table_class", [SymbolTable, FlatSymbolTable])
+    def test_retained(self, table_class):
+        program = parse_string(SHADOWING)
+        table = table_class()
+        SemanticAnalyzer(table).analyze(program)
+        names = [symbol.name for symbol in table.get_all_symbols()]
+        assert names == ['read', 'print', 'x', 'twice', 'main', 'n', 'y', 'x']
+        
+        twice, main = table.global_scope.children
+        assert twice.node is program.declarations[1] and list(twice.symbols) == ['n']
+        body, = main.children
+        assert body.node is program.declarations[2].body and list(body.symbols) == ['y']
+        assert body.children[0].span == ((11, 5), (14, 5))
+        assert table.global_scope.span[0] == (0, 0)
+    
+    @pytest.mark.parametrize("flat", [False, True])
+    def test_index(self, flat):
+        program = parse_string(SHADOWING, flat=flat)
+        program = program.program if flat else program
+        index = analyze(program).symbol_table.scope_index()
+        
+        assert index.lookup('x', 13, 9).data_type == DataType.FLOAT
+        assert index.lookup('x', 15, 5).scope_level == 0
+        assert index.lookup('n', 5, 12).kind == SymbolKind.PARAMETER
+        assert index.lookup('n', 15, 5) is None
+        assert index.lookup('y', 8, 12) is None
+        assert index.scope_at(14, 6) is index.scope_at(9, 5)
+        assert index.scope_at(1, 1) is index.root
+        assert set(index.visible_symbols(8, 12)) == {'read', 'print', 'x', 'twice', 'main'}
+        assert index.visible_symbols(13, 9)['y'].name == 'y'
+    
+    def test_adjacent_blocks(self):
+        program = parse_string("int main() { {int a;}{int b;} return 0; }")
+        index = analyze(program).symbol_table.scope_index()
+        assert set(index.visible_symbols(1, 19)) >= {'a'}
+        assert 'a' not in index.visible_symbols(1, 22) and 'b' in index.visible_symbols(1, 28)
+        assert index.scope_at(1, 30).node is program.declarations[0].body
+    
+    def test_for_scope(self):
+        source = ("int main() {\n"
+                  "    int s = 0;\n"
+                  "    for (int i = 0; i < 3; i = i + 1) s = s + i;\n"
+                  "    for (int i = 0; i < 3; i = i + 1) { s = s + i; }\n"
+                  "    return s;\n"
+                  "}")
+        program = parse_string(source)
+        table = analyze(program).symbol_table
+        loops = program.declarations[0].body.statements[1:3]
+        function_scope = table.global_scope.children[-1]
+        assert [scope.node for scope in function_scope.children[0].children] == loops
+        index = table.scope_index()
+        assert index.scope_at(3, 40).node is loops[0]
+        assert index.lookup('i', 3, 40).line == 3
+        assert index.lookup('i', 4, 41).line == 4
+        assert index.lookup('i', 5, 12) is None
+    
+    def test_later_function(self):
+        program = parse_string("int main() { return f(1); }\nint f(int a) { return a; }")
+        index = analyze(program).symbol_table.scope_index()
+        assert index.lookup('f', 1, 21).kind == SymbolKind.FUNCTION
+        assert 'f' in index.visible_symbols(1, 21)
+
+
+
+class TestTypeChecker:
+    """The precomputed tables give the typing rules' answers"""
+    
+    @pytest.mark.parametrize("op", ['+', '%', '<', '>=', '==', '!=', '&&', '||', '^'])
+    def test_binary(self, op):
+        for left in DataType:
+            for right in DataType:
+                assert TypeChecker.check_binary_operation(op, left, right) == \
+                    binary_rule(op, left, right)
+    
+    def test_unary_and_compatibility(self):
+        for operand in DataType:
+            for op in ('-', '!', '+'):
+                assert TypeChecker.check_unary_operation(op, operand) == unary_rule(op, operand)
+            for value in DataType:
+                assert TypeChecker.check_assignment(operand, value) == \
+                    operand.is_compatible_with(value)
+        assert TypeChecker.check_function_call([DataType.FLOAT, DataType.BOOL],
+                                               [DataType.INT, DataType.BOOL])
+        assert not TypeChecker.check_function_call([DataType.INT], [DataType.BOOL])
+        assert not TypeChecker.check_function_call([DataType.INT], [])
+    
+    def test_type_names(self):
+        assert DataType.from_string('float') == DataType.FLOAT
+        assert DataType.from_string('Bool') == DataType.BOOL
+        assert DataType.from_string('string') == DataType.ERROR
+
+
+
+def errors_of(source):
+    """Messages of the errors analysis reports for source"""
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(parse_string(source))
+    return [error.message for error in analyzer.errors]
+
+
+# Forward calls, a global read before any declaration of it, bodies with
+# errors, and deeply nested blocks
+FUNCTIONS = "int g; int h; int main() { int r = later(g); return r + h; } " + " ".join(
+    f"int f{n}(int a) {{ {'{' * 300} a = a + {n}; {'}' * 300} g = a; return a; }}"
+    if n % 2 else f"int f{n}(int a) {{ bool b = a; return missing; }}"
+    for n in range(8)) + " int later(int a) { return f3(a); }"
+
+
+class TestTwoPhase:
+    """Bodies are checked after every signature, independently"""
+    
+    def test_forward_call(self):
+        assert errors_of("int main() { return f(1); } int f(int a) { return a; }") == []
+    
+    def test_later_global(self):
+        assert errors_of("int main() { return g; } int g = 1;")[0] == "Undefined variable: g"
+    
+    def test_later_global_without_positions(self):
+        # Visibility follows declaration order, not source positions
+        program = Program([
+            FunctionDeclaration('int', 'main', [], Block([ReturnStatement(Identifier('g'))])),
+            VariableDeclaration('int', 'g', Literal(1, 'int')),
+        ])
+        analyzer = SemanticAnalyzer()
+        assert not analyzer.analyze(program)
+        assert [error.message for error in analyzer.errors][0] == "Undefined variable: g"
+    
+    def test_global_initialization(self):
+        assigned = "int g; int main() { return g; } int init() { g = 1; return 0; }"
+        assert errors_of(assigned) == []
+        assert errors_of("int g; int main() { return g; }") == \
+            ["Variable 'g' used before initialization"]
+        assert errors_of("int g; int main() { return g; } void set() { g = 1; }") == []
+    
+    def test_global_initialization_in_order(self):
+        # A body's own later assignment does not initialize its earlier read
+        assert errors_of("int g; int main() { int y = g; g = 1; return y; }") == \
+            ["Variable 'g' used before initialization"]
+        assert errors_of("int g; int main() { int y = g; g = 1; return y; } "
+                         "void set() { g = 1; }") == []
+    
+    def test_for_variable_scope(self):
+        loop = "for (int i = 0; i < 3; i = i + 1) { s = s + i; } "
+        assert errors_of("int main() { int s = 0; " + loop + loop + "return s; }") == []
+        assert errors_of("int main() { int s = 0; " + loop + "int i = 5; return s + i; }") == []
+        assert errors_of("int main() { int s = 0; " + loop + "return i; }") == \
+            ["Undefined variable: i", "Return type error does not match function return type int"]
+    
+    def test_declaration_wrappers(self):
+        source = "int g; int main() { return f(g); } int f(int a) { g = a; return a; } int f() { }"
+        analyzer = SemanticAnalyzer()
+        assert analyzer.analyze_program(parse_string(source)) is False
+        assert [error.message for error in analyzer.errors] == ["Function 'f' already defined"]
+        
+        analyzer = SemanticAnalyzer()
+        program = parse_string("int g = 1; int twice(int n) { return n * 2; } "
+                               "int main() { return twice(g); } int main() { return x; }")
+        analyzer.walk(analyzer.analyze_variable_declaration(program.declarations[0], True))
+        for function in program.declarations[1:]:
+            analyzer.analyze_function_declaration(function)
+        assert analyzer.finish() is False
+        assert [error.message for error in analyzer.errors] == ["Function 'main' already defined"]
+        assert program.declarations[2].body.statements[0].value.symbol.kind == SymbolKind.FUNCTION
+    
+    def test_source_order(self):
+        messages = errors_of("int main() { return x; } int main() { return 0; } int f() { return y; }")
+        assert messages == ["Undefined variable: x", "Return type error does not match function "
+                            "return type int", "Function 'main' already defined",
+                            "Undefined variable: y", "Return type error does not match function "
+                            "return type int"]
+
+
+class TestParallel:
+    """analyze_parallel reports what the serial analysis does"""
+    
+    @pytest.mark.parametrize("table_class", [SymbolTable, FlatSymbolTable])
+    def test_same_analysis(self, table_class):
+        serial = SemanticAnalyzer(table_class())
+        serial.analyze(parse_string(FUNCTIONS, iterative=True))
+        program = parse_string(FUNCTIONS, iterative=True)
+        success, table, errors = analyze_parallel(program, workers=2, symbol_table=table_class(),
+                                                  min_functions=1)
+        assert not success and len(errors) == 13
+        assert [str(error) for error in errors] == [str(error) for error in serial.errors]
+        assert [repr(symbol) for symbol in table.get_all_symbols()] == \
+            [repr(symbol) for symbol in serial.symbol_table.get_all_symbols()]
+        assert table.lookup_symbol('h').is_initialized is False
+        assert table.lookup_symbol('g').is_initialized is True
+        
+        index = table.scope_index()
+        function = program.declarations[4]
+        assert index.scope_at(function.line, function.column + 1).node is function
+        assert index.lookup('a', function.line, function.column + 20).kind == SymbolKind.PARAMETER
+    
+    def test_serialized_chunks(self, monkeypatch):
+        monkeypatch.setattr(parallel.multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+        serial = SemanticAnalyzer()
+        serial.analyze(parse_string(FUNCTIONS, iterative=True))
+        _, _, errors = analyze_parallel(parse_string(FUNCTIONS, iterative=True), workers=2,
+                                        min_functions=1)
+        assert [str(error) for error in errors] == [str(error) for error in serial.errors]
+    
+    def test_in_process(self):
+        program = parse_string(SHADOWING)
+        success, table, errors = analyze_parallel(program, workers=2)
+        assert success and errors == []
+        assert program.declarations[2].body.statements[1].symbol.name == 'y'
+    
+    @pytest.mark.parametrize("start_methods", [None, ['spawn']])
+    def test_bindings(self, monkeypatch, start_methods):
+        if start_methods:
+            monkeypatch.setattr(parallel.multiprocessing, 'get_all_start_methods',
+                                lambda: start_methods)
+        program = parse_string(SHADOWING)
+        success, table, errors = analyze_parallel(program, workers=2, min_functions=1)
+        assert success and errors == []
+        symbols = {id(symbol) for symbol in table.get_all_symbols()}
+        serial = parse_string(SHADOWING)
+        analyze(serial)
+        nodes = parallel.bound_nodes(program.declarations[2])
+        expected_nodes = parallel.bound_nodes(serial.declarations[2])
+        assert len(nodes) == len(expected_nodes) == 8
+        for node, expected in zip(nodes, expected_nodes):
+            assert node.symbol is not None and id(node.symbol) in symbols
+            assert repr(node.symbol) == repr(expected.symbol)
+        assert program.declarations[2].body.statements[2].statements[1].expression.symbol \
+            .data_type == DataType.FLOAT
+    
+    def test_for_scopes(self):
+        source = " ".join(f"int f{n}(int a) {{ for (int i = 0; i < a; i = i + 1) "
+                          f"for (int j = i; j < a; j = j + 1) {{ a = a - j; }} "
+                          f"for (int i = 0; i < a; i = i + 1) a = a - i; return a; }}"
+                          for n in range(4)) + " int main() { return f0(3); }"
+        serial = analyze(parse_string(source)).symbol_table
+        program = parse_string(source)
+        success, table, errors = analyze_parallel(program, workers=2, min_functions=1)
+        assert success and errors == []
+        shape = lambda table: [(scope.level, scope.span, sorted(scope.symbols))
+                               for scope in table.global_scope.walk()]
+        assert shape(table) == shape(serial)
+        loop = program.declarations[1].body.statements[0]
+        assert table.scope_index().scope_at(loop.line, loop.column + 5).node is loop
+        assert all(node.symbol is not None
+                   for node in parallel.bound_nodes(program.declarations[1]))
+    
+    def test_error_pickles(self):
+        error = SemanticError("Undefined variable: x", 3, 7)
+        copy = pickle.loads(pickle.dumps(error))
+        assert (copy.message, copy.line, copy.column) == ("Undefined variable: x", 3, 7)
+        assert str(copy) == str(error)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])